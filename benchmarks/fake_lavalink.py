@@ -0,0 +1,734 @@
+"""
+Servidor lavalink falso, com o mesmo protocolo (websocket e REST v3/v4) usado pelo wavelink 2.x.
+
+Diferente do FakeNode (benchmarks/fakes.py), que substitui o node dentro do processo, este servidor escuta em
+localhost e é usado por um wavelink.Node comum, portanto o bot inteiro (conexão, reconexão, decodificação das músicas e
+eventos do websocket) roda como em produção, apenas sem áudio. As músicas vêm do mesmo catálogo determinístico do
+FakeNode: pesquisas retornam "search_size" músicas, URLs com "list=" retornam playlists com "playlist_size" músicas e
+URLs de vídeos retornam o próprio vídeo.
+
+Cada rota pode ter uma latência própria (mais uma variação sorteada com "seed", portanto reproduzível) e falhas podem
+ser injetadas com inject(): erros e respostas lentas no REST, pesquisas que falham, músicas que falham ou travam ao
+tocar, além de derrubar os websockets (drop_websockets) ou o servidor inteiro (restart) para testar reconexões.
+
+Executar a partir da raiz do projeto e apontar LAVALINK_HOST e LAVALINK_PASSWORD do .env para ele:
+
+    python -m benchmarks.fake_lavalink --port 2333 --password youshallnotpass --rest-latency 0.05 --track-length 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import random
+import time
+import urllib.parse
+import uuid
+import zlib
+from collections import Counter
+from http import HTTPStatus
+from typing import Callable
+
+from aiohttp import WSMsgType, web
+
+from .queue_memory import fake_payload
+
+
+# Tipos de falha aceitos por inject() e a rota afetada por cada um
+FAULTS = {
+    'error': None,
+    'slow': None,
+    'load_failed': 'loadtracks',
+    'no_matches': 'loadtracks',
+    'track_exception': 'players',
+    'track_stuck': 'players'
+}
+
+
+def load_tracks(identifier: str, search_size: int = 5, playlist_size: int = 100) -> dict:
+    """
+    Resposta do "loadtracks" (formato do lavalink 3.7) para um identificador, sempre a mesma para o mesmo identificador.
+
+    :param identifier: Pesquisa (ytsearch:, scsearch: ou ytmsearch:) ou URL
+    :param search_size: Quantidade de músicas retornadas por pesquisas
+    :param playlist_size: Quantidade de músicas das playlists
+    :return: Payload com loadType, playlistInfo e tracks
+    """
+    if identifier.startswith(('ytsearch:', 'scsearch:', 'ytmsearch:')):
+        base = zlib.crc32(identifier.encode()) % 10 ** 9 * 100
+        tracks = [fake_payload(base + index) for index in range(search_size)]
+
+        return {'loadType': 'SEARCH_RESULT', 'playlistInfo': {}, 'tracks': tracks}
+
+    params = urllib.parse.parse_qs(urllib.parse.urlparse(identifier).query)
+
+    if 'list' in params:
+        base = zlib.crc32(params['list'][0].encode()) % 10 ** 9 * 10 ** 4
+        tracks = [fake_payload(base + index) for index in range(playlist_size)]
+
+        return {'loadType': 'PLAYLIST_LOADED', 'playlistInfo': {'name': params['list'][0]}, 'tracks': tracks}
+
+    video = params.get('v', [''])[0]
+
+    if not video:
+        return {'loadType': 'NO_MATCHES', 'playlistInfo': {}, 'tracks': []}
+
+    index = int(video) if video.isdigit() else zlib.crc32(video.encode())
+
+    return {'loadType': 'TRACK_LOADED', 'playlistInfo': {}, 'tracks': [fake_payload(index)]}
+
+
+def decode_track(encoded: str) -> dict | None:
+    """
+    Decodifica uma música do catálogo falso (o identificador fica dentro do "encoded").
+
+    :param encoded: Campo "encoded" da música
+    :return: Payload da música ou None caso não seja do catálogo
+    """
+    try:
+        decoded = base64.b64decode(encoded).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+    # "QAAA" + identificador, repetido 12 vezes
+    identifier = decoded[4:len(decoded) // 12]
+
+    if not identifier.isdigit():
+        return None
+
+    payload = fake_payload(int(identifier))
+    return payload if payload['encoded'] == encoded else None
+
+
+class _Fault:
+    """Falha injetada, consumida pelas próximas "times" requisições compatíveis."""
+
+    __slots__ = ('kind', 'times', 'match', 'delay', 'status')
+
+    def __init__(self, kind: str, times: int, match: str | None, delay: float, status: int):
+        self.kind = kind
+        self.times = times
+        self.match = match
+        self.delay = delay
+        self.status = status
+
+
+class _Player:
+    """Estado de um player do ponto de vista do lavalink."""
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.track: dict | None = None
+        self.voice: dict = {}
+        self.volume = 100
+        self.paused = False
+
+        # Posição (ms) no instante "started" (relógio do event loop), timers do início e do fim (ou travamento)
+        self.position = 0
+        self.started = 0.0
+        self.length = 0.0
+        self.start_timer: asyncio.TimerHandle | None = None
+        self.timer: asyncio.TimerHandle | None = None
+
+    def current_position(self, now: float) -> int:
+        if self.track is None:
+            return 0
+
+        if self.paused:
+            return self.position
+
+        return min(int(self.position + (now - self.started) * 1000), self.track['info']['length'])
+
+    def cancel_timers(self, start: bool = True):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+        if start and self.start_timer:
+            self.start_timer.cancel()
+            self.start_timer = None
+
+
+class _Session:
+    """Websocket de um cliente, com os players criados por ele."""
+
+    def __init__(self, session_id: str, websocket: web.WebSocketResponse, transport: asyncio.Transport):
+        self.id = session_id
+        self.websocket = websocket
+        self.transport = transport
+        self.players: dict[int, _Player] = {}
+
+        # Mensagens enviadas em ordem, cada uma no instante (relógio do event loop) em que deve chegar
+        self.outbox: asyncio.Queue[tuple[float, dict]] = asyncio.Queue()
+
+
+class FakeLavalinkServer:
+    """
+    Servidor lavalink em localhost.
+
+    Com "track_length" cada música termina após a quantidade de segundos retornada pela função, do contrário toca pela
+    duração informada no catálogo. Toda requisição é contada em "requests" ("MÉTODO rota") e todo evento enviado em
+    "events". Com port=0 o sistema escolhe uma porta livre, disponível em "port" após start().
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, password: str = 'youshallnotpass',
+                 version: str = '4.0.0', rest_latency: float = 0.0, latencies: dict[str, float] | None = None,
+                 jitter: float = 0.0, event_latency: float = 0.0, start_delay: float = 0.0,
+                 track_length: Callable[[], float] | None = None, search_size: int = 5, playlist_size: int = 100,
+                 update_interval: float = 5.0, stats_interval: float = 60.0, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.version = version
+
+        # Latência base das rotas, latência de rotas específicas (loadtracks, decodetrack, players...) e variação
+        self.rest_latency = rest_latency
+        self.latencies = latencies or {}
+        self.jitter = jitter
+
+        # Atraso dos eventos do websocket e entre o pedido para tocar e o TrackStartEvent
+        self.event_latency = event_latency
+        self.start_delay = start_delay
+
+        self.track_length = track_length
+        self.search_size = search_size
+        self.playlist_size = playlist_size
+        self.update_interval = update_interval
+        self.stats_interval = stats_interval
+
+        self.requests: Counter[str] = Counter()
+        self.events: Counter[str] = Counter()
+
+        self._random = random.Random(seed)
+        self._faults: list[_Fault] = []
+        self._sessions: dict[str, _Session] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._runner: web.AppRunner | None = None
+        self._started = time.time()
+
+    @property
+    def uri(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def players(self) -> int:
+        return sum(len(session.players) for session in self._sessions.values())
+
+    async def start(self):
+        """Inicia o servidor."""
+        app = web.Application(middlewares=[self._middleware])
+        version = r'/v{version:\d+}'
+
+        app.router.add_get('/', self._websocket)
+        app.router.add_get(f'{version}/websocket', self._websocket)
+        app.router.add_get('/version', self._version)
+        app.router.add_get(f'{version}/info', self._info)
+        app.router.add_get(f'{version}/stats', self._stats)
+        app.router.add_get(f'{version}/loadtracks', self._load_tracks)
+        app.router.add_get(f'{version}/decodetrack', self._decode_track)
+        app.router.add_patch(f'{version}/sessions/{{session}}', self._update_session)
+        app.router.add_get(f'{version}/sessions/{{session}}/players', self._get_players)
+        app.router.add_get(f'{version}/sessions/{{session}}/players/{{guild}}', self._get_player)
+        app.router.add_patch(f'{version}/sessions/{{session}}/players/{{guild}}', self._update_player)
+        app.router.add_delete(f'{version}/sessions/{{session}}/players/{{guild}}', self._destroy_player)
+
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        self.port = self._runner.addresses[0][1]
+        self._started = time.time()
+
+    async def stop(self):
+        """Derruba os websockets e para o servidor, os players são descartados como em um lavalink reiniciado."""
+        await self.drop_websockets()
+
+        for task in list(self._tasks):
+            task.cancel()
+
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def restart(self, downtime: float = 0.0):
+        """
+        Para o servidor e o inicia novamente na mesma porta, simulando a queda do lavalink.
+
+        :param downtime: Segundos com o servidor fora do ar
+        """
+        await self.stop()
+        await asyncio.sleep(downtime)
+        await self.start()
+
+    async def __aenter__(self) -> FakeLavalinkServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def inject(self, kind: str, times: int = 1, match: str | None = None, delay: float = 0.0, status: int = 500):
+        """
+        Injeta uma falha nas próximas requisições.
+
+        - error: a requisição responde "status" (500 por padrão)
+        - slow: a requisição demora mais "delay" segundos
+        - load_failed e no_matches: o loadtracks falha ou não encontra nada
+        - track_exception: a música falha ao começar (TrackExceptionEvent e TrackEndEvent LOAD_FAILED)
+        - track_stuck: a música começa e trava após "delay" segundos (TrackStuckEvent, sem TrackEndEvent)
+
+        :param kind: Tipo da falha
+        :param times: Quantidade de requisições afetadas
+        :param match: Afeta apenas requisições cujo caminho (com a query) contém este texto
+        :param delay: Segundos usados por "slow" e "track_stuck"
+        :param status: Status HTTP usado por "error"
+        """
+        if kind not in FAULTS:
+            raise ValueError(f'Unknown fault "{kind}", expected one of {list(FAULTS)}')
+
+        self._faults.append(_Fault(kind, times, match, delay, status))
+
+    def clear_faults(self):
+        self._faults.clear()
+
+    async def drop_websockets(self, code: int | None = None):
+        """
+        Fecha todos os websockets. Os players das sessões fechadas são descartados.
+
+        :param code: Código de fechamento enviado ao cliente, None derruba a conexão TCP sem avisar (queda de rede ou
+            do lavalink)
+        """
+        for session in list(self._sessions.values()):
+            if code is None:
+                session.transport.abort()
+            else:
+                await session.websocket.close(code=code, message=b'Fake lavalink closed the connection')
+
+        # Aguarda os handlers dos websockets descartarem as sessões
+        while self._sessions:
+            await asyncio.sleep(0.01)
+
+    def finish(self, guild_id: int, reason: str = 'FINISHED'):
+        """
+        Termina a música atual da guild, em todas as sessões.
+
+        :param guild_id: Id da guild
+        :param reason: Motivo enviado no TrackEndEvent
+        """
+        for session in self._sessions.values():
+            player = session.players.get(guild_id)
+
+            if player and player.track:
+                self._end(session, player, reason)
+
+    # Middleware e utilitários
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.headers.get('Authorization') != self.password:
+            return web.json_response(self._error(request, 401, 'Unauthorized'), status=401)
+
+        route = self._route(request.path)
+        self.requests[f'{request.method} {route}'] += 1
+
+        if route == 'websocket':
+            return await handler(request)
+
+        delay = self.latencies.get(route, self.rest_latency)
+
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+
+        slow = self._take_fault(request, ('slow',))
+        error = self._take_fault(request, ('error',))
+
+        await asyncio.sleep(delay + (slow.delay if slow else 0))
+
+        if error:
+            return web.json_response(self._error(request, error.status, 'Injected fault'), status=error.status)
+
+        return await handler(request)
+
+    @staticmethod
+    def _route(path: str) -> str:
+        parts = path.strip('/').split('/')
+
+        if parts == [''] or parts[-1] == 'websocket':
+            return 'websocket'
+
+        if parts[0].startswith('v') and parts[0][1:].isdigit():
+            parts = parts[1:]
+
+        if parts[0] == 'sessions' and len(parts) > 2:
+            return 'players'
+
+        return parts[0]
+
+    def _take_fault(self, request: web.Request, kinds: tuple[str, ...]) -> _Fault | None:
+        """Consome a primeira falha injetada de um dos tipos que afeta a requisição."""
+        route = self._route(request.path)
+        target = urllib.parse.unquote(request.path_qs)
+
+        for fault in self._faults:
+            if fault.kind not in kinds or FAULTS[fault.kind] not in (None, route):
+                continue
+
+            if fault.match and fault.match not in target:
+                continue
+
+            fault.times -= 1
+
+            if fault.times <= 0:
+                self._faults.remove(fault)
+
+            return fault
+
+        return None
+
+    @staticmethod
+    def _error(request: web.Request, status: int, message: str) -> dict:
+        return {'timestamp': int(time.time() * 1000), 'status': status, 'error': HTTPStatus(status).phrase,
+                'message': message, 'path': request.path}
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return task
+
+    def _session(self, request: web.Request) -> _Session:
+        session = self._sessions.get(request.match_info['session'])
+
+        if session is None:
+            raise web.HTTPNotFound(text=json.dumps(self._error(request, 404, 'Session not found')),
+                                   content_type='application/json')
+
+        return session
+
+    def _send(self, session: _Session, message: dict):
+        """Envia uma mensagem pelo websocket após "event_latency" segundos, mantendo a ordem."""
+        session.outbox.put_nowait((asyncio.get_running_loop().time() + self.event_latency, message))
+
+    def _event(self, session: _Session, player: _Player, kind: str, track: dict, **fields):
+        self.events[kind] += 1
+        self._send(session, {'op': 'event', 'type': kind, 'guildId': str(player.guild_id),
+                             'encodedTrack': track['encoded'], 'track': track, **fields})
+
+    def _player_json(self, player: _Player) -> dict:
+        now = asyncio.get_running_loop().time()
+        track = dict(player.track, info={**player.track['info'], 'position': player.current_position(now)}) \
+            if player.track else None
+
+        return {
+            'guildId': str(player.guild_id),
+            'track': track,
+            'volume': player.volume,
+            'paused': player.paused,
+            'state': {'time': int(time.time() * 1000), 'position': player.current_position(now),
+                      'connected': bool(player.voice), 'ping': 0},
+            'voice': player.voice,
+            'filters': {}
+        }
+
+    def _stats_json(self) -> dict:
+        playing = sum(1 for session in self._sessions.values() for player in session.players.values()
+                      if player.track and not player.paused)
+
+        return {
+            'players': self.players,
+            'playingPlayers': playing,
+            'uptime': int((time.time() - self._started) * 1000),
+            'memory': {'free': 0, 'used': 0, 'allocated': 0, 'reservable': 0},
+            'cpu': {'cores': 1, 'systemLoad': 0.0, 'lavalinkLoad': 0.0},
+            'frameStats': None
+        }
+
+    # Websocket
+
+    async def _websocket(self, request: web.Request) -> web.StreamResponse:
+        websocket = web.WebSocketResponse()
+
+        if not websocket.can_prepare(request).ok:
+            raise web.HTTPNotFound()
+
+        await websocket.prepare(request)
+
+        session = _Session(uuid.uuid4().hex[:16], websocket, request.transport)
+        self._sessions[session.id] = session
+
+        tasks = [self._spawn(self._sender(session)), self._spawn(self._ticker(session))]
+        self._send(session, {'op': 'ready', 'resumed': False, 'sessionId': session.id})
+
+        try:
+            # O cliente não envia nada desde o lavalink 4, apenas aguarda o fechamento
+            async for message in websocket:
+                if message.type is WSMsgType.ERROR:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            for player in session.players.values():
+                player.cancel_timers()
+
+            self._sessions.pop(session.id, None)
+
+        return websocket
+
+    async def _sender(self, session: _Session):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            due, message = await session.outbox.get()
+            delay = due - loop.time()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if session.websocket.closed:
+                return
+
+            await session.websocket.send_json(message)
+
+    async def _ticker(self, session: _Session):
+        """Envia "playerUpdate" dos players tocando e "stats" periodicamente."""
+        loop = asyncio.get_running_loop()
+        next_stats = loop.time() + self.stats_interval
+
+        while True:
+            await asyncio.sleep(min(self.update_interval, self.stats_interval))
+            now = loop.time()
+
+            for player in session.players.values():
+                if player.track:
+                    self._send(session, {'op': 'playerUpdate', 'guildId': str(player.guild_id),
+                                         'state': self._player_json(player)['state']})
+
+            if now >= next_stats:
+                next_stats = now + self.stats_interval
+                self._send(session, {'op': 'stats', **self._stats_json()})
+
+    # REST
+
+    async def _version(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.version)
+
+    async def _info(self, request: web.Request) -> web.Response:
+        major, minor, patch = (self.version.split('-')[0].split('.') + ['0', '0'])[:3]
+        version = {'semver': self.version, 'major': int(major), 'minor': int(minor), 'patch': int(patch),
+                   'preRelease': None}
+
+        return web.json_response({'version': version, 'buildTime': 0, 'git': None, 'jvm': 'fake', 'lavaplayer': 'fake',
+                                  'sourceManagers': ['youtube', 'soundcloud'], 'filters': [], 'plugins': []})
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self._stats_json())
+
+    async def _load_tracks(self, request: web.Request) -> web.Response:
+        identifier = request.query.get('identifier', '')
+        fault = self._take_fault(request, ('load_failed', 'no_matches'))
+
+        if fault and fault.kind == 'load_failed':
+            exception = {'message': 'Injected fault', 'severity': 'COMMON', 'cause': 'FakeLavalinkServer'}
+            return web.json_response({'loadType': 'LOAD_FAILED', 'playlistInfo': {}, 'tracks': [],
+                                      'exception': exception})
+
+        if fault:
+            return web.json_response({'loadType': 'NO_MATCHES', 'playlistInfo': {}, 'tracks': []})
+
+        return web.json_response(load_tracks(identifier, self.search_size, self.playlist_size))
+
+    async def _decode_track(self, request: web.Request) -> web.Response:
+        payload = decode_track(request.query.get('encodedTrack', ''))
+
+        if payload is None:
+            return web.json_response(self._error(request, 400, 'Invalid track'), status=400)
+
+        return web.json_response(payload)
+
+    async def _update_session(self, request: web.Request) -> web.Response:
+        self._session(request)
+        return web.json_response({'resuming': False, 'timeout': 60})
+
+    async def _get_players(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        return web.json_response([self._player_json(player) for player in session.players.values()])
+
+    async def _get_player(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        player = session.players.get(int(request.match_info['guild']))
+
+        if player is None:
+            return web.json_response(self._error(request, 404, 'Player not found'), status=404)
+
+        return web.json_response(self._player_json(player))
+
+    async def _update_player(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        guild_id = int(request.match_info['guild'])
+        data = await request.json() if request.can_read_body else {}
+        no_replace = request.query.get('noReplace', 'false').lower() == 'true'
+
+        player = session.players.get(guild_id)
+
+        if player is None:
+            player = session.players[guild_id] = _Player(guild_id)
+
+        if 'voice' in data:
+            player.voice = data['voice']
+
+        if 'volume' in data:
+            player.volume = data['volume']
+
+        if 'encodedTrack' in data:
+            encoded = data['encodedTrack']
+
+            if encoded is None:
+                if player.track:
+                    self._end(session, player, 'STOPPED')
+            elif not (no_replace and player.track):
+                track = decode_track(encoded)
+
+                if track is None:
+                    return web.json_response(self._error(request, 400, 'Invalid track'), status=400)
+
+                if player.track:
+                    self._end(session, player, 'REPLACED')
+
+                self._play(request, session, player, track, data.get('position') or 0)
+
+        elif 'position' in data and player.track:
+            player.position = data['position']
+            player.started = asyncio.get_running_loop().time()
+            self._schedule_end(session, player)
+
+        if 'paused' in data and data['paused'] != player.paused:
+            player.position = player.current_position(asyncio.get_running_loop().time())
+            player.started = asyncio.get_running_loop().time()
+            player.paused = data['paused']
+
+            if player.paused:
+                player.cancel_timers(start=False)
+            else:
+                self._schedule_end(session, player)
+
+        return web.json_response(self._player_json(player))
+
+    async def _destroy_player(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        player = session.players.pop(int(request.match_info['guild']), None)
+
+        if player:
+            player.cancel_timers()
+
+        return web.Response(status=204)
+
+    # Reprodução
+
+    def _play(self, request: web.Request, session: _Session, player: _Player, track: dict, position: int):
+        loop = asyncio.get_running_loop()
+        fault = self._take_fault(request, ('track_exception', 'track_stuck'))
+
+        player.cancel_timers()
+        player.track = track
+        player.position = position
+        player.started = loop.time() + self.start_delay
+        player.length = self.track_length() if self.track_length else track['info']['length'] / 1000
+
+        if fault and fault.kind == 'track_exception':
+            exception = {'message': 'Injected fault', 'severity': 'COMMON', 'cause': 'FakeLavalinkServer'}
+            self._event(session, player, 'TrackExceptionEvent', track, exception=exception)
+            self._end(session, player, 'LOAD_FAILED')
+            return
+
+        def start():
+            player.start_timer = None
+            self._event(session, player, 'TrackStartEvent', track)
+
+            if fault:
+                player.cancel_timers()
+                player.timer = loop.call_later(fault.delay, self._stuck, session, player, track)
+
+        if self.start_delay:
+            player.start_timer = loop.call_later(self.start_delay, start)
+        else:
+            start()
+
+        if not fault:
+            self._schedule_end(session, player)
+
+    def _schedule_end(self, session: _Session, player: _Player):
+        """Agenda o fim da música atual a partir da posição atual."""
+        if player.paused or not player.track:
+            return
+
+        now = asyncio.get_running_loop().time()
+        remaining = max(player.started - now, 0) + max(player.length - player.position / 1000, 0)
+
+        player.cancel_timers(start=False)
+        player.timer = asyncio.get_running_loop().call_later(remaining, self._end, session, player, 'FINISHED')
+
+    def _stuck(self, session: _Session, player: _Player, track: dict):
+        player.timer = None
+        player.paused = True
+        player.position = player.current_position(asyncio.get_running_loop().time())
+
+        self._event(session, player, 'TrackStuckEvent', track, thresholdMs=int(self.update_interval * 1000))
+
+    def _end(self, session: _Session, player: _Player, reason: str):
+        track = player.track
+        player.cancel_timers()
+        player.track = None
+
+        if track is not None:
+            self._event(session, player, 'TrackEndEvent', track, reason=reason)
+
+
+async def serve(args: argparse.Namespace):
+    length = None
+
+    if args.track_length:
+        length = lambda: args.track_length
+
+    server = FakeLavalinkServer(args.host, args.port, args.password, rest_latency=args.rest_latency,
+                                jitter=args.jitter, event_latency=args.event_latency, track_length=length,
+                                search_size=args.search_size, playlist_size=args.playlist_size, seed=args.seed)
+
+    await server.start()
+    print(f'Fake lavalink listening on {server.uri} (password "{server.password}")')
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(f'Players: {server.players} | requests: {dict(server.requests)} | events: {dict(server.events)}')
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor lavalink falso para testes e desenvolvimento.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2333)
+    parser.add_argument('--password', default='youshallnotpass')
+    parser.add_argument('--rest-latency', type=float, default=0.0, help='Latência das requisições REST (segundos)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variação máxima somada à latência (segundos)')
+    parser.add_argument('--event-latency', type=float, default=0.0, help='Atraso dos eventos do websocket (segundos)')
+    parser.add_argument('--track-length', type=float, default=0.0,
+                        help='Duração de todas as músicas (segundos), 0 usa a duração do catálogo')
+    parser.add_argument('--search-size', type=int, default=5)
+    parser.add_argument('--playlist-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,794 @@
+"""
+Substitutos do discord e do lavalink para executar a cog de músicas sem rede.
+
+FakeNode é um wavelink.Node de verdade cujas requisições REST são respondidas em memória: pesquisas, playlists e
+vídeos retornam músicas determinísticas e o player "toca" instantaneamente, disparando os mesmos eventos que o
+websocket do lavalink dispararia. Os objetos do discord implementam apenas o que a cog usa (canais, mensagens,
+interações e estados de voz), cada chamada REST é contada e pode ter uma latência simulada. FakeSpotifyClient
+responde a API do Spotify usada pelo SpotifyMetadataClient.
+
+FakeEnvironment monta tudo isso em um diretório temporário, com N guilds e a cog Music original carregada.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable
+
+import discord
+import wavelink
+from wavelink.enums import NodeStatus
+
+import cogs.music as music_module
+from cogs.music import Music
+from utils import LatencyWindow, SpotifyMetadataClient
+
+from .fake_lavalink import FakeLavalinkServer, load_tracks
+
+
+# Ids no formato de snowflakes, únicos entre todos os objetos falsos
+_snowflakes = itertools.count(900_000_000_000_000_000)
+
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+
+class FakeNode(wavelink.Node):
+    """
+    Node do wavelink que responde as requisições REST em memória.
+
+    Pesquisas por texto retornam "search_size" músicas, URLs com "list=" retornam playlists com "playlist_size"
+    músicas e URLs de vídeos retornam o próprio vídeo. Todas as músicas são derivadas do identificador consultado,
+    portanto a mesma pesquisa sempre retorna o mesmo resultado.
+
+    Com "track_length" cada música termina sozinha após a quantidade de segundos retornada pela função, do contrário
+    toca até finish() ser chamado. O tempo entre o fim de uma música (com outra na fila) e o pedido da próxima é
+    registrado em "transitions".
+    """
+
+    def __init__(self, latency: float = 0.0, search_size: int = 5, playlist_size: int = 100,
+                 track_length: Callable[[], float] | None = None):
+        super().__init__(id='main', uri='localhost:2333', password='fake')
+
+        self.latency = latency
+        self.search_size = search_size
+        self.playlist_size = playlist_size
+        self.track_length = track_length
+
+        self.requests: Counter[str] = Counter()
+        self.transitions = LatencyWindow('transition', size=100_000)
+
+        # Música tocando em cada guild, do ponto de vista do lavalink
+        self._playing: dict[int, str] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._ended: dict[int, float] = {}
+
+    def register(self, client: discord.Client):
+        """Adiciona o node na NodePool como se tivesse conectado e avisa a cog que está pronto."""
+        self.client = client
+        self._session_id = 'fake-session'
+        self._major_version = 4
+        self._status = NodeStatus.CONNECTED
+
+        wavelink.NodePool.nodes[self.id] = self
+        client.dispatch('wavelink_node_ready', self)
+
+    def unregister(self):
+        self.stop_timers()
+
+        wavelink.NodePool.nodes.pop(self.id, None)
+        self._status = NodeStatus.DISCONNECTED
+
+    def stop_timers(self):
+        """Para de terminar músicas automaticamente."""
+        self.track_length = None
+
+        for timer in self._timers.values():
+            timer.cancel()
+
+        self._timers.clear()
+
+    async def _send(self, *, method: str, path: str, guild_id: int | str | None = None, query: str | None = None,
+                    data: dict | None = None) -> dict | None:
+        self.requests[f'{method} {path.split("/")[0]}'] += 1
+        await asyncio.sleep(self.latency)
+
+        if path == 'loadtracks':
+            return load_tracks(urllib.parse.unquote(query.split('=', 1)[1]), self.search_size, self.playlist_size)
+
+        if method == 'PATCH':
+            return self._update_player(int(guild_id), data or {})
+
+        if method == 'DELETE':
+            self._playing.pop(int(guild_id), None)
+            self._ended.pop(int(guild_id), None)
+            self._cancel_timer(int(guild_id))
+
+        return None
+
+    def _update_player(self, guild_id: int, data: dict) -> dict:
+        if 'encodedTrack' not in data:
+            return {'track': {'encoded': self._playing.get(guild_id)}}
+
+        encoded = data['encodedTrack']
+        previous = self._playing.pop(guild_id, None)
+        self._cancel_timer(guild_id)
+
+        if encoded is None:
+            # player.stop()
+            if previous:
+                self.client.loop.call_soon(self.finish, guild_id, 'STOPPED')
+
+            return {'track': None}
+
+        if previous:
+            self.client.loop.call_soon(self.finish, guild_id, 'REPLACED')
+
+        ended = self._ended.pop(guild_id, None)
+
+        if ended is not None:
+            self.transitions.add(time.perf_counter() - ended)
+
+        self._playing[guild_id] = encoded
+        self.client.loop.call_soon(self._start, guild_id, data.get('position', 0))
+
+        return {'track': {'encoded': encoded}}
+
+    def _event(self, player: wavelink.Player, kind: str, reason: str | None = None) -> wavelink.TrackEventPayload:
+        data = {'type': kind, 'reason': reason}
+        return wavelink.TrackEventPayload(data=data, track=player.current, original=player._original, player=player)
+
+    def _start(self, guild_id: int, position: int):
+        player = self._players.get(guild_id)
+
+        if not player or not player.current or guild_id not in self._playing:
+            return
+
+        # Equivalente ao primeiro "playerUpdate" enviado pelo lavalink
+        player.last_update = datetime.now(timezone.utc)
+        player.last_position = position
+
+        self.client.dispatch('wavelink_track_start', self._event(player, 'TrackStartEvent'))
+
+        if self.track_length:
+            self._timers[guild_id] = self.client.loop.call_later(self.track_length(), self.finish, guild_id)
+
+    def _cancel_timer(self, guild_id: int):
+        timer = self._timers.pop(guild_id, None)
+
+        if timer:
+            timer.cancel()
+
+    def finish(self, guild_id: int, reason: str = 'FINISHED'):
+        """
+        Termina a música atual da guild, disparando on_wavelink_track_end.
+
+        :param guild_id: Id da guild
+        :param reason: Motivo enviado pelo lavalink ("FINISHED", "STOPPED", "REPLACED"...)
+        """
+        player = self._players.get(guild_id)
+
+        if not player or not player.current:
+            return
+
+        if reason != 'REPLACED':
+            self._playing.pop(guild_id, None)
+            self._cancel_timer(guild_id)
+
+            # Apenas transições com uma próxima música na fila
+            if not player.queue.is_empty:
+                self._ended[guild_id] = time.perf_counter()
+
+        payload = self._event(player, 'TrackEndEvent', reason)
+
+        if reason != 'REPLACED':
+            player._current = None
+
+        self.client.dispatch('wavelink_track_end', payload)
+
+
+class FakeSpotifyClient:
+    """
+    Substituto do spotify.SpotifyClient usado pelo SpotifyMetadataClient, com a API do Spotify respondida em memória.
+
+    Playlists e álbuns têm "playlist_size" músicas derivadas do id consultado. Assim como na API, as músicas de álbuns
+    não trazem o álbum nem o ISRC (external_ids), e as de playlists só trazem o ISRC se ele estiver no parâmetro
+    "fields".
+    """
+
+    ALBUM_PAGE = 50
+
+    def __init__(self, playlist_size: int = 100, latency: float = 0.0):
+        self.playlist_size = playlist_size
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+
+        self.session = SimpleNamespace(get=self._get)
+        self.bearer_headers = {}
+
+    @staticmethod
+    def is_token_expired() -> bool:
+        return False
+
+    @staticmethod
+    def track(track_id: str, simplified: bool = False) -> dict:
+        """
+        Cria os dados de uma música.
+
+        :param track_id: Id da música
+        :param simplified: Formato retornado nos álbuns, sem o álbum e sem o ISRC
+        :return: Objeto de música da API
+        """
+        data = {'id': track_id, 'name': f'Spotify {track_id}', 'uri': f'spotify:track:{track_id}',
+                'duration_ms': 180_000, 'type': 'track', 'is_local': False, 'artists': [{'name': 'Fake Artist'}]}
+
+        if not simplified:
+            data['album'] = {'name': 'Fake Album', 'images': [{'url': 'https://i.scdn.co/image/fake'}]}
+            data['external_ids'] = {'isrc': f'BRFAK{zlib.crc32(track_id.encode()) % 10_000_000:07d}'}
+
+        return data
+
+    def _page(self, collection_id: str, offset: int, limit: int, simplified: bool) -> list[dict]:
+        end = min(offset + limit, self.playlist_size)
+
+        return [self.track(f'{collection_id}{index:06d}', simplified) for index in range(offset, end)]
+
+    def _respond(self, url: str, params: dict) -> dict | None:
+        path = url.removeprefix(SpotifyMetadataClient.API_URL).strip('/').split('/')
+        offset = int(params.get('offset', 0))
+
+        if path == ['tracks']:
+            return {'tracks': [self.track(track_id) for track_id in params['ids'].split(',')]}
+
+        if path[0] == 'playlists':
+            items = self._page(path[1], offset, int(params['limit']), False)
+
+            # Apenas o filtro do ISRC é aplicado, os demais campos são sempre retornados
+            if 'external_ids' not in params.get('fields', ''):
+                for track in items:
+                    del track['external_ids']
+
+            return {'items': [{'track': track} for track in items]}
+
+        if path[0] == 'albums':
+            limit = int(params.get('limit', self.ALBUM_PAGE))
+            page = {'items': self._page(path[1], offset, limit, True),
+                    'next': 'next' if offset + limit < self.playlist_size else None}
+
+            if len(path) == 3:
+                return page
+
+            return {'name': 'Fake Album', 'images': [{'url': 'https://i.scdn.co/image/fake'}], 'tracks': page}
+
+        return None
+
+    @contextlib.asynccontextmanager
+    async def _get(self, url: str, params: dict | None = None, **_):
+        self.requests[url.removeprefix(SpotifyMetadataClient.API_URL).split('/')[1]] += 1
+        await asyncio.sleep(self.latency)
+
+        data = self._respond(url, params or {})
+
+        async def json():
+            return data
+
+        yield SimpleNamespace(status=200 if data is not None else 404, reason='Not Found', headers={}, json=json)
+
+
+class FakeBot:
+    """Bot com apenas o necessário para a cog: cache de canais, eventos e chamadas REST simuladas."""
+
+    def __init__(self, rest_latency: float = 0.0):
+        self.loop = asyncio.get_running_loop()
+        self.rest_latency = rest_latency
+
+        self.user = FakeMember(snowflake(), 'SonoMonkey', bot=True)
+        self.guilds: list[FakeGuild] = []
+        self.cogs: dict[str, discord.ext.commands.Cog] = {}
+        self.views: list[discord.ui.View] = []
+
+        self.rest_calls: Counter[str] = Counter()
+        self.dispatched: Counter[str] = Counter()
+        self.tasks: set[asyncio.Task] = set()
+
+        self._channels: dict[int, FakeTextChannel | FakeVoiceChannel] = {}
+        self._ready = self.loop.create_future()
+
+    @property
+    def voice_clients(self) -> list:
+        return [guild.voice_client for guild in self.guilds if guild.voice_client]
+
+    async def rest(self, route: str):
+        """Simula uma chamada à API do discord."""
+        self.rest_calls[route] += 1
+        await asyncio.sleep(self.rest_latency)
+
+    def add_cog(self, cog: discord.ext.commands.Cog):
+        self.cogs[cog.qualified_name] = cog
+
+    def add_view(self, view: discord.ui.View, *, message_id: int | None = None):
+        self.views.append(view)
+
+    def get_channel(self, channel_id: int | None) -> FakeTextChannel | FakeVoiceChannel | None:
+        return self._channels.get(channel_id)
+
+    def add_guild(self, name: str | None = None, listeners: int = 1) -> FakeGuild:
+        """
+        Cria uma guild com um canal de voz e alguns ouvintes conectados.
+
+        :param name: Nome da guild
+        :param listeners: Membros (não bots) no canal de voz
+        :return: Guild criada
+        """
+        guild = FakeGuild(self, name)
+        voice = guild.add_voice_channel('Geral')
+
+        for index in range(listeners):
+            member = guild.add_member(f'ouvinte {index}')
+            member.voice = FakeVoiceState(voice)
+            voice.members.append(member)
+
+        self.guilds.append(guild)
+        return guild
+
+    async def wait_until_ready(self):
+        # Nunca fica pronto: o FakeNode substitui connect_nodes() e os snapshots não são executados
+        await self._ready
+
+    def dispatch(self, event: str, *args):
+        """Executa os listeners das cogs em tasks, assim como o discord.py."""
+        self.dispatched[event] += 1
+
+        for cog in self.cogs.values():
+            for name, listener in cog.get_listeners():
+                if name == f'on_{event}':
+                    task = self.loop.create_task(listener(*args))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+
+    async def get_context(self, message: FakeMessage) -> FakeContext:
+        return FakeContext(self, message.guild, message.author, message=message)
+
+    def close(self):
+        self._ready.cancel()
+
+        for task in self.tasks:
+            task.cancel()
+
+
+class FakeVoiceState:
+    def __init__(self, channel: FakeVoiceChannel | None):
+        self.channel = channel
+        self.self_mute = False
+        self.self_deaf = False
+
+
+class FakeMember:
+    def __init__(self, member_id: int, name: str, guild: FakeGuild | None = None, bot: bool = False):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.mention = f'<@{member_id}>'
+        self.guild = guild
+        self.bot = bot
+        self.voice: FakeVoiceState | None = None
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+
+class FakeGuild:
+    def __init__(self, bot: FakeBot, name: str | None = None):
+        self.bot = bot
+        self.id = snowflake()
+        self.name = name or f'guild {self.id}'
+
+        self.me = FakeMember(bot.user.id, bot.user.name, self, bot=True)
+        self.voice_client: wavelink.Player | None = None
+
+        self.members: dict[int, FakeMember] = {self.me.id: self.me}
+        self.channels: dict[int, FakeTextChannel | FakeVoiceChannel] = {}
+
+    def add_member(self, name: str) -> FakeMember:
+        member = FakeMember(snowflake(), name, self)
+        self.members[member.id] = member
+
+        return member
+
+    def add_voice_channel(self, name: str) -> FakeVoiceChannel:
+        channel = FakeVoiceChannel(self, name)
+        self.channels[channel.id] = self.bot._channels[channel.id] = channel
+
+        return channel
+
+    def move_member(self, member: FakeMember, channel: FakeVoiceChannel | None):
+        """Move um membro para outro canal de voz (ou o desconecta) e dispara on_voice_state_update."""
+        before = member.voice or FakeVoiceState(None)
+
+        if before.channel:
+            before.channel.members.remove(member)
+
+        if channel:
+            channel.members.append(member)
+
+        member.voice = FakeVoiceState(channel)
+        self.bot.dispatch('voice_state_update', member, before, member.voice)
+
+    def get_member(self, member_id: int) -> FakeMember | None:
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id: int) -> FakeTextChannel | FakeVoiceChannel | None:
+        return self.channels.get(channel_id)
+
+    async def create_text_channel(self, name: str, **_) -> FakeTextChannel:
+        await self.bot.rest('create_channel')
+
+        channel = FakeTextChannel(self, name)
+        self.channels[channel.id] = self.bot._channels[channel.id] = channel
+
+        return channel
+
+    async def change_voice_state(self, *, channel: FakeVoiceChannel | None, **_):
+        """Equivalente ao gateway: atualiza o estado de voz do bot e dispara on_voice_state_update."""
+        await self.bot.rest('voice_state')
+
+        if not channel:
+            self.voice_client = None
+
+        self.move_member(self.me, channel)
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: FakeGuild, name: str):
+        self.id = snowflake()
+        self.name = name
+        self.guild = guild
+        self.members: list[FakeMember] = []
+        self.user_limit = 0
+
+    def permissions_for(self, _member: FakeMember) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    async def connect(self, *, cls, timeout: float = 60.0, reconnect: bool = True, self_deaf: bool = False,
+                      self_mute: bool = False):
+        player = cls(self.guild.bot, self)
+        self.guild.voice_client = player
+
+        try:
+            await player.connect(timeout=timeout, reconnect=reconnect, self_deaf=self_deaf, self_mute=self_mute)
+        except Exception:
+            self.guild.voice_client = None
+            raise
+
+        return player
+
+
+class FakeTextChannel:
+    def __init__(self, guild: FakeGuild, name: str):
+        self.id = snowflake()
+        self.name = name
+        self.guild = guild
+        self.messages: dict[int, FakeMessage] = {}
+
+    async def send(self, content: str | None = None, **kwargs) -> FakeMessage:
+        await self.guild.bot.rest('send_message')
+
+        message = FakeMessage(self, content, self.guild.me, **kwargs)
+        self.messages[message.id] = message
+
+        return message
+
+    async def fetch_message(self, message_id: int | None) -> FakeMessage:
+        await self.guild.bot.rest('fetch_message')
+
+        try:
+            return self.messages[message_id]
+        except KeyError:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Message')
+
+    async def purge(self, *, check=lambda _: True, **_) -> list[FakeMessage]:
+        await self.guild.bot.rest('purge')
+
+        deleted = [message for message in self.messages.values() if check(message)]
+
+        for message in deleted:
+            del self.messages[message.id]
+
+        return deleted
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeTextChannel, content: str | None, author: FakeMember, **kwargs):
+        self.id = snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.author = author
+        self.embed: discord.Embed | None = kwargs.get('embed')
+        self.view: discord.ui.View | None = kwargs.get('view')
+        self.edits = 0
+
+        self._close_files(kwargs)
+
+    @staticmethod
+    def _close_files(kwargs: dict):
+        # discord.File abre o arquivo, que seria fechado ao ser enviado
+        for file in kwargs.get('attachments') or []:
+            file.close()
+
+        if kwargs.get('file'):
+            kwargs['file'].close()
+
+    async def edit(self, **kwargs) -> FakeMessage:
+        await self.guild.bot.rest('edit_message')
+
+        if 'content' in kwargs:
+            self.content = kwargs['content']
+        if 'embed' in kwargs:
+            self.embed = kwargs['embed']
+        if 'view' in kwargs:
+            self.view = kwargs['view']
+
+        self.edits += 1
+        self._close_files(kwargs)
+
+        return self
+
+    async def delete(self, *, delay: float | None = None):
+        if delay:
+            return
+
+        await self.guild.bot.rest('delete_message')
+        self.channel.messages.pop(self.id, None)
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: FakeInteraction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, route: str):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+
+        await self._interaction.bot.rest(route)
+        self._done = True
+
+    async def defer(self, **_):
+        await self._respond('interaction_defer')
+
+    async def send_message(self, content: str | None = None, **kwargs):
+        await self._respond('interaction_send')
+        self._interaction.responses.append(content)
+        FakeMessage._close_files(kwargs)
+
+    async def edit_message(self, **kwargs):
+        await self._respond('interaction_edit')
+        FakeMessage._close_files(kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: FakeInteraction):
+        self._interaction = interaction
+
+    async def send(self, content: str | None = None, *, wait: bool = False, **kwargs) -> FakeMessage | None:
+        await self._interaction.bot.rest('interaction_followup')
+        self._interaction.responses.append(content)
+
+        channel = next(c for c in self._interaction.guild.channels.values() if isinstance(c, FakeTextChannel))
+        message = FakeMessage(channel, content, self._interaction.guild.me, **kwargs)
+
+        return message if wait else None
+
+
+class FakeInteraction:
+    def __init__(self, bot: FakeBot, guild: FakeGuild, user: FakeMember):
+        self.id = snowflake()
+        self.bot = bot
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.created_at = discord.utils.utcnow()
+
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.responses: list[str | None] = []
+
+        self._original: FakeMessage | None = None
+
+    async def original_response(self) -> FakeMessage:
+        if self._original is None:
+            channel = next(c for c in self.guild.channels.values() if isinstance(c, FakeTextChannel))
+            self._original = FakeMessage(channel, self.responses[-1] if self.responses else None, self.guild.me)
+
+        return self._original
+
+    async def edit_original_response(self, *, content: str | None = None, **kwargs) -> FakeMessage:
+        await self.bot.rest('interaction_edit_original')
+        self.responses.append(content)
+
+        message = await self.original_response()
+        message.content = content
+        FakeMessage._close_files(kwargs)
+
+        return message
+
+
+class FakeContext:
+    """Contexto de um comando. Com "message" simula comandos por prefixo (sem interação)."""
+
+    def __init__(self, bot: FakeBot, guild: FakeGuild, author: FakeMember, message: FakeMessage | None = None):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.message = message
+        self.interaction = None if message else FakeInteraction(bot, guild, author)
+        self.command = None
+
+    async def defer(self, *, ephemeral: bool = False):
+        if self.interaction:
+            await self.interaction.response.defer(ephemeral=ephemeral)
+
+    async def reply(self, content: str | None = None, **kwargs):
+        if self.interaction and not self.interaction.response.is_done():
+            await self.interaction.response.send_message(content, **kwargs)
+        else:
+            channel = self.message.channel if self.message else None
+            await self.bot.rest('send_message')
+
+            if channel:
+                return FakeMessage(channel, content, self.guild.me)
+
+
+class FakeEnvironment:
+    """
+    Monta o bot falso com N guilds e a cog Music original, isolada em um diretório temporário (config.json, logs e
+    snapshots não tocam os arquivos do projeto). Deve ser usado com "async with".
+
+    Com "lavalink" o bot usa um wavelink.Node comum conectado ao servidor falso (benchmarks/fake_lavalink.py) em vez do
+    FakeNode, passando pelo websocket e pelo REST de verdade.
+    """
+
+    def __init__(self, guilds: int = 1, listeners: int = 1, rest_latency: float = 0.0, node_latency: float = 0.0,
+                 playlist_size: int = 100, track_length: Callable[[], float] | None = None, quiet: bool = True,
+                 lavalink: FakeLavalinkServer | None = None):
+        self.guild_count = guilds
+        self.listeners = listeners
+        self.rest_latency = rest_latency
+        self.node_latency = node_latency
+        self.playlist_size = playlist_size
+        self.track_length = track_length
+        self.quiet = quiet
+        self.lavalink = lavalink
+
+        self.bot: FakeBot | None = None
+        self.node: FakeNode | wavelink.Node | None = None
+        self.spotify: FakeSpotifyClient | None = None
+        self.music: Music | None = None
+
+        self._root: str | None = None
+        self._cwd: str | None = None
+        self._original_root: str | None = None
+        self._stack = contextlib.ExitStack()
+
+    async def __aenter__(self) -> FakeEnvironment:
+        # Diretório temporário com os assets usados pelas views
+        self._original_root = music_module.ROOT
+        self._root = tempfile.mkdtemp(prefix='sonomonkey-bench-')
+        shutil.copytree(os.path.join(self._original_root, 'assets'), os.path.join(self._root, 'assets'))
+
+        self._cwd = os.getcwd()
+        os.chdir(self._root)
+        music_module.ROOT = self._root
+
+        # Os prints de cada música tocada poluiriam o resultado
+        if self.quiet:
+            self._stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        self.bot = FakeBot(self.rest_latency)
+
+        for index in range(self.guild_count):
+            self.bot.add_guild(f'guild {index}', self.listeners)
+
+        self.music = Music(self.bot)
+        self.bot.add_cog(self.music)
+
+        self.spotify = FakeSpotifyClient(self.playlist_size, self.node_latency)
+        self.music.spotify_support = True
+        self.music.spotify_api = SpotifyMetadataClient(self.spotify)
+
+        if self.lavalink:
+            self.node = wavelink.Node(id='main', uri=self.lavalink.uri, password=self.lavalink.password)
+            await wavelink.NodePool.connect(client=self.bot, nodes=[self.node])
+
+            # O node só recebe a sessão com o "ready" do websocket
+            while self.node.status is not NodeStatus.CONNECTED:
+                await asyncio.sleep(0.01)
+        else:
+            self.node = FakeNode(self.node_latency, playlist_size=self.playlist_size, track_length=self.track_length)
+            self.node.register(self.bot)
+
+        return self
+
+    async def __aexit__(self, *_):
+        await self.music.cog_unload()
+
+        for task in self.music.play_jobs | self.music.prefetch_tasks:
+            task.cancel()
+
+        self.bot.close()
+
+        if isinstance(self.node, FakeNode):
+            self.node.unregister()
+        else:
+            wavelink.NodePool.nodes.pop(self.node.id, None)
+
+            # Sem o listener o wavelink não tenta reconectar ao fechar o websocket
+            self.node._websocket._listener_task.cancel()
+            await self.node._websocket.cleanup()
+            await self.node._session.close()
+
+        # Deixa as tasks canceladas terminarem antes de remover o diretório
+        await asyncio.sleep(0)
+
+        self._stack.close()
+        music_module.ROOT = self._original_root
+        os.chdir(self._cwd)
+        shutil.rmtree(self._root, ignore_errors=True)
+
+    async def start(self):
+        """Executa o on_ready da cog, configurando os canais e views de todas as guilds."""
+        await self.music.on_ready()
+
+    def handler(self, guild: FakeGuild):
+        return self.music.guild_pool.get_handler(guild.id)
+
+    def listener(self, guild: FakeGuild) -> FakeMember:
+        """Retorna um membro conectado ao canal de voz da guild."""
+        return next(member for member in guild.members.values() if member.voice and not member.bot)
+
+    def context(self, guild: FakeGuild) -> FakeContext:
+        """Cria o contexto de um slash command executado por um ouvinte da guild."""
+        return FakeContext(self.bot, guild, self.listener(guild))
+
+    def interaction(self, guild: FakeGuild) -> FakeInteraction:
+        return FakeInteraction(self.bot, guild, self.listener(guild))
+
+    async def idle(self):
+        """Aguarda as tasks em segundo plano (/play, listeners, prefetch e atores das guilds) terminarem."""
+        while True:
+            pending = [task for task in self.music.play_jobs | self.music.prefetch_tasks | self.bot.tasks
+                       if not task.done()]
+            actors = [handler.actor.join() for handler in self.music.guild_pool if handler.actor.busy]
+
+            if not pending and not actors:
+                return
+
+            if pending:
+                actors.append(asyncio.wait(pending))
+
+            await asyncio.gather(*actors)
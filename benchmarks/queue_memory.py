@@ -0,0 +1,101 @@
+"""
+Benchmark de memória da fila.
+
+Compara a memória ocupada por uma fila com objetos completos do wavelink (como era feito antes) com a mesma fila
+usando QueueEntry. Executar a partir da raiz do projeto:
+
+    python -m benchmarks.queue_memory [QUANTIDADE]
+"""
+import argparse
+import base64
+import tracemalloc
+
+import wavelink
+
+from cogs.music import QueueEntry
+
+
+def fake_payload(index: int) -> dict:
+    """
+    Cria um payload parecido com o retornado pelo lavalink.
+
+    :param index: Índice da música
+    :return: Dicionário com os dados da música
+    """
+    identifier = f'{index:011d}'
+    encoded = base64.b64encode(f'QAAA{identifier}'.encode() * 12).decode()
+
+    return {
+        'encoded': encoded,
+        'info': {
+            'identifier': identifier,
+            'isSeekable': True,
+            'author': f'Artista {index % 300}',
+            'length': 120000 + index % 240000,
+            'isStream': False,
+            'position': 0,
+            'title': f'Música de teste número {index}',
+            'uri': f'https://www.youtube.com/watch?v={identifier}',
+            'sourceName': 'youtube'
+        }
+    }
+
+
+def measure(build) -> tuple[int, list]:
+    """
+    Mede a memória alocada para construir a fila.
+
+    :param build: Função que retorna a lista de itens
+    :return: Bytes alocados e a lista (mantida viva até o fim da medição)
+    """
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+
+    items = build()
+
+    size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, 'filename'))
+    tracemalloc.stop()
+
+    return size, items
+
+
+def full_tracks(count: int) -> list:
+    # O solicitante era uma referência ao membro, compartilhada entre as músicas
+    requester = object()
+    tracks = []
+
+    for index in range(count):
+        track = wavelink.YouTubeTrack(fake_payload(index))
+        setattr(track, 'requester', requester)
+        tracks.append(track)
+
+    return tracks
+
+
+def entries(count: int) -> list:
+    return [QueueEntry.from_track(wavelink.YouTubeTrack(fake_payload(index)), index) for index in range(count)]
+
+
+def references(count: int) -> list:
+    return [QueueEntry.reference(wavelink.YouTubeTrack(fake_payload(index)), index) for index in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('count', type=int, nargs='?', default=5000, help='Quantidade de músicas na fila')
+
+    count = parser.parse_args().count
+
+    full_size, _ = measure(lambda: full_tracks(count))
+    compact_size, _ = measure(lambda: entries(count))
+    reference_size, _ = measure(lambda: references(count))
+
+    print(f'{count} músicas na fila')
+    print(f'YouTubeTrack: {full_size / 1024:10.1f} KiB ({full_size / count:7.1f} bytes/música)')
+    print(f'QueueEntry:   {compact_size / 1024:10.1f} KiB ({compact_size / count:7.1f} bytes/música)')
+    print(f'Referências:  {reference_size / 1024:10.1f} KiB ({reference_size / count:7.1f} bytes/música)')
+    print(f'Redução:      {(1 - compact_size / full_size) * 100:10.1f}% / {(1 - reference_size / full_size) * 100:.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+"""
+Benchmarks da cog de músicas executados sem discord e sem lavalink (ver benchmarks/fakes.py).
+
+Mede a latência do /play, a vazão do playlist_lookup(), o custo do QueueView.refresh(), do shuffle e do put-at com
+filas de vários tamanhos e o tempo de inicialização com N guilds. Os resultados são salvos em
+benchmarks/results/<nome>.json e podem ser comparados com uma execução anterior. Executar a partir da raiz do projeto:
+
+    python -m benchmarks.run                                  # todos os benchmarks, salvo com o commit atual
+    python -m benchmarks.run play ingestion --name antes      # apenas alguns benchmarks
+    python -m benchmarks.run --compare benchmarks/results/antes.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import wavelink
+from wavelink.ext import spotify
+
+from cogs.music import Music, QueueEntry
+from utils import LatencyWindow
+
+from .fakes import FakeEnvironment
+from .queue_memory import fake_payload
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Awaitable[dict[str, float]]]] = {}
+
+
+def benchmark(name: str):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def percentiles(prefix: str, window: LatencyWindow) -> dict[str, float]:
+    """Converte a janela em métricas p50/p95/max em milissegundos."""
+    return {
+        f'{prefix}_p50_ms': window.percentile(50) * 1000,
+        f'{prefix}_p95_ms': window.percentile(95) * 1000,
+        f'{prefix}_max_ms': window.percentile(100) * 1000
+    }
+
+
+async def timeit(func: Callable[[], Awaitable], repeat: int) -> float:
+    """
+    Executa a função várias vezes.
+
+    :return: Tempo médio em milissegundos
+    """
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        await func()
+
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def fill_queue(env: FakeEnvironment, size: int):
+    """Conecta o bot na primeira guild e enche a fila com referências."""
+    guild = env.bot.guilds[0]
+    await env.music.join(env.context(guild))
+
+    queue = env.handler(guild).player.queue
+    queue.clear()
+
+    for index in range(size):
+        await queue.put_wait(QueueEntry.reference(wavelink.YouTubeTrack(fake_payload(index)), 0))
+
+
+@benchmark('startup')
+async def startup(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+
+    for guilds in args.startup_guilds:
+        async with FakeEnvironment(guilds=guilds, rest_latency=args.rest_latency) as env:
+            started = time.perf_counter()
+            await env.start()
+
+            results[f'startup_{guilds}_guilds_ms'] = (time.perf_counter() - started) * 1000
+            results[f'startup_{guilds}_guilds_rest_calls'] = sum(env.bot.rest_calls.values())
+
+    return results
+
+
+@benchmark('play')
+async def play(args: argparse.Namespace) -> dict[str, float]:
+    async with FakeEnvironment(guilds=args.guilds, rest_latency=args.rest_latency,
+                               node_latency=args.node_latency) as env:
+        await env.start()
+
+        ack = LatencyWindow('ack', size=args.plays)
+        total = LatencyWindow('total', size=args.plays)
+
+        # Um /play por vez: o primeiro de cada guild conecta e começa a tocar, os demais apenas enfileiram
+        for index in range(args.plays):
+            guild = env.bot.guilds[index % len(env.bot.guilds)]
+            started = time.perf_counter()
+
+            await env.music.play(env.context(guild), f'música de teste {index}')
+            ack.add(time.perf_counter() - started)
+
+            await env.idle()
+            total.add(time.perf_counter() - started)
+
+        rest_calls = sum(env.bot.rest_calls.values())
+
+        # Todas as guilds ao mesmo tempo
+        started = time.perf_counter()
+
+        await asyncio.gather(*(env.music.play(env.context(guild), f'rajada {guild.id}') for guild in env.bot.guilds))
+        await env.idle()
+
+        burst = time.perf_counter() - started
+
+    return {
+        **percentiles('play_ack', ack),
+        **percentiles('play_total', total),
+        'play_rest_calls_per_play': rest_calls / args.plays,
+        'play_burst_per_second': len(env.bot.guilds) / burst
+    }
+
+
+@benchmark('ingestion')
+async def ingestion(args: argparse.Namespace) -> dict[str, float]:
+    url = 'https://www.youtube.com/playlist?list=PLbenchmark'
+
+    async with FakeEnvironment(guilds=args.guilds, rest_latency=args.rest_latency, node_latency=args.node_latency,
+                               playlist_size=args.playlist) as env:
+        await env.start()
+
+        guild = env.bot.guilds[0]
+        ctx = env.context(guild)
+        await env.music.join(ctx)
+
+        # Gerador executado diretamente, sem o escalonador
+        started = time.perf_counter()
+
+        handler = env.handler(guild)
+
+        async for _ in Music.playlist_lookup(url, ctx.author.id, handler, handler.generation):
+            pass
+
+        direct = time.perf_counter() - started
+        await env.idle()
+
+        # Uma playlist por guild, dividida pelo escalonador
+        for guild in env.bot.guilds:
+            await env.music.join(env.context(guild))
+
+        started = time.perf_counter()
+
+        for guild in env.bot.guilds:
+            handler = env.handler(guild)
+            env.music.ingestion.submit(guild.id, Music.playlist_lookup(url, 0, handler, handler.generation))
+
+        while env.music.ingestion.stats()['depth']:
+            await asyncio.sleep(0.001)
+
+        scheduled = time.perf_counter() - started
+
+    return {
+        'ingestion_tracks_per_second': args.playlist / direct,
+        'ingestion_scheduled_tracks_per_second': args.playlist * len(env.bot.guilds) / scheduled
+    }
+
+
+@benchmark('spotify_ingestion')
+async def spotify_ingestion(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+
+    async with FakeEnvironment(rest_latency=args.rest_latency, node_latency=args.node_latency,
+                               playlist_size=args.playlist) as env:
+        await env.start()
+
+        guild = env.bot.guilds[0]
+        ctx = env.context(guild)
+        await env.music.join(ctx)
+
+        handler = env.handler(guild)
+
+        for kind in ('playlist', 'album'):
+            url = f'https://open.spotify.com/{kind}/benchmark{kind}'
+            started = time.perf_counter()
+
+            async for _ in Music.playlist_lookup(url, ctx.author.id, handler, handler.generation,
+                                                 spotify_decode=spotify.decode_url(url)):
+                pass
+
+            results[f'spotify_{kind}_tracks_per_second'] = args.playlist / (time.perf_counter() - started)
+            await env.idle()
+
+            # Sem o ISRC as músicas são resolvidas apenas pelo título e artista
+            missing = sum(1 for entry in handler.player.queue if not entry.isrc)
+
+            if missing:
+                raise RuntimeError(f'{missing} música(s) do {kind} do Spotify adicionada(s) sem ISRC')
+
+            handler.player.queue.clear()
+
+    return results
+
+
+@benchmark('queue_refresh')
+async def queue_refresh(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+
+    async with FakeEnvironment(rest_latency=args.rest_latency) as env:
+        await env.start()
+        view = env.handler(env.bot.guilds[0]).queue_view
+
+        for size in args.queue_sizes:
+            await fill_queue(env, size)
+
+            view.page = 0
+            results[f'queue_refresh_{size}_ms'] = await timeit(view.refresh, args.repeat)
+
+            view.page = view.max_page
+            results[f'queue_refresh_{size}_last_page_ms'] = await timeit(view.refresh, args.repeat)
+
+    return results
+
+
+@benchmark('shuffle')
+async def shuffle(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+
+    async with FakeEnvironment(rest_latency=args.rest_latency) as env:
+        await env.start()
+        guild = env.bot.guilds[0]
+
+        for size in args.queue_sizes:
+            await fill_queue(env, size)
+            results[f'shuffle_{size}_ms'] = await timeit(lambda: env.music.shuffle(env.interaction(guild)),
+                                                         args.repeat)
+
+    return results
+
+
+@benchmark('put_at')
+async def put_at(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+
+    async with FakeEnvironment(rest_latency=args.rest_latency) as env:
+        await env.start()
+        guild = env.bot.guilds[0]
+
+        for size in args.queue_sizes:
+            await fill_queue(env, size)
+
+            # Pior caso: do início para o fim da fila
+            results[f'put_at_{size}_ms'] = await timeit(
+                lambda: env.music._put_at.callback(env.music, env.context(guild), 1, size), args.repeat
+            )
+
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+
+def compare(previous: dict, current: dict, threshold: float) -> int:
+    """
+    Imprime a diferença entre duas execuções.
+    Métricas terminadas em "_per_second" são melhores quanto maiores, as demais quanto menores.
+
+    :param threshold: Variação percentual considerada regressão
+    :return: Quantidade de regressões
+    """
+    regressions = 0
+    print(f'\nComparação com {previous["name"]} ({previous["revision"]}, {previous["date"]})')
+
+    for metric, value in current['metrics'].items():
+        old = previous['metrics'].get(metric)
+
+        if old is None:
+            continue
+
+        change = (value - old) / old * 100 if old else 0.0
+        worse = -change if metric.endswith('_per_second') else change
+        flag = ''
+
+        if worse > threshold:
+            flag = '  <- regressão'
+            regressions += 1
+        elif worse < -threshold:
+            flag = '  <- melhora'
+
+        print(f'{metric:45} {old:12.3f} {value:12.3f} {change:+8.1f}%{flag}')
+
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', help=f'Benchmarks a executar (padrão: todos): {", ".join(BENCHMARKS)}')
+    parser.add_argument('--name', help='Nome do arquivo de resultado (padrão: commit atual)')
+    parser.add_argument('--compare', help='Resultado anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=10, help='Variação percentual considerada regressão')
+    parser.add_argument('--guilds', type=int, default=20, help='Guilds usadas no /play e nas playlists')
+    parser.add_argument('--startup-guilds', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--plays', type=int, default=500)
+    parser.add_argument('--playlist', type=int, default=1000, help='Músicas por playlist')
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=[25, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--rest-latency', type=float, default=0.0, help='Latência simulada do discord (s)')
+    parser.add_argument('--node-latency', type=float, default=0.0, help='Latência simulada do lavalink (s)')
+
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+
+    if unknown:
+        parser.error(f'benchmarks desconhecidos: {", ".join(sorted(unknown))}')
+
+    return args
+
+
+async def main():
+    args = parse_args()
+    names = args.benchmarks or list(BENCHMARKS)
+    metrics = {}
+
+    for name in names:
+        started = time.perf_counter()
+        results = await BENCHMARKS[name](args)
+        metrics.update(results)
+
+        print(f'[{name}] {time.perf_counter() - started:.1f}s')
+
+        for metric, value in results.items():
+            print(f'  {metric:43} {value:12.3f}')
+
+    revision = git_revision()
+    result = {
+        'name': args.name or revision,
+        'revision': revision,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'arguments': {key: value for key, value in vars(args).items() if key not in ('name', 'compare')},
+        'metrics': metrics
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'{result["name"]}.json')
+
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(result, f, indent=2)
+
+    print(f'\nResultado salvo em {path}')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf8') as f:
+            previous = json.load(f)
+
+        if compare(previous, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,281 @@
+"""
+Simulador de carga com várias guilds ativas ao mesmo tempo.
+
+Executa a cog Music original contra os substitutos do discord e do lavalink (benchmarks/fakes.py) e, para cada
+quantidade de guilds, gera eventos aleatórios por guild durante alguns segundos: /play (com pesquisas populares
+repetidas entre guilds), playlists, skips, membros entrando e saindo do canal de voz, músicas terminando sozinhas e
+novas guilds entrando no meio da execução. Cada etapa informa vazão, percentis de latência (reconhecimento e
+resolução do /play e transição entre músicas), crescimento de memória e atraso do event loop.
+
+    python -m benchmarks.simulate --steps 50 100 200 400 --duration 15
+
+A capacidade estimada é a maior etapa em que o p95 da transição e do atraso do event loop ficaram abaixo de --slo.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import time
+from collections import Counter
+
+from utils import LatencyWindow, LoopWatchdog
+
+from .fakes import FakeContext, FakeEnvironment, FakeGuild, FakeInteraction, FakeVoiceChannel
+
+
+# Peso de cada evento sorteado pelas guilds (o fim das músicas é gerado pelo FakeNode)
+EVENTS = {
+    'play': 5,
+    'playlist': 0.3,
+    'skip': 1,
+    'voice': 2
+}
+
+
+def rss_mb() -> float:
+    """Memória residente atual do processo (pico no caso de sistemas sem /proc)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Simulation:
+    """Uma etapa do simulador com uma quantidade fixa de guilds."""
+
+    def __init__(self, args: argparse.Namespace, guilds: int):
+        self.args = args
+        self.guilds = guilds
+        self.rng = random.Random(args.seed + guilds)
+
+        self.events: Counter[str] = Counter()
+        self.env: FakeEnvironment | None = None
+        self.until = 0.0
+
+    def member(self, guild: FakeGuild):
+        return self.rng.choice([member for member in guild.members.values() if not member.bot])
+
+    async def play(self, guild: FakeGuild):
+        # Pesquisas sorteadas de um catálogo limitado, portanto guilds diferentes repetem as mesmas pesquisas
+        query = f'música popular {self.rng.randrange(self.args.catalog)}'
+        await self.env.music.play(FakeContext(self.env.bot, guild, self.member(guild)), query)
+
+    async def playlist(self, guild: FakeGuild):
+        url = f'https://www.youtube.com/playlist?list=PLsim{self.rng.randrange(max(1, self.args.catalog // 20))}'
+        await self.env.music.play(FakeContext(self.env.bot, guild, self.member(guild)), url)
+
+    async def skip(self, guild: FakeGuild):
+        player = guild.voice_client
+
+        if player and player.current:
+            await self.env.music.skip(FakeInteraction(self.env.bot, guild, self.member(guild)))
+
+    async def voice(self, guild: FakeGuild):
+        member = self.member(guild)
+        channel = next(channel for channel in guild.channels.values() if isinstance(channel, FakeVoiceChannel))
+
+        guild.move_member(member, None if member.voice and member.voice.channel else channel)
+
+    async def session(self, guild: FakeGuild):
+        """Gera eventos para a guild até o fim da etapa."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            delay = self.rng.expovariate(self.args.rate)
+
+            # O último intervalo não ultrapassa o fim da etapa
+            if loop.time() + delay >= self.until:
+                await asyncio.sleep(max(0.0, self.until - loop.time()))
+                return
+
+            await asyncio.sleep(delay)
+
+            event = self.rng.choices(list(EVENTS), list(EVENTS.values()))[0]
+            self.events[event] += 1
+
+            try:
+                await getattr(self, event)(guild)
+            except Exception as e:
+                self.events['errors'] += 1
+                self.events[f'error {event}: {e.__class__.__name__}'] += 1
+
+    async def arrival(self):
+        """Guild que adiciona o bot no meio da etapa."""
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.rng.uniform(0, self.args.duration / 2))
+
+        guild = self.env.bot.add_guild(listeners=self.args.listeners)
+        self.env.bot.dispatch('guild_join', guild)
+        self.events['guild_join'] += 1
+
+        while not self.env.handler(guild):
+            if loop.time() >= self.until:
+                return
+
+            await asyncio.sleep(0.01)
+
+        await self.session(guild)
+
+    async def run(self) -> dict:
+        args = self.args
+        arrivals = int(self.guilds * args.join_fraction)
+
+        self.env = FakeEnvironment(
+            guilds=self.guilds - arrivals,
+            listeners=args.listeners,
+            rest_latency=args.rest_latency,
+            node_latency=args.node_latency,
+            playlist_size=args.playlist,
+            track_length=lambda: self.rng.uniform(*args.track_length)
+        )
+
+        memory_before = rss_mb()
+
+        async with self.env as env:
+            music = env.music
+
+            # Janelas grandes o suficiente para a etapa inteira
+            music.ack_latency = LatencyWindow('ack', size=1_000_000)
+            music.resolve_latency = LatencyWindow('resolve', size=1_000_000)
+
+            watchdog = LoopWatchdog(interval=0.01, threshold=args.stall, history=1000)
+            watchdog.lag = LatencyWindow('lag', size=1_000_000)
+
+            started = time.perf_counter()
+            await env.start()
+            startup = time.perf_counter() - started
+
+            watchdog.start()
+            loop = asyncio.get_running_loop()
+            self.until = loop.time() + args.duration
+
+            started = time.perf_counter()
+
+            await asyncio.gather(*(self.session(guild) for guild in list(env.bot.guilds)),
+                                 *(self.arrival() for _ in range(arrivals)))
+
+            elapsed = time.perf_counter() - started
+
+            # Drena o trabalho em andamento antes de medir a memória
+            env.node.stop_timers()
+
+            try:
+                await asyncio.wait_for(env.idle(), timeout=args.duration)
+            except asyncio.TimeoutError:
+                self.events['drain_timeout'] += 1
+
+            watchdog.stop()
+
+            queued = sum(guild.voice_client.queue.count for guild in env.bot.guilds if guild.voice_client)
+            memory_after = rss_mb()
+
+            generated = sum(count for event, count in self.events.items() if event in EVENTS)
+
+            return {
+                'guilds': self.guilds,
+                'startup_ms': startup * 1000,
+                'events_per_second': generated / elapsed,
+                'tracks_started_per_second': env.bot.dispatched['wavelink_track_start'] / elapsed,
+                'plays': len(music.resolve_latency),
+                'ack_p50_ms': music.ack_latency.percentile(50) * 1000,
+                'ack_p95_ms': music.ack_latency.percentile(95) * 1000,
+                'resolve_p50_ms': music.resolve_latency.percentile(50) * 1000,
+                'resolve_p95_ms': music.resolve_latency.percentile(95) * 1000,
+                'resolve_p99_ms': music.resolve_latency.percentile(99) * 1000,
+                'transitions': len(env.node.transitions),
+                'transition_p50_ms': env.node.transitions.percentile(50) * 1000,
+                'transition_p95_ms': env.node.transitions.percentile(95) * 1000,
+                'transition_p99_ms': env.node.transitions.percentile(99) * 1000,
+                'gap_p50_ms': music.gap_latency.percentile(50) * 1000,
+                'gap_p95_ms': music.gap_latency.percentile(95) * 1000,
+                'lag_p50_ms': watchdog.lag.percentile(50) * 1000,
+                'lag_p95_ms': watchdog.lag.percentile(95) * 1000,
+                'lag_max_ms': watchdog.lag.percentile(100) * 1000,
+                'stalls': len(watchdog.stalls),
+                'rest_calls_per_second': sum(env.bot.rest_calls.values()) / elapsed,
+                'queued_items': queued,
+                'rss_mb': memory_after,
+                'rss_growth_mb': memory_after - memory_before,
+                'events': dict(self.events)
+            }
+
+
+COLUMNS = [
+    ('guilds', 'guilds', '{:>6}'),
+    ('events_per_second', 'ev/s', '{:>7.0f}'),
+    ('tracks_started_per_second', 'músicas/s', '{:>9.1f}'),
+    ('ack_p95_ms', 'ack p95', '{:>8.2f}'),
+    ('resolve_p95_ms', 'resolve p95', '{:>11.2f}'),
+    ('transition_p50_ms', 'trans p50', '{:>9.2f}'),
+    ('transition_p95_ms', 'trans p95', '{:>9.2f}'),
+    ('transition_p99_ms', 'trans p99', '{:>9.2f}'),
+    ('gap_p95_ms', 'gap p95', '{:>8.2f}'),
+    ('lag_p95_ms', 'lag p95', '{:>8.2f}'),
+    ('lag_max_ms', 'lag max', '{:>8.1f}'),
+    ('stalls', 'stalls', '{:>6}'),
+    ('rss_mb', 'rss MB', '{:>7.1f}'),
+    ('rss_growth_mb', '+MB', '{:>6.1f}')
+]
+
+
+def print_row(result: dict | None = None):
+    if result is None:
+        print(' '.join(f'{title:>{len(fmt.format(0))}}' for _, title, fmt in COLUMNS))
+    else:
+        print(' '.join(fmt.format(result[key]) for key, _, fmt in COLUMNS), flush=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, nargs='+', default=[50, 100, 200, 400], help='Guilds em cada etapa')
+    parser.add_argument('--duration', type=float, default=10, help='Duração de cada etapa (s)')
+    parser.add_argument('--rate', type=float, default=0.5, help='Eventos por segundo em cada guild')
+    parser.add_argument('--track-length', type=float, nargs=2, default=[2, 6], metavar=('MIN', 'MAX'),
+                        help='Duração das músicas (s)')
+    parser.add_argument('--listeners', type=int, default=3, help='Ouvintes por guild')
+    parser.add_argument('--join-fraction', type=float, default=0.1, help='Fração das guilds que entra no meio')
+    parser.add_argument('--catalog', type=int, default=2000, help='Pesquisas distintas sorteadas pelas guilds')
+    parser.add_argument('--playlist', type=int, default=50, help='Músicas por playlist')
+    parser.add_argument('--rest-latency', type=float, default=0.0, help='Latência simulada do discord (s)')
+    parser.add_argument('--node-latency', type=float, default=0.0, help='Latência simulada do lavalink (s)')
+    parser.add_argument('--stall', type=float, default=0.1, help='Atraso do event loop considerado travamento (s)')
+    parser.add_argument('--slo', type=float, default=50, help='Limite do p95 de transição e atraso (ms)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Arquivo JSON com o resultado de todas as etapas')
+
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    results = []
+    capacity = None
+
+    print_row()
+
+    for guilds in args.steps:
+        result = await Simulation(args, guilds).run()
+        results.append(result)
+        print_row(result)
+
+        if result['transition_p95_ms'] <= args.slo and result['lag_p95_ms'] <= args.slo:
+            capacity = guilds
+
+        errors = {event: count for event, count in result['events'].items() if event.startswith('error ')}
+
+        if errors:
+            print(f'       erros: {errors}')
+
+    print(f'\nCapacidade estimada (p95 de transição e atraso <= {args.slo:g}ms): '
+          f'{capacity if capacity is not None else "abaixo da primeira etapa"} guilds')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump({'arguments': vars(args), 'steps': results, 'capacity': capacity}, f, indent=2)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,14 +1,26 @@
+import io
+import os
+import time
 import typing
+import asyncio
+from collections import Counter
 
 import discord
 from discord.ext import commands
 
+from utils import ROOT, CommandSyncer, CProfileSession, SamplingProfiler
+
 
 class Adm(commands.Cog):
     """Cog para comandos de teste e configuração."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.profiling = False
+
+        # Hashes da árvore de comandos sincronizada em cada escopo, syncs sem alterações são ignorados
+        self.syncer = CommandSyncer(bot.tree, os.path.join(ROOT, 'command_hashes.json'),
+                                    concurrency=int(os.getenv('SYNC_CONCURRENCY', 5)))
 
     @commands.command(name='purge')
     @commands.is_owner()
@@ -31,52 +43,206 @@ class Adm(commands.Cog):
         """
         await ctx.reply('pong!', delete_after=5)
 
+    @commands.command(name='stats')
+    @commands.is_owner()
+    async def stats(self, ctx: commands.Context):
+        """
+        Mostra latências do /play (reconhecimento da interação e resolução da pesquisa), o intervalo entre músicas e
+        métricas das playlists.
+
+        :param ctx: Objeto de contexto
+        """
+        music = self.bot.get_cog('Music')
+        ingestion = music.ingestion.stats()
+        actors = music.actor_stats()
+
+        lines = [
+            music.ack_latency.summary(),
+            music.resolve_latency.summary(),
+            music.gap_latency.summary(),
+            f'pesquisas em andamento: {len(music.play_jobs)}, '
+            f'{music.searches.shared}/{music.searches.calls} compartilhadas',
+            f'playlists: {ingestion["depth"]} na fila de {ingestion["keys"]} guild(s), '
+            f'{ingestion["running"]}/{ingestion["workers"]} workers ocupados, '
+            f'{ingestion["throughput"]:.1f} músicas/s, {ingestion["processed"]} processadas, '
+            f'{ingestion["failed"]} com erro',
+            f'atores: {actors["depth"]} mensagens pendentes (máximo {actors["max_depth"]} em uma guild), '
+            f'{actors["busy"]} ocupados, {actors["processed"]} processadas, {actors["failed"]} com erro'
+        ]
+
+        # Guilds com os maiores intervalos entre músicas
+        gaps = sorted(((handler.gaps.percentile(95), handler.guild.name) for handler in music.guild_pool
+                       if len(handler.gaps)), reverse=True)[:3]
+
+        if gaps:
+            lines.append('maiores gaps (p95): ' + ', '.join(f'{name} {gap * 1000:.0f}ms' for gap, name in gaps))
+
+        if music.spotify_api:
+            lines.append(f'spotify: {music.spotify_api.requests} requisições, {music.spotify_api.throttled} com 429')
+
+        await ctx.reply('```\n' + '\n'.join(lines) + '\n```', delete_after=30)
+
+    @commands.command(name='lag')
+    @commands.is_owner()
+    async def lag(self, ctx: commands.Context, amount: int = 3):
+        """
+        Mostra o atraso do event loop e as pilhas dos últimos travamentos.
+
+        :param ctx: Objeto de contexto
+        :param amount: Quantidade de travamentos para anexar
+        """
+        watchdog = self.bot.watchdog
+        stalls = list(watchdog.stalls)[-amount:] if amount > 0 else []
+
+        content = f'```\n{watchdog.summary()}\n```'
+        files = []
+
+        if stalls:
+            report = '\n\n'.join(str(stall) for stall in reversed(stalls))
+            files.append(discord.File(io.BytesIO(report.encode()), filename='stalls.txt'))
+
+        await ctx.reply(content, files=files)
+
+    @commands.command(name='profile')
+    @commands.is_owner()
+    async def profile(self, ctx: commands.Context, seconds: float = 10,
+                      mode: typing.Literal['sample', 'cprofile'] = 'sample', top: int = 25):
+        """
+        Executa um profiler no bot em produção por alguns segundos.
+
+        $profile 10 -> Amostragem por 10 segundos, anexa relatório e pilhas no formato folded (flamegraph)
+        $profile 10 cprofile -> cProfile por 10 segundos, anexa relatório e arquivo .pstats
+
+        :param ctx: Objeto de contexto
+        :param seconds: Duração em segundos (máximo 300)
+        :param mode: "sample" (baixo custo) ou "cprofile" (todas as chamadas, custo alto)
+        :param top: Quantidade de funções no relatório
+        """
+        if self.profiling:
+            await ctx.reply('Já existe um profiler em execução!', delete_after=5)
+            return
+
+        seconds = max(1.0, min(seconds, 300.0))
+        self.profiling = True
+
+        await ctx.reply(f'Coletando perfil ({mode}) por {seconds:g} segundos...', delete_after=seconds)
+
+        try:
+            if mode == 'cprofile':
+                profiler = CProfileSession()
+                profiler.start()
+
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    profiler.stop()
+
+                report = profiler.report(top, sort='cumulative')
+                files = [discord.File(io.BytesIO(profiler.dump()), filename='profile.pstats')]
+            else:
+                profiler = SamplingProfiler()
+                profiler.start()
+
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    # A thread de amostragem encerra no próximo intervalo, join() não bloqueia o loop por muito tempo
+                    profiler.stop()
+
+                report = profiler.report(top)
+                files = [discord.File(io.BytesIO(profiler.folded().encode()), filename='stacks.folded')]
+        finally:
+            self.profiling = False
+
+        files.insert(0, discord.File(io.BytesIO(report.encode()), filename='report.txt'))
+
+        # Mensagens do discord possuem no máximo 2000 caracteres, o relatório completo fica no anexo
+        preview = report if len(report) < 1900 else report[:1900].rsplit('\n', 1)[0] + '\n...'
+        await ctx.reply(f'```\n{preview}\n```', files=files)
+
+    @commands.command(name='reload')
+    @commands.is_owner()
+    async def reload(self, ctx: commands.Context, extension: str = 'music'):
+        """
+        Recarrega uma cog sem reiniciar o bot.
+        A cog de músicas repassa players, filas, views e o node do lavalink para a nova instância, portanto o bot não
+        sai dos canais de voz.
+
+        $reload -> Recarrega cogs/music.py
+        $reload adm -> Recarrega cogs/adm.py
+
+        :param ctx: Objeto de contexto
+        :param extension: Nome da cog
+        """
+        name = f'cogs.{extension}'
+        started = time.perf_counter()
+
+        try:
+            await self.bot.reload_extension(name)
+        except commands.ExtensionError as e:
+            await ctx.reply(f'Falha ao recarregar {name}, a versão anterior foi mantida: {e}')
+            return
+
+        elapsed = (time.perf_counter() - started) * 1000
+
+        # Alterações na assinatura dos slash commands ainda precisam do $sync
+        await ctx.reply(f'{name} recarregada em {elapsed:.0f}ms, {len(self.bot.voice_clients)} player(s) mantidos.',
+                        delete_after=30)
+
     @commands.command(name='sync')
     @commands.is_owner()
     async def sync(self, ctx: commands.Context, guilds: commands.Greedy[discord.Object],
-                   spec: typing.Optional[typing.Literal["~", "*", "^"]] = None):
+                   spec: typing.Optional[typing.Literal["~", "*", "^", "!"]] = None):
         """
         Sincroniza slash commands.
+        Escopos cuja árvore de comandos não mudou desde a última sincronização são ignorados.
 
         $sync -> Sincroniza globalmente
+        $sync ! -> Sincroniza globalmente mesmo sem alterações
         $sync ~ -> Sincroniza guild atual
         $sync * -> Copia todos os comandos globais para a guild atual e sincroniza
         $sync ^ -> Remove todos os comandos da guild atual e sincroniza
-        $sync id_1 id_2 -> Sincroniza guilds com ids específicos
+        $sync id_1 id_2 -> Sincroniza guilds com ids específicos ao mesmo tempo
+        $sync id_1 id_2 ! -> Sincroniza guilds com ids específicos mesmo sem alterações
 
         :param ctx: Objeto de contexto
         :param guilds: Id da guild (Esse parâmetro pode ser enviado várias vezes)
-        :param spec: Literal: "~", "*", "^" para alterar o comportamento do comando (Esse parâmetro é ignorado caso o
-        parâmetro anterior seja enviado)
+        :param spec: Literal: "~", "*", "^", "!" para alterar o comportamento do comando (Com ids de guilds apenas "!"
+        é considerado)
         """
+        force = spec == "!"
+
         if not guilds:
-            if spec == "~":
-                synced = await self.bot.tree.sync(guild=ctx.guild)
-            elif spec == "*":
+            if spec == "*":
                 self.bot.tree.copy_global_to(guild=ctx.guild)
-                synced = await self.bot.tree.sync(guild=ctx.guild)
             elif spec == "^":
                 self.bot.tree.clear_commands(guild=ctx.guild)
-                await self.bot.tree.sync(guild=ctx.guild)
-                synced = []
+
+            guild = ctx.guild if spec in ("~", "*", "^") else None
+            result = await self.syncer.sync(guild, force=force)
+            scope = 'globalmente' if guild is None else 'no server atual'
+
+            if result.status == 'unchanged':
+                await ctx.send(f"Nenhuma alteração nos comandos {scope}, sincronização ignorada.")
+            elif result.status == 'failed':
+                await ctx.send(f"Falha ao sincronizar {scope}: {result.error}")
             else:
-                synced = await self.bot.tree.sync()
+                await ctx.send(f"{result.commands} comandos sincronizados {scope}.")
 
-            await ctx.send(f"{len(synced)} comandos sincronizados "
-                           f"{'globalmente' if spec is None else 'no server atual.'}")
             return
 
-        count = 0
+        results = await self.syncer.sync_many(guilds, force=force)
+        counts = Counter(result.status for result in results)
 
-        for guild in guilds:
-            try:
-                await self.bot.tree.sync(guild=guild)
-            except discord.HTTPException:
-                pass
-            else:
-                count += 1
+        content = f"Árvore de comandos sincronizada para {counts['synced']}/{len(guilds)} guilds " \
+                  f"({counts['unchanged']} sem alterações, {counts['failed']} com erro)."
+        report = '\n'.join(str(result) for result in results)
 
-        await ctx.send(f"Árvore de comandos sincronizada para {count}/{len(guilds)} guilds.")
+        # Mensagens do discord possuem no máximo 2000 caracteres, relatórios grandes vão em anexo
+        if len(content) + len(report) < 1900:
+            await ctx.send(f'{content}\n```\n{report}\n```')
+        else:
+            await ctx.send(content, file=discord.File(io.BytesIO(report.encode()), filename='sync.txt'))
 
 
 async def setup(bot: commands.Bot):
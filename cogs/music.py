@@ -21,8 +21,12 @@ import random
 import logging
 import asyncio
 import re
+import time
+import functools
+from collections import OrderedDict, deque
 from datetime import datetime, date
-from math import floor
+from math import ceil, floor
+from typing import AsyncIterator, Iterator
 
 import discord
 import wavelink
@@ -33,12 +37,82 @@ from discord.ext import commands
 from utils import *
 
 
+# Métricas exportadas pelo MetricsServer (iniciado em main.py quando METRICS_PORT estiver definido)
+PLAY_TRANSITION = histogram('sonomonkey_play_transition_seconds',
+                            'Tempo entre play_song() ser chamado e o player começar a tocar')
+PLAY_ACK = histogram('sonomonkey_play_ack_seconds', 'Tempo para reconhecer a interação do /play')
+PLAY_RESOLVE = histogram('sonomonkey_play_resolve_seconds', 'Tempo para resolver e enfileirar o /play')
+SEARCH_LATENCY = histogram('sonomonkey_search_seconds', 'Latência das pesquisas por fonte', ('source',))
+PLAYLIST_TRACKS = counter('sonomonkey_playlist_tracks_total', 'Músicas adicionadas por playlist_lookup()')
+VIEW_EDITS = counter('sonomonkey_view_edits_total', 'Edições das mensagens das views', ('view',))
+QUEUE_LENGTH = gauge('sonomonkey_queue_length', 'Itens na fila por guild', ('guild',))
+ACTIVE_PLAYERS = gauge('sonomonkey_active_players', 'Players conectados a um canal de voz')
+PLAYING_PLAYERS = gauge('sonomonkey_playing_players', 'Players tocando alguma música')
+INGESTION = gauge('sonomonkey_ingestion', 'Estado do escalonador de playlists', ('stat',))
+LAVALINK_STATS = gauge('sonomonkey_lavalink', 'Estatísticas enviadas pelo node do lavalink', ('node', 'stat'))
+ACTORS = gauge('sonomonkey_actors', 'Caixas de mensagens dos atores das guilds', ('stat',))
+TRACK_GAP = histogram('sonomonkey_track_gap_seconds', 'Tempo entre o fim de uma música e o início da seguinte')
+TRACK_GAP_GUILD = gauge('sonomonkey_track_gap_p95_seconds', 'p95 do intervalo entre músicas por guild', ('guild',))
+AUTOCOMPLETE = histogram('sonomonkey_autocomplete_seconds', 'Tempo de resposta do autocomplete do /play',
+                         ('source',))
+
+# Autocomplete do /play: a pesquisa no lavalink só é feita após o usuário parar de digitar (debounce) e desiste antes
+# do prazo de 3 segundos do discord. Resultados ficam em cache por LIVE_SUGGESTIONS_TTL segundos
+AUTOCOMPLETE_DEBOUNCE = 0.35
+AUTOCOMPLETE_TIMEOUT = 1.5
+LIVE_SUGGESTIONS_SIZE = 512
+LIVE_SUGGESTIONS_TTL = 600
+
+
+def _upgrade(obj, cls: type):
+    """
+    Troca, no próprio objeto, a classe de objetos criados por uma versão anterior deste módulo (reload da cog) pela
+    classe recarregada de mesmo nome. Todas as referências ao objeto continuam válidas.
+
+    :param obj: Objeto a ser atualizado
+    :param cls: Classe atual
+    :return: O próprio objeto
+    """
+    if obj is not None and not isinstance(obj, cls) and type(obj).__qualname__ == cls.__qualname__:
+        obj.__class__ = cls
+
+    return obj
+
+
+def serialized(name: str):
+    """
+    Executa o método da cog como uma mensagem do ator da guild da interação, portanto comandos e botões que alteram
+    a mesma guild nunca rodam ao mesmo tempo.
+    A interação é reconhecida antes de entrar na fila do ator, que pode estar ocupado (fim de música, reset ou
+    playlists) por mais que o prazo de 3 segundos do discord, portanto o método deve responder com send_followup().
+
+    :param name: Nome da mensagem (usado nas métricas)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self: Music, interaction: discord.Interaction, *args, **kwargs):
+            handler = self.guild_pool.get_handler(interaction.guild_id)
+
+            # noinspection PyUnresolvedReferences
+            if not interaction.response.is_done():
+                await interaction.response.defer(ephemeral=True)
+
+            return await handler.actor.ask(name, func, self, interaction, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 class GuildPool:
     """Pool para armazenar GuildHandlers."""
 
     def __init__(self):
         self._pool: dict[int, GuildHandler] = {}
-        
+
+    def __iter__(self) -> Iterator[GuildHandler]:
+        return iter(list(self._pool.values()))
+
     def add_handler(self, handler: GuildHandler):
         """
         Adiciona um handler a pool.
@@ -82,10 +156,52 @@ class GuildHandler:
         self.queue_view: QueueView | None = None
         self.views_channel_id: int | None = None
         self.reset: bool = False
+        self.listeners: int = 0
+
+        # Incrementado a cada reset(), playlists iniciadas antes dele não adicionam mais músicas
+        self.generation: int = 0
+
+        # Toda alteração no player, na fila e nas views da guild é executada em ordem pelo ator
+        self.actor: GuildActor = GuildActor(guild.id)
 
-        self.playlist_loop: asyncio.Task | None = None
         self.logger: Logger = Logger(guild.id)
 
+        # Momento em que a última música acabou, até a próxima começar, e intervalos entre as músicas da guild
+        self.track_ended_at: float | None = None
+        self.gaps: LatencyWindow = LatencyWindow('gap', size=50)
+
+        # Músicas tocadas na guild para o autocomplete, carregadas dos logs no primeiro uso
+        self.suggestions: SuggestionIndex | None = None
+
+    async def load_suggestions(self) -> SuggestionIndex:
+        """
+        Retorna o índice de músicas tocadas na guild, lendo os logs em outra thread na primeira chamada.
+
+        :return: Índice da guild
+        """
+        if self.suggestions is None:
+            # Atribuído antes de ler os logs, chamadas simultâneas usam o índice (ainda vazio) sem lê-los novamente
+            self.suggestions = SuggestionIndex(capacity=1000)
+
+            for title in await asyncio.to_thread(self.logger.titles):
+                self.suggestions.add(title, title[:100])
+
+        return self.suggestions
+
+    @property
+    def skip_duplicates(self) -> bool:
+        """Flag se músicas que já estão na fila são ignoradas ao adicionar músicas e playlists (alterada pelo /dedupe)."""
+        return self.music_cog.config_proxy.get_guild_data(self.guild.id).get('skip_duplicates', False)
+
+    async def set_skip_duplicates(self, value: bool):
+        """
+        Altera o modo que ignora músicas repetidas e salva as configurações.
+
+        :param value: Novo valor
+        """
+        self.music_cog.config_proxy.get_guild_data(self.guild.id)['skip_duplicates'] = value
+        await self.music_cog.config_proxy.save()
+
     @property
     def player(self) -> Player | None:
         """
@@ -95,6 +211,15 @@ class GuildHandler:
         """
         return self.guild.voice_client
 
+    def count_listeners(self, channel: discord.VoiceChannel | None):
+        """
+        Recalcula a quantidade de ouvintes (membros que não são bots) no canal de voz.
+        Chamado apenas quando o bot entra ou troca de canal, nos demais eventos a contagem é incremental.
+
+        :param channel: Canal de voz do bot
+        """
+        self.listeners = sum(1 for member in channel.members if not member.bot) if channel else 0
+
     async def setup_channel(self):
         """Configura views e recursos necessários."""
         ignoring_messages = []
@@ -143,9 +268,12 @@ class GuildHandler:
 
         # Se não existe recria-a
         if not channel:
-            await ctx.defer()
+            # /play já reconhece a interação antes de chegar aqui
+            if ctx.interaction and not ctx.interaction.response.is_done():
+                await ctx.defer()
+
             await self.setup_channel()
-            self.music_cog.config_proxy.save()
+            await self.music_cog.config_proxy.save()
 
     @staticmethod
     async def _check_message(channel: discord.TextChannel, message_id: int) -> discord.Message:
@@ -184,34 +312,95 @@ class GuildHandler:
 
 
 class ConfigProxy:
-    """Proxy para manipular configurações em memória."""
+    """
+    Proxy para manipular configurações em memória.
+
+    Com clusters de shards vários processos compartilham o mesmo config.json, cada um alterando apenas as guilds dos
+    seus shards. Por isso save() relê o arquivo com uma trava entre processos e grava apenas as guilds alteradas por
+    este processo, mantendo as dos demais. A trava pode ficar com outro processo por algum tempo, portanto a leitura e
+    a escrita são feitas em uma thread, fora do event loop.
+    """
 
     def __init__(self):
         self._config_path = os.path.join(ROOT, 'config.json')
+        self._lock_path = f'{self._config_path}.lock'
         self.config: dict | None = None
         self.guilds: dict[str, dict] | None = None
 
+        # Guilds lidas ou alteradas e guilds removidas por este processo
+        self._owned: set[str] = set()
+        self._removed: set[str] = set()
+
+        # Gravações deste processo são feitas uma por vez, na ordem em que foram pedidas
+        self._save_lock = asyncio.Lock()
+
         # Cria json caso não exista
         if not os.path.exists(self._config_path):
-            self.config = {
-                "guilds": {}
-            }
-
-            self.save()
+            self._write({}, set())
 
         self.load()
 
-    def save(self):
-        """Salva as alterações no arquivo json."""
-        with open(self._config_path, 'w', encoding='utf8') as f:
-            f.write(json.dumps(self.config, indent=2))
+    async def save(self):
+        """Salva as alterações no arquivo json, mesclando com as alterações feitas por outros processos."""
+        # Proxies criados antes de um reload da cog não têm a trava
+        if not hasattr(self, '_save_lock'):
+            self._save_lock = asyncio.Lock()
+
+        async with self._save_lock:
+            # Cópia das guilds deste processo, que podem ser alteradas enquanto a thread grava o arquivo
+            owned = {guild_id: dict(self.guilds[guild_id]) for guild_id in self._owned if guild_id in self.guilds}
+            removed = set(self._removed)
+
+            disk_guilds = await asyncio.to_thread(self._write, owned, removed)
+            self._removed -= removed
+
+            # Guilds dos outros processos são atualizadas a partir do arquivo
+            for guild_id, data in disk_guilds.items():
+                if guild_id not in self._owned and guild_id not in self._removed:
+                    self.guilds[guild_id] = data
+
+            for guild_id in list(self.guilds):
+                if guild_id not in self._owned and guild_id not in disk_guilds:
+                    del self.guilds[guild_id]
+
+    def _write(self, owned: dict[str, dict], removed: set[str]) -> dict[str, dict]:
+        """
+        Relê o arquivo e o reescreve com as guilds deste processo, segurando a trava entre processos.
+        Executado em uma thread, não acessa os dados em memória.
+
+        :param owned: Guilds deste processo, que sobrescrevem as do arquivo
+        :param removed: Guilds removidas por este processo
+        :return: Guilds dos outros processos lidas do arquivo
+        """
+        with FileLock(self._lock_path):
+            try:
+                config = self._read()
+            except (OSError, ValueError):
+                config = {'guilds': {}}
+
+            others = {guild_id: data for guild_id, data in config['guilds'].items()
+                      if guild_id not in owned and guild_id not in removed}
+
+            # Escrita atômica para não corromper o arquivo caso o processo morra no meio
+            temp_path = f'{self._config_path}.tmp'
+
+            with open(temp_path, 'w', encoding='utf8') as f:
+                f.write(json.dumps({**config, 'guilds': {**others, **owned}}, indent=2))
+
+            os.replace(temp_path, self._config_path)
+
+        return others
 
     def load(self):
         """Carrega dados armazenadas no arquivo json."""
-        with open(self._config_path, 'r', encoding='utf8') as f:
-            self.config = json.load(f)
+        with FileLock(self._lock_path):
+            self.config = self._read()
             self.guilds = self.config['guilds']
 
+    def _read(self) -> dict:
+        with open(self._config_path, 'r', encoding='utf8') as f:
+            return json.load(f)
+
     def get_guild_data(self, guild_id: int) -> dict[str, str | int] | None:
         """
         Retorna dados da guild.
@@ -225,6 +414,9 @@ class ConfigProxy:
 
         guild = self.guilds[str(guild_id)]
 
+        # O dicionário retornado é alterado diretamente, portanto a guild passa a ser deste processo
+        self._owned.add(str(guild_id))
+
         return guild
 
     def add_guild(self, guild_id: int, data: dict):
@@ -235,6 +427,8 @@ class ConfigProxy:
         :param data: Dados da guild
         """
         self.guilds[str(guild_id)] = data
+        self._owned.add(str(guild_id))
+        self._removed.discard(str(guild_id))
 
     def remove_guild(self, guild_id: int):
         """
@@ -245,6 +439,9 @@ class ConfigProxy:
         if str(guild_id) in self.guilds:
             del self.guilds[str(guild_id)]
 
+        self._owned.discard(str(guild_id))
+        self._removed.add(str(guild_id))
+
     def _new_guild(self, guild_id: int):
         """
         Cria guild com dados temporários.
@@ -261,6 +458,143 @@ class ConfigProxy:
         self.add_guild(guild_id, data)
 
 
+class StateStore:
+    """
+    Armazena snapshots do estado dos players em disco para restaurá-los ao reiniciar o bot.
+
+    Cada guild possui dois arquivos: "<id>.queue.json" com a fila, reescrito apenas quando a fila é alterada, e
+    "<id>.player.json" com a música atual, posição, flags de loop e canal de voz, que é pequeno e barato de reescrever.
+    """
+
+    def __init__(self):
+        self.root_dir = os.path.join(ROOT, 'state')
+
+        # Último estado escrito de cada guild, usado para escrever apenas o que mudou
+        self._queue_versions: dict[int, int] = {}
+        self._player_states: dict[int, dict] = {}
+
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def is_queue_stale(self, guild_id: int, version: int) -> bool:
+        """
+        Verifica se a fila salva está desatualizada.
+
+        :param guild_id: Id da guild
+        :param version: Versão atual da fila
+        :return: True se a fila precisa ser reescrita, do contrário False
+        """
+        return self._queue_versions.get(guild_id) != version
+
+    async def save_queue(self, guild_id: int, version: int, tracks: list[list]):
+        """
+        Salva a fila da guild.
+
+        :param guild_id: Id da guild
+        :param version: Versão da fila salva
+        :param tracks: Músicas serializadas
+        """
+        self._queue_versions[guild_id] = version
+        await asyncio.to_thread(self._write, self._path(guild_id, 'queue'), tracks)
+
+    async def save_player(self, guild_id: int, state: dict):
+        """
+        Salva o estado do player caso tenha sido alterado.
+
+        :param guild_id: Id da guild
+        :param state: Estado serializado do player
+        """
+        if self._player_states.get(guild_id) == state:
+            return
+
+        self._player_states[guild_id] = state
+        await asyncio.to_thread(self._write, self._path(guild_id, 'player'), state)
+
+    def discard(self, guild_id: int):
+        """
+        Remove o snapshot da guild.
+
+        :param guild_id: Id da guild
+        """
+        known = self._queue_versions.pop(guild_id, None) is not None
+        known = self._player_states.pop(guild_id, None) is not None or known
+
+        if not known:
+            return
+
+        for kind in ('queue', 'player'):
+            try:
+                os.remove(self._path(guild_id, kind))
+            except FileNotFoundError:
+                pass
+
+    async def load_all(self) -> dict[int, tuple[dict, list[list]]]:
+        """
+        Carrega todos os snapshots salvos.
+
+        :return: Dicionário de id da guild para uma tupla com estado do player e fila
+        """
+        return await asyncio.to_thread(self._read_all)
+
+    def _read_all(self) -> dict[int, tuple[dict, list[list]]]:
+        snapshots = {}
+
+        for file in os.listdir(self.root_dir):
+            if not file.endswith('.player.json'):
+                continue
+
+            # Arquivos com nomes que não são ids de guilds são ignorados
+            try:
+                guild_id = int(file.split('.')[0])
+
+                with open(self._path(guild_id, 'player'), 'r', encoding='utf8') as f:
+                    state = json.load(f)
+
+                with open(self._path(guild_id, 'queue'), 'r', encoding='utf8') as f:
+                    tracks = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            snapshots[guild_id] = (state, tracks)
+
+        return snapshots
+
+    @staticmethod
+    def dump_track(track: QueueEntry | wavelink.Playable) -> list:
+        """
+        Serializa uma música no formato compacto do snapshot.
+
+        :param track: Item da fila ou música em reprodução
+        :return: Lista serializável
+        """
+        if not isinstance(track, QueueEntry):
+            track = QueueEntry.from_track(track, getattr(track, 'requester_id', None))
+
+        return track.to_list()
+
+    @staticmethod
+    def load_track(data: list) -> QueueEntry:
+        """
+        Reconstrói uma música serializada sem nenhuma requisição ao lavalink.
+
+        :param data: Lista serializada
+        :return: Item da fila
+        """
+        return QueueEntry(*data)
+
+    def _path(self, guild_id: int, kind: str) -> str:
+        return os.path.join(self.root_dir, f'{guild_id}.{kind}.json')
+
+    @staticmethod
+    def _write(path: str, data: dict | list):
+        """Escreve o arquivo de forma atômica para não corromper o snapshot caso o processo morra no meio."""
+        temp_path = f'{path}.tmp'
+
+        with open(temp_path, 'w', encoding='utf8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+        os.replace(temp_path, path)
+
+
 # noinspection PyCallingNonCallable
 class Music(commands.Cog):
     """Cog para recursos de músicas."""
@@ -273,14 +607,252 @@ class Music(commands.Cog):
         self.views_channels: list[int] = []
         
         self.spotify_support = False
+        self.spotify_api: SpotifyMetadataClient | None = None
         self.ready = False
 
-        bot.loop.create_task(self.connect_nodes())
+        # Prazos (em segundos) para desconectar players inativos, configuráveis pelo arquivo .env
+        self.idle_timeouts: dict[str, float] = {
+            'idle': float(os.getenv('IDLE_TIMEOUT', 180)),
+            'alone': float(os.getenv('ALONE_TIMEOUT', 0)),
+            'paused_alone': float(os.getenv('PAUSED_ALONE_TIMEOUT', 600))
+        }
+
+        # Roda de temporizadores única para todas as guilds
+        self.reaper: TimerWheel = TimerWheel(self._reap)
+
+        # Snapshots periódicos do estado dos players para restaurá-los ao reiniciar
+        self.state_store: StateStore = StateStore()
+        self.snapshot_interval = float(os.getenv('SNAPSHOT_INTERVAL', 15))
+        self.node_ready = asyncio.Event()
+
+        # Tasks que resolvem antecipadamente o próximo item das filas
+        self.prefetch_tasks: set[asyncio.Task] = set()
+
+        # Playlists são adicionadas por um escalonador global que divide os workers de forma justa entre as guilds
+        self.ingestion: FairScheduler = FairScheduler(
+            workers=int(os.getenv('INGESTION_WORKERS', 2)),
+            quantum=int(os.getenv('INGESTION_QUANTUM', 10))
+        )
+
+        # Pesquisas idênticas feitas ao mesmo tempo (mesmo link em vários servidores) compartilham uma única chamada
+        self.searches: SingleFlight = SingleFlight()
+
+        # Pesquisas do /play em andamento e latências de reconhecimento e de resolução medidas separadamente
+        self.play_jobs: set[asyncio.Task] = set()
+        self.ack_latency = LatencyWindow('ack')
+        self.resolve_latency = LatencyWindow('resolve')
+
+        # Intervalo entre o fim de uma música e o início da seguinte, em todas as guilds
+        self.gap_latency = LatencyWindow('gap')
+
+        REGISTRY.add_collector('music', self.collect_metrics)
+
+        # Spans aguardando o evento de início da música no lavalink, por guild
+        self.first_audio: dict[int, Span] = {}
+
+        # Autocomplete do /play: músicas resolvidas em todas as guilds, pesquisas no lavalink em cache e a última
+        # tecla digitada por cada usuário
+        self.suggestions: SuggestionIndex = SuggestionIndex(capacity=int(os.getenv('SUGGESTION_CAPACITY', 20000)))
+        self.live_suggestions: OrderedDict[str, tuple[float, list[tuple[str, str]]]] = OrderedDict()
+        self.autocomplete_tokens: dict[int, object] = {}
+
+        # Ao recarregar a extensão assume o estado da instância anterior em vez de começar do zero
+        previous: Music | None = getattr(bot, 'music_handoff', None)
+
+        if previous is not None:
+            self.adopt(previous)
+        else:
+            self.reaper.start()
+            self.ingestion.start()
+            self.connect_task = bot.loop.create_task(self.connect_nodes())
+
+        self.snapshot_task = bot.loop.create_task(self.snapshot_loop())
+
+    async def cog_unload(self):
+        """
+        Disparado ao remover a cog do bot.
+        O estado fica disponível em "bot.music_handoff" para a próxima instância (reload da extensão). Caso nenhuma
+        instância o assuma até a próxima iteração do event loop, a cog foi apenas removida e os workers são encerrados.
+        """
+        self.snapshot_task.cancel()
+        REGISTRY.remove_collector('music')
+
+        self.bot.music_handoff = self
+        self.bot.loop.call_soon(self._release_handoff)
+
+    def _release_handoff(self):
+        """Encerra os workers caso a cog tenha sido removida sem ser recarregada."""
+        if getattr(self.bot, 'music_handoff', None) is not self:
+            return
+
+        del self.bot.music_handoff
+
+        self.reaper.stop()
+        self.ingestion.stop()
+
+    def adopt(self, previous: Music):
+        """
+        Assume o estado de uma instância anterior da cog sem sair dos canais de voz.
+
+        Handlers, players, filas e itens da fila são os mesmos objetos, apenas atualizados para as classes
+        recarregadas. As views persistentes são recriadas sobre as mesmas mensagens e o node do lavalink, que pertence
+        ao wavelink, continua conectado. Tasks da versão anterior ainda em execução (pesquisas e playlists) terminam
+        normalmente e passam a criar objetos com as novas classes.
+
+        :param previous: Instância removida pelo reload
+        """
+        del self.bot.music_handoff
+
+        for name in ('guild_pool', 'config_proxy', 'state_store', 'views_channels', 'spotify_support', 'spotify_api',
+                     'ready', 'node_ready', 'reaper', 'ingestion', 'searches', 'prefetch_tasks', 'play_jobs',
+                     'ack_latency', 'resolve_latency', 'gap_latency', 'first_audio', 'connect_task', 'suggestions',
+                     'live_suggestions', 'autocomplete_tokens'):
+            setattr(self, name, getattr(previous, name))
+
+        self.reaper.set_callback(self._reap)
+        self.reaper.start()
+        self.ingestion.start()
+
+        # Reload antes do bot ficar pronto, a conexão com o lavalink ainda não começou
+        if not self.connect_task.done():
+            self.connect_task.cancel()
+            self.connect_task = self.bot.loop.create_task(self.connect_nodes())
+
+        _upgrade(self.guild_pool, GuildPool)
+        _upgrade(self.config_proxy, ConfigProxy)
+        _upgrade(self.state_store, StateStore)
+
+        for handler in self.guild_pool:
+            _upgrade(handler, GuildHandler)
+            _upgrade(handler.logger, Logger)
+            handler.music_cog = self
+
+            if handler.display_view:
+                handler.display_view = self._adopt_view(
+                    handler.display_view, DisplayView(handler.display_view.message, self, handler)
+                )
+
+            if handler.queue_view:
+                handler.queue_view = self._adopt_view(
+                    handler.queue_view, QueueView(handler.queue_view.message, handler)
+                )
+
+        for player in self.bot.voice_clients:
+            _upgrade(player, Player)
+            queue = _upgrade(player.queue, Queue)
+
+            queue._queue = deque(map(QueueEntry.upgrade, queue._queue))
+            queue.history._queue = deque(map(QueueEntry.upgrade, queue.history._queue))
+            queue._loaded = QueueEntry.upgrade(queue._loaded)
+            queue.reindex()
+
+        # Código da versão anterior ainda em execução passa a usar as classes recarregadas
+        namespace = type(previous).__init__.__globals__
+
+        if namespace is not globals():
+            for name, value in globals().items():
+                if isinstance(value, type) and value.__module__ == __name__ and name != 'Music':
+                    namespace[name] = value
+
+    def _adopt_view(self, old: discord.ui.View, new: discord.ui.View) -> discord.ui.View:
+        """
+        Substitui uma view persistente da versão anterior por uma nova sobre a mesma mensagem, copiando o estado dos
+        botões e da paginação. A mensagem não é editada, apenas o despacho das interações passa para a nova view.
+
+        :param old: View da instância anterior
+        :param new: View recém-criada
+        :return: A nova view
+        """
+        buttons = {item.custom_id: item for item in old.children if isinstance(item, discord.ui.Button)}
+
+        for item in new.children:
+            button = buttons.get(getattr(item, 'custom_id', None))
+
+            if button:
+                item.label = button.label
+                item.emoji = button.emoji
+                item.style = button.style
+                item.disabled = button.disabled
+
+        for attribute in ('page', 'max_page'):
+            if hasattr(old, attribute):
+                setattr(new, attribute, getattr(old, attribute))
+
+        # DisplayView possui um botão chamado "stop", por isso o método da classe base é chamado diretamente
+        discord.ui.View.stop(old)
+        self.bot.add_view(new, message_id=new.message.id)
+
+        return new
+
+    def collect_metrics(self):
+        """Atualiza as métricas calculadas no momento da exportação."""
+        active = playing = 0
+        QUEUE_LENGTH.clear()
+        TRACK_GAP_GUILD.clear()
+
+        for handler in self.guild_pool:
+            player = handler.player
+
+            if not player:
+                continue
+
+            active += 1
+            playing += player.is_playing()
+            QUEUE_LENGTH.set(player.queue.count, guild=handler.guild.id)
+
+            if len(handler.gaps):
+                TRACK_GAP_GUILD.set(handler.gaps.percentile(95), guild=handler.guild.id)
+
+        ACTIVE_PLAYERS.set(active)
+        PLAYING_PLAYERS.set(playing)
+
+        for stat, value in self.ingestion.stats().items():
+            INGESTION.set(value, stat=stat)
+
+        for stat, value in self.actor_stats().items():
+            ACTORS.set(value, stat=stat)
+
+    def actor_stats(self) -> dict[str, int]:
+        """
+        Estado dos atores das guilds.
+
+        :return: Mensagens pendentes (total e da maior caixa), atores ocupados, mensagens processadas e com erro
+        """
+        stats = {'depth': 0, 'max_depth': 0, 'busy': 0, 'processed': 0, 'failed': 0}
+
+        for handler in self.guild_pool:
+            actor = handler.actor
+            depth = len(actor)
+
+            stats['depth'] += depth
+            stats['max_depth'] = max(stats['max_depth'], depth)
+            stats['busy'] += actor.busy
+            stats['processed'] += actor.processed
+            stats['failed'] += actor.failed
+
+        return stats
 
     @commands.Cog.listener()
     async def on_wavelink_node_ready(self, node: wavelink.Node):
         """Disparado ao node se conectar corretamente ao lavalink."""
         print(f'Node: <{node.id}> is ready!')
+        self.node_ready.set()
+
+    @commands.Cog.listener()
+    async def on_wavelink_stats_update(self, data: dict):
+        """
+        Disparado periodicamente pelo lavalink com estatísticas do node.
+
+        :param data: Payload "stats" do lavalink (players, memória, cpu e frames)
+        """
+        def flatten(prefix: str, value):
+            if isinstance(value, dict):
+                for key, child in value.items():
+                    flatten(f'{prefix}_{key}' if prefix else key, child)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                LAVALINK_STATS.set(value, node='main', stat=prefix)
+
+        flatten('', {key: value for key, value in data.items() if key != 'op'})
 
     @commands.Cog.listener()
     async def on_wavelink_track_end(self, payload: wavelink.TrackEventPayload):
@@ -290,23 +862,86 @@ class Music(commands.Cog):
 
         handler = self.guild_pool.get_handler(payload.player.guild.id)
 
+        if handler:
+            handler.track_ended_at = time.perf_counter()
+
+            # A próxima música passa à frente das mensagens aguardando (playlists, views), o intervalo entre as
+            # músicas depende apenas da mensagem em processamento
+            handler.actor.tell_first('track_end', self.track_end, handler)
+
+    async def track_end(self, handler: GuildHandler):
+        """
+        Toca a próxima música, executado pelo ator da guild.
+
+        :param handler: Handler referente
+        """
         # Essa flag vai garantir que o método não seja chamado quando self.reset() for chamado
-        if not handler.reset:
+        if not handler.reset and handler.player:
             await self.play_song(handler)
+        else:
+            handler.track_ended_at = None
 
     @commands.Cog.listener()
-    async def on_voice_state_update(self, member: discord.Member, _, after: discord.VoiceState):
-        """Disparado ao ter uma alteração em algum canal de voz."""
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState,
+                                    after: discord.VoiceState):
+        """
+        Disparado ao ter uma alteração em algum canal de voz.
+        A quantidade de ouvintes é atualizada de forma incremental a partir dos estados anterior e posterior, portanto
+        eventos como mutar ou ensurdecer custam O(1).
+        """
         handler = self.guild_pool.get_handler(member.guild.id)
 
         # Retorna caso o bot não esteja conectado
+        if not handler or not handler.player:
+            return
+
+        handler.actor.tell('voice_state', self.voice_state_update, handler, member, before, after)
+
+    async def voice_state_update(self, handler: GuildHandler, member: discord.Member, before: discord.VoiceState,
+                                 after: discord.VoiceState):
+        """
+        Atualiza a contagem de ouvintes e os prazos de inatividade, executado pelo ator da guild.
+
+        :param handler: Handler referente
+        :param member: Membro que alterou o estado de voz
+        :param before: Estado anterior
+        :param after: Estado atual
+        """
+        # O bot pode ter saído do canal enquanto a mensagem aguardava
         if not handler.player:
             return
 
-        # Caso todos saiam do canal ou o bot seja desconectado manualmente, desconecta o bot
-        if len(handler.player.channel.members) == 1 or \
-                (member.display_name == self.bot.user.name and not after.channel):
-            await self.reset(handler, leave=True)
+        if member.id == self.bot.user.id:
+            # Caso o bot seja desconectado manualmente, reseta imediatamente
+            if not after.channel:
+                await self.reset(handler, leave=True)
+                return
+
+            # Apenas ao conectar ou trocar de canal é necessário recontar os ouvintes
+            if before.channel == after.channel:
+                return
+
+            handler.count_listeners(after.channel)
+        elif member.bot:
+            return
+        else:
+            channel_id = handler.player.channel.id if handler.player.channel else None
+
+            was_listening = before.channel is not None and before.channel.id == channel_id
+            is_listening = after.channel is not None and after.channel.id == channel_id
+
+            # Ignora alterações que não mudam a presença no canal do bot (mute, deafen, outros canais...)
+            if was_listening == is_listening:
+                return
+
+            handler.listeners += 1 if is_listening else -1
+
+        # Caso todos saiam do canal agenda a desconexão, do contrário cancela qualquer prazo pendente
+        if handler.listeners <= 0:
+            reason = 'paused_alone' if handler.player.is_paused() else 'alone'
+            self.schedule_idle(handler, reason)
+        else:
+            self.cancel_idle(handler, 'alone', 'paused_alone')
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -320,7 +955,7 @@ class Music(commands.Cog):
         await handler.setup_channel()
 
         self.guild_pool.add_handler(handler)
-        self.config_proxy.save()
+        await self.config_proxy.save()
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: discord.Guild):
@@ -330,10 +965,15 @@ class Music(commands.Cog):
 
         :param guild: Objeto de guild
         """
+        handler = self.guild_pool.get_handler(guild.id)
+
+        if handler:
+            handler.actor.close()
+
         self.guild_pool.remove_handler(guild.id)
 
         # self.config_proxy.remove_guild(guild.id)
-        # self.config_proxy.save()
+        # await self.config_proxy.save()
         
     @commands.Cog.listener()
     async def on_ready(self):
@@ -351,9 +991,12 @@ class Music(commands.Cog):
             self.guild_pool.add_handler(handler)
             self.views_channels.append(handler.views_channel_id)
 
-        self.config_proxy.save()
+        await self.config_proxy.save()
         self.ready = True
 
+        # Restaura os players salvos antes do último reinício
+        self.bot.loop.create_task(self.restore_players())
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """
@@ -368,6 +1011,8 @@ class Music(commands.Cog):
         if message.channel.id not in self.views_channels or message.author.id == self.bot.user.id:
             return
 
+        span = TRACER.start_trace('message', guild=message.guild.id, user=message.author.id)
+
         # Verifica se o conteúdo enviado é um link suportado
         if is_url(message.content):
             ctx = await self.bot.get_context(message)
@@ -375,6 +1020,8 @@ class Music(commands.Cog):
             if await self.parse_url(ctx, message.content):
                 await self.play(ctx, message.content, check_url=False)
 
+        span.end()
+
         # Deleta toda e qualquer mensagem após isso
         await message.delete(delay=5)
 
@@ -395,6 +1042,9 @@ class Music(commands.Cog):
             spotify_client = spotify.SpotifyClient(client_id=client_id, client_secret=client_secret)
             self.spotify_support = True
 
+            # Metadados são buscados em lote usando a mesma sessão e token do cliente passado ao wavelink
+            self.spotify_api = SpotifyMetadataClient(spotify_client)
+
         # Verifica se a conexão é segura ou não (HTTPS/HTTP)
         secure = True if uri.startswith('https://') else False
         uri_parsed = re.sub(r'https?://', '', uri)
@@ -402,37 +1052,238 @@ class Music(commands.Cog):
         # Cria node
         node = wavelink.Node(id='main', uri=uri_parsed, password=password, secure=secure)
         await wavelink.NodePool.connect(client=self.bot, nodes=[node], spotify=spotify_client)
-        
-    def cog_check(self, ctx: commands.Context) -> bool:
-        """
-        Verifica se o comando foi executado corretamente.
 
-        Apenas comandos chamados usando "/" ou por interações com botões de views possuem o objeto "interaction".
-        Em todos outros casos esse atributo retornará None.
-
-        :param ctx: Objeto de contexto
-        :return: True se o comando foi executado usando "/" ou False caso foi executado usando prefixos
-        """
-        return bool(ctx.interaction)
-    
-    async def bot_is_ready(self, ctx: commands.Context) -> bool:
+    def owns_guild(self, guild_id: int) -> bool:
         """
-        Verifica se o bot está conectado
+        Verifica se a guild pertence aos shards deste processo.
 
-        :param ctx: Objeto context
-        :return: True se o bot estiver conectado, do contrário False
+        :param guild_id: Id da guild
+        :return: True caso a guild seja atendida por este processo (sempre True sem clusters)
         """
-        handler = self.guild_pool.get_handler(ctx.guild.id)
+        shard_ids = getattr(self.bot, 'shard_ids', None)
+        shard_count = getattr(self.bot, 'shard_count', None)
 
-        if handler.player:
+        if not shard_ids or not shard_count:
             return True
 
-        # noinspection PyUnresolvedReferences
-        await ctx.interaction.response.send_message(
-            'Não estou conectado a nenhum canal!',
-            ephemeral=True,
-            delete_after=5
-        )
+        return (guild_id >> 22) % shard_count in shard_ids
+
+    def schedule_idle(self, handler: GuildHandler, reason: str):
+        """
+        Agenda a desconexão por inatividade de uma guild.
+
+        :param handler: Handler referente
+        :param reason: Motivo do prazo: "idle", "alone" ou "paused_alone"
+        """
+        self.reaper.schedule((handler.guild.id, reason), self.idle_timeouts[reason])
+
+    def cancel_idle(self, handler: GuildHandler, *reasons: str):
+        """
+        Cancela prazos de inatividade de uma guild.
+
+        :param handler: Handler referente
+        :param reasons: Motivos para cancelar, caso nenhum seja enviado cancela todos
+        """
+        for reason in reasons or self.idle_timeouts:
+            self.reaper.cancel((handler.guild.id, reason))
+
+    async def _reap(self, key: tuple[int, str]):
+        """
+        Disparado pela roda de temporizadores ao vencer um prazo de inatividade.
+
+        :param key: Tupla com id da guild e motivo do prazo
+        """
+        guild_id, reason = key
+        handler = self.guild_pool.get_handler(guild_id)
+
+        if handler:
+            await handler.actor.ask('reap', self.reap, handler, reason)
+
+    async def reap(self, handler: GuildHandler, reason: str):
+        """
+        Desconecta o player inativo, executado pelo ator da guild.
+
+        :param handler: Handler referente
+        :param reason: Motivo do prazo
+        """
+        player = handler.player
+
+        if not player:
+            return
+
+        # Revalida o estado, o prazo pode ter ficado obsoleto entre o agendamento e o disparo
+        if reason == 'idle' and player.current:
+            return
+
+        if reason != 'idle' and handler.listeners > 0:
+            return
+
+        try:
+            await self.reset(handler, leave=True)
+        except Exception as e:
+            print('Error during idle disconnect', e.__class__, e)
+
+    async def snapshot_loop(self):
+        """Salva periodicamente o estado de todos os players."""
+        await self.bot.wait_until_ready()
+
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+
+            for handler in self.guild_pool:
+                try:
+                    await self.snapshot(handler)
+                except Exception as e:
+                    print('Error during snapshot', handler.guild.name, e.__class__, e)
+
+    async def snapshot(self, handler: GuildHandler):
+        """
+        Salva o estado do player da guild, escrevendo apenas as partes que mudaram desde o último snapshot.
+
+        :param handler: Handler referente
+        """
+        player = handler.player
+        guild_id = handler.guild.id
+
+        # Não há nada para restaurar
+        if not player or not player.channel or (not player.current and player.queue.is_empty):
+            self.state_store.discard(guild_id)
+            return
+
+        queue = player.queue
+
+        if self.state_store.is_queue_stale(guild_id, queue.version):
+            tracks = [self.state_store.dump_track(track) for track in queue]
+            await self.state_store.save_queue(guild_id, queue.version, tracks)
+
+        # player.position retorna 0 quando pausado, nesse caso usa a última posição reportada pelo lavalink
+        position = player.last_position if player.is_paused() else player.position
+
+        state = {
+            'channel_id': player.channel.id,
+            'current': self.state_store.dump_track(player.current) if player.current else None,
+            'position': int(position),
+            'loop': queue.loop,
+            'loop_all': queue.loop_all
+        }
+
+        await self.state_store.save_player(guild_id, state)
+
+    async def restore_players(self):
+        """Reconecta e retoma a reprodução de todos os players salvos no último snapshot."""
+        snapshots = await self.state_store.load_all()
+
+        if not snapshots:
+            return
+
+        # Aguarda o node estar pronto para tocar
+        await self.node_ready.wait()
+
+        tasks = []
+
+        for guild_id, (state, tracks) in snapshots.items():
+            handler = self.guild_pool.get_handler(guild_id)
+
+            if handler:
+                tasks.append(handler.actor.ask('restore', self.restore_player, handler, state, tracks))
+            elif self.owns_guild(guild_id):
+                # Snapshots de guilds de outros clusters pertencem aos outros processos
+                self.state_store.discard(guild_id)
+
+        await asyncio.gather(*tasks)
+
+    async def restore_player(self, handler: GuildHandler, state: dict, tracks: list[list]):
+        """
+        Restaura o player de uma guild.
+
+        :param handler: Handler referente
+        :param state: Estado salvo do player
+        :param tracks: Fila salva
+        """
+        channel = handler.guild.get_channel(state['channel_id'])
+
+        # Não faz sentido voltar para um canal que não existe mais ou que está vazio
+        if not channel or not any(not member.bot for member in channel.members) or handler.player:
+            self.state_store.discard(handler.guild.id)
+            return
+
+        try:
+            handler.reset = False
+            await channel.connect(cls=Player())
+            handler.count_listeners(channel)
+
+            queue = handler.player.queue
+
+            # A música atual volta para o início da fila para ser tocada a partir da posição salva
+            if state['current']:
+                await queue.put_wait(self.state_store.load_track(state['current']))
+
+            for data in tracks:
+                await queue.put_wait(self.state_store.load_track(data))
+
+            queue.loop = state['loop']
+            queue.loop_all = state['loop_all']
+
+            await handler.queue_view.refresh()
+            await self.play_song(handler, start=state['position'] if state['current'] else None)
+        except Exception as e:
+            print('Error during restore', handler.guild.name, e.__class__, e)
+            self.state_store.discard(handler.guild.id)
+
+    def cog_check(self, ctx: commands.Context) -> bool:
+        """
+        Verifica se o comando foi executado corretamente.
+
+        Apenas comandos chamados usando "/" ou por interações com botões de views possuem o objeto "interaction".
+        Em todos outros casos esse atributo retornará None.
+
+        :param ctx: Objeto de contexto
+        :return: True se o comando foi executado usando "/" ou False caso foi executado usando prefixos
+        """
+        if not ctx.interaction:
+            return False
+
+        # Cada slash command gera um trace, finalizado em cog_after_invoke()
+        if TRACER.current() is not None:
+            return True
+
+        delay = discord.utils.utcnow() - ctx.interaction.created_at
+        TRACER.start_trace(f'/{ctx.command.qualified_name}', guild=ctx.guild.id if ctx.guild else 0,
+                           user=ctx.author.id, gateway_delay_ms=round(delay.total_seconds() * 1000, 3))
+
+        return True
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        """
+        Disparado após a execução de qualquer comando da cog.
+        Finaliza o span raiz do trace, spans de tarefas em segundo plano continuam até terminarem.
+
+        :param ctx: Objeto de contexto
+        """
+        span = TRACER.current()
+
+        if span and span.parent_id is None:
+            span.end()
+    
+    async def bot_is_ready(self, ctx: commands.Context) -> bool:
+        """
+        Verifica se o bot está conectado
+
+        :param ctx: Objeto context
+        :return: True se o bot estiver conectado, do contrário False
+        """
+        handler = self.guild_pool.get_handler(ctx.guild.id)
+
+        with TRACER.span('bot_is_ready'):
+            if handler.player:
+                return True
+
+            # noinspection PyUnresolvedReferences
+            await ctx.interaction.response.send_message(
+                'Não estou conectado a nenhum canal!',
+                ephemeral=True,
+                delete_after=5
+            )
 
         return False
 
@@ -453,20 +1304,16 @@ class Music(commands.Cog):
         if is_spotify_url(url):
             # Caso for uma URL do Spotify, mas não haja suporte
             if not self.spotify_support:
-                await ctx.reply(
-                    'Suporte para links do Spotify está desabilitado! :sob:',
-                    ephemeral=True,
-                    delete_after=5
-                )
+                await self.respond(ctx, 'Suporte para links do Spotify está desabilitado! :sob:')
                 return False
         # Caso não seja uma URL do YouTube
         elif not is_youtube_url(url):
             supported_urls = '\n'.join(supported_urls)
 
-            await ctx.reply(
+            await self.respond(
+                ctx,
                 'Esse link não é suportado monkey! :see_no_evil:\nEnvie apenas links do YouTube '
                 f'{"e do Spotify " if self.spotify_support else ""}nesse padrão: \n`{supported_urls}`',
-                ephemeral=True,
                 delete_after=20
             )
             return False
@@ -484,8 +1331,7 @@ class Music(commands.Cog):
         user = ctx.author
 
         if not user.voice:
-            await ctx.reply('Entre na call primeiro, corno! :monkey_face::raised_back_of_hand:', ephemeral=True,
-                            delete_after=5)
+            await self.respond(ctx, 'Entre na call primeiro, corno! :monkey_face::raised_back_of_hand:')
 
             return False
 
@@ -502,137 +1348,412 @@ class Music(commands.Cog):
             await handler.check_channel(ctx)
             await channel.connect(cls=Player())
 
+            # Garante que o player seja desconectado caso nada chegue a tocar
+            self.schedule_idle(handler, 'idle')
+
+        handler.count_listeners(channel)
+
         return True
 
+    @staticmethod
+    async def respond(ctx: commands.Context, content: str, delete_after: float = 5):
+        """
+        Responde o usuário de forma efêmera.
+        Caso a interação já tenha sido reconhecida a resposta original é editada, do contrário responde normalmente.
+
+        :param ctx: Objeto de contexto
+        :param content: Conteúdo da resposta
+        :param delete_after: Tempo em segundos até apagar a resposta
+        """
+        interaction = ctx.interaction
+
+        if interaction and interaction.response.is_done():
+            message = await interaction.edit_original_response(content=content)
+            await message.delete(delay=delete_after)
+        else:
+            await ctx.reply(content, ephemeral=True, delete_after=delete_after)
+
+    @staticmethod
+    async def send_followup(interaction: discord.Interaction, content: str, delete_after: float = 5):
+        """
+        Responde de forma efêmera uma interação já reconhecida (ver serialized()).
+
+        :param interaction: Objeto de interação
+        :param content: Conteúdo da resposta
+        :param delete_after: Tempo em segundos até apagar a resposta
+        """
+        message = await interaction.followup.send(content, ephemeral=True, wait=True)
+        await message.delete(delay=delete_after)
+
+    async def search(self, cls: type[wavelink.Playable | spotify.SpotifyTrack], query: str):
+        """
+        Pesquisa músicas, compartilhando a mesma chamada entre pesquisas idênticas feitas ao mesmo tempo.
+        O resultado é compartilhado entre os chamadores, portanto não deve ser alterado.
+
+        :param cls: Classe usada na pesquisa
+        :param query: URL ou palavras chaves de busca
+        :return: Resultado de cls.search()
+        """
+        query = normalize_query(query)
+
+        with SEARCH_LATENCY.time(source=cls.__name__), TRACER.span('search', source=cls.__name__):
+            return await self.searches.do((cls.__name__, query), lambda: cls.search(query))
+
+    def suggest(self, track: wavelink.Playable, guild: GuildHandler | None = None):
+        """
+        Adiciona uma música resolvida aos índices do autocomplete.
+
+        :param track: Música
+        :param guild: Handler da guild onde a música tocou, None para adicioná-la apenas ao índice global
+        """
+        title = getattr(track, 'title', None)
+
+        if not title:
+            return
+
+        uri = getattr(track, 'uri', None)
+        value = uri if uri and len(uri) <= 100 else title[:100]
+
+        self.suggestions.add(title, value)
+
+        if guild is not None and guild.suggestions is not None:
+            guild.suggestions.add(title, value)
+
     async def play(self, ctx: commands.Context, search: str, check_url: bool = True):
+        """
+        Reconhece o comando imediatamente e resolve a pesquisa em segundo plano.
+        O discord exige uma resposta em até 3 segundos, prazo que pesquisas lentas podem ultrapassar.
+
+        :param ctx: Objeto de contexto
+        :param search: URL ou palavras chaves de busca
+        :param check_url: Flag se a URL deve ser validada
+        """
+        received = time.perf_counter()
+
+        if ctx.interaction:
+            with TRACER.span('ack'):
+                await ctx.defer(ephemeral=True)
+
+            self.ack_latency.add(time.perf_counter() - received)
+            PLAY_ACK.observe(time.perf_counter() - received)
+
+        job = self.bot.loop.create_task(self.resolve_play(ctx, search, check_url, received))
+        self.play_jobs.add(job)
+        job.add_done_callback(self.play_jobs.discard)
+
+    async def resolve_play(self, ctx: commands.Context, search: str, check_url: bool, received: float):
+        """
+        Resolve a pesquisa do /play e edita a resposta com o resultado.
+
+        :param ctx: Objeto de contexto
+        :param search: URL ou palavras chaves de busca
+        :param check_url: Flag se a URL deve ser validada
+        :param received: Momento (time.perf_counter) em que o comando foi recebido
+        """
+        try:
+            with TRACER.span('resolve', search=search):
+                await self._resolve_play(ctx, search, check_url)
+        except Exception as e:
+            print('Error during play', search, e.__class__, e)
+            await self.respond(ctx, 'Não consegui adicionar essa música! :sob:')
+        finally:
+            self.resolve_latency.add(time.perf_counter() - received)
+            PLAY_RESOLVE.observe(time.perf_counter() - received)
+
+    async def _resolve_play(self, ctx: commands.Context, search: str, check_url: bool):
         # Verifica se é uma URL válida
         if check_url and is_url(search):
             if not await self.parse_url(ctx, search):
                 return
 
-        # Verifica se o bot se juntou ao canal
-        if not await self.join(ctx):
-            return
-
         handler = self.guild_pool.get_handler(ctx.guild.id)
-        player = handler.player
 
-        requester = ctx.author.name
-        waiting_time = self.get_waiting_time(player)
+        # Verifica se o bot se juntou ao canal
+        with TRACER.span('join'):
+            if not await handler.actor.ask('join', self.join, ctx):
+                return
+
+        requester_id = ctx.author.id
+        waiting_time = self.get_waiting_time(handler.player)
         spotify_decode = spotify.decode_url(search)
 
         if is_playlist(search, spotify_decode):
-            # Verifica se já existe uma pesquisa sendo feita
-            if handler.playlist_loop and not handler.playlist_loop.done():
-                await ctx.reply(
-                    'Ainda estou processando a última playlist enviada! Tente novamente em alguns segundos!',
-                    ephemeral=True,
-                    delete_after=5
-                )
-                return
+            # Enfileira a pesquisa no escalonador, playlists da mesma guild são processadas em ordem
+            # O job é executado pelos workers do escalonador, fora do contexto do trace, portanto o span é repassado
+            first_track = TRACER.span('playlist_first_track')
 
-            # Faz a pesquisa em segundo plano
-            handler.playlist_loop = self.bot.loop.create_task(
-                self.playlist_lookup(search, requester, handler, spotify_decode=spotify_decode)
-            )
+            lookup = self.playlist_lookup(search, requester_id, handler, handler.generation,
+                                          spotify_decode=spotify_decode, span=first_track)
+            ahead = self.ingestion.submit(handler.guild.id, lookup)
 
-            await ctx.reply(
-                'Estou adicionando a playlist na fila! Pode demorar algum tempo para todas as músicas '
-                f'serem adicionadas! \nTempo para execução: `{waiting_time}`',
-                ephemeral=True,
-                delete_after=5
-            )
+            if ahead:
+                message = f'Playlist na espera! Ainda há {ahead} playlist(s) sendo adicionada(s) antes dela.'
+            else:
+                message = 'Estou adicionando a playlist na fila! Pode demorar algum tempo para todas as músicas ' \
+                          f'serem adicionadas! \nTempo para execução: `{waiting_time}`'
+
+            await self.respond(ctx, message)
         else:
             if spotify_decode:
-                track = await spotify.SpotifyTrack.search(search)
+                with SEARCH_LATENCY.time(source='SpotifyTrack'), TRACER.span('search', source='SpotifyTrack'):
+                    spotify_track = await self.spotify_api.track(spotify_decode['id'])
+
+                track = [spotify_track] if spotify_track else []
             else:
-                track = await wavelink.YouTubeTrack.search(search)
+                track = await self.search(wavelink.YouTubeTrack, search)
 
-            track = track[0]
+                # Os primeiros resultados do /play alimentam o autocomplete
+                for result in track[:5]:
+                    self.suggest(result)
 
-            # Cria um atributo para referenciar o solicitante do comando, usado para logar no arquivo de log mais tarde
-            setattr(track, 'requester', requester)
+            if not track:
+                await self.respond(ctx, 'Não encontrei nenhuma música! :see_no_evil:')
+                return
 
-            # Adiciona música na fila e atualiza o queue_view
-            await player.queue.put_wait(track)
+            # Apenas os dados necessários são mantidos na fila, a música é reconstruída ao ser tocada
+            entry = QueueEntry.from_track(track[0], requester_id)
+
+            # A pesquisa roda fora do ator, apenas a alteração da fila e do player é serializada
+            await handler.actor.ask('enqueue', self.enqueue, ctx, handler, entry, waiting_time)
+
+    async def enqueue(self, ctx: commands.Context, handler: GuildHandler, entry: QueueEntry, waiting_time: str):
+        """
+        Adiciona a música do /play na fila e inicia a reprodução caso o bot esteja ocioso, executado pelo ator da guild.
+
+        :param ctx: Objeto de contexto
+        :param handler: Handler referente
+        :param entry: Item da fila
+        :param waiting_time: Tempo até a música tocar, calculado antes da pesquisa
+        """
+        player = handler.player
+
+        # O bot saiu do canal durante a pesquisa
+        if not player:
+            await self.respond(ctx, 'Não estou mais no canal! :see_no_evil:')
+            return
+
+        # Adiciona música na fila e atualiza o queue_view
+        with TRACER.span('enqueue'):
+            added = await player.queue.put_wait(entry, skip_duplicates=handler.skip_duplicates)
+
+        if not added:
+            await self.respond(ctx, f'{entry.title} já está na fila! :eyes:')
+            return
+
+        with TRACER.span('view_refresh', view='queue'):
             await handler.queue_view.refresh()
 
-            await ctx.reply(
-                f'{track.title} adicionado a fila! \nTempo para execução: `{waiting_time}`',
-                ephemeral=True,
-                delete_after=5
-            )
+        await self.respond(ctx, f'{entry.title} adicionado a fila! \nTempo para execução: `{waiting_time}`')
 
         # Caso o bot não esteja tocando inicia a música imediatamente
+        # Playlists iniciam a reprodução em playlist_lookup() assim que a primeira música é adicionada
         if not player.is_playing() and not player.is_paused():
             await self.play_song(handler)
 
     # noinspection PyTypeChecker
-    async def play_song(self, handler: GuildHandler):
+    async def play_song(self, handler: GuildHandler, start: int | None = None):
         """
         Reproduz música e carrega views.
+        Apenas o necessário para a música começar a tocar é feito aqui, as views, o log e as sugestões são atualizados
+        em seguida por after_play(), uma mensagem do ator que não atrasa o início da música.
 
         :param handler: Handler referente
+        :param start: Posição inicial da música em milissegundos
         """
+        # O bot foi parado (/stop), apenas um novo /play volta a tocar
+        if handler.reset:
+            return
+
+        started = time.perf_counter()
         player = handler.player
+        restarted = False
 
-        if player.queue.is_empty:
-            await handler.display_view.reset()
+        # Itens que não podem ser resolvidos são pulados em sequência, sem recursão (a fila pode ter milhares deles)
+        while True:
+            # Caso não haja músicas agenda a desconexão por inatividade em vez de aguardar a fila
+            if player.queue.is_empty:
+                handler.track_ended_at = None
+
+                await handler.display_view.reset()
+                self.schedule_idle(handler, 'idle')
+                return
+
+            self.cancel_idle(handler, 'idle')
+            item = await player.queue.get_wait()
+
+            try:
+                # Com o loop ativado a fila devolve a própria música que acabou de tocar, do contrário reconstrói a
+                # música a partir do item compacto da fila. Referências de playlists são resolvidas apenas aqui.
+                if isinstance(item, wavelink.Playable):
+                    track = item
+                else:
+                    with TRACER.span('rehydrate', source=item.source):
+                        track = await item.rehydrate(self.searches)
+
+                with TRACER.span('play'):
+                    await player.play(track, replace=True, start=start)
+            except (wavelink.NoTracksError, ValueError) as e:
+                # A música não existe mais ou o lavalink não conseguiu carregá-la (LOAD_FAILED): pula para a próxima
+                print(f'Error resolving {item!r}:', e.__class__, e)
+                start = None
+                continue
+            except wavelink.InvalidLavalinkResponse as e:
+                # O problema é do lavalink e não da música: o item volta para o início da fila, que nunca é descartada
+                print(f'Error playing {item!r}:', e.__class__, e)
+                player.queue.unget(item)
+
+                # Às vezes a conexão com o lavalink dá algum problema e precisa ser reiniciada "on the fly"
+                if restarted:
+                    return
+
+                restarted = True
+                player = await self.restart_node(handler)
+
+                if player is None:
+                    return
+
+                continue
+
+            break
+
+        PLAY_TRANSITION.observe(time.perf_counter() - started)
+        self.await_first_audio(handler)
+
+        # Resolve o próximo item enquanto a música atual toca
+        self.prefetch_next(player)
+
+        handler.actor.tell('after_play', self.after_play, handler, track, TRACER.current() or NOOP_SPAN)
+
+    async def restart_node(self, handler: GuildHandler) -> Player | None:
+        """
+        Reinicia a conexão com o lavalink e reconecta o player da guild, mantendo a fila.
+
+        :param handler: Handler referente
+        :return: Novo player ou None caso não tenha sido possível reconectar
+        """
+        print('Error during connection to lavalink server, restarting node...')
+
+        player = handler.player
 
         try:
-            track = await asyncio.wait_for(player.queue.get_wait(), timeout=180)
-        except asyncio.TimeoutError:
-            await self.reset(handler, leave=True)
-            return
+            # Retorna dicionário de nodes
+            nodes = wavelink.NodePool.nodes
+
+            # Para websocket do node principal
+            await nodes['main']._websocket.cleanup()
+
+            # Deleta node da NodePool
+            del nodes['main']
+
+            # Reconecta nodes
+            await self.connect_nodes()
+
+            # Reconecta canal, o novo player continua com a fila do anterior
+            channel = player.channel
+            queue = player.queue
+
+            await player.disconnect()
+            await asyncio.sleep(1)
+            player = await channel.connect(cls=Player())
+            player.queue = queue
+        except Exception as e:
+            print('Error during reconnecting', e.__class__, e)
+            return None
+
+        return player
+
+    async def after_play(self, handler: GuildHandler, track: wavelink.Playable, span: Span):
+        """
+        Atualiza as views e registra a música que começou a tocar, executado pelo ator da guild após play_song().
 
+        :param handler: Handler referente
+        :param track: Música que começou a tocar
+        :param span: Span ativo em play_song(), as atualizações continuam no mesmo trace
+        """
         # print(handler.guild.name, ' - ', track.title, ' - ', 'session_id:', player.current_node.session_id)
         print(handler.guild.name, ' - ', track.title)
 
-        # Converte música para YouTubeTrack
-        # Isso já é feito automaticamente em player.play(), porém acaba demorando alguns segundos para retornar
-        # E as views ficam aguardando o retorno para serem atualizadas.
-        if isinstance(track, spotify.SpotifyTrack):
-            track = await track.fulfill(player=player, cls=wavelink.YouTubeTrack, populate=False)
+        player = handler.player
 
-        # Às vezes a conexão com o lavalink dá algum problema e precisa ser reiniciada "on the fly".
-        try:
-            await player.play(track, replace=True)
-        except wavelink.InvalidLavalinkResponse:
-            print('Error during connection to lavalink server, restarting node...')
+        # Músicas puladas ou paradas antes desta mensagem não chegam a ser exibidas
+        if player and player.current is track:
+            with TRACER.use(span):
+                with TRACER.span('view_refresh', view='display'):
+                    await handler.display_view.refresh(track)
 
-            try:
-                # Retorna dicionário de nodes
-                nodes = wavelink.NodePool.nodes
+                with TRACER.span('view_refresh', view='queue'):
+                    await handler.queue_view.refresh()
 
-                # Para websocket do node principal
-                await nodes['main'].websocket.cleanup()
+        # Loga informações no arquivo de log
+        requester_id = getattr(track, 'requester_id', None)
+        requester = handler.guild.get_member(requester_id) if requester_id else None
+        handler.logger.info(f'{track.title} requested by {requester.name if requester else requester_id}')
 
-                # Deleta node da NodePool
-                del nodes['main']
+        self.suggest(track, handler)
 
-                # Reconecta nodes
-                await self.connect_nodes()
+    def await_first_audio(self, handler: GuildHandler):
+        """
+        Abre o span "first_audio" do trace atual, finalizado quando o lavalink avisar que a música começou a tocar.
 
-                # Reconecta canal e tenta reproduzir track
-                channel = player.channel
+        :param handler: Handler referente
+        """
+        span = TRACER.span('first_audio')
 
-                await player.disconnect()
-                await asyncio.sleep(1)
-                player = await channel.connect(cls=Player())
+        if span is NOOP_SPAN:
+            return
 
-                await player.play(track)
-            except Exception as e:
-                print('Error during reconnecting', e.__class__, e)
+        previous = self.first_audio.pop(handler.guild.id, None)
 
-        # Atualiza views
-        await handler.display_view.refresh(track)
-        await handler.queue_view.refresh()
+        if previous:
+            previous.end('cancelled')
 
-        # Loga informações no arquivo de log
-        requester = track.requester if hasattr(track, 'requester') else None
-        handler.logger.info(f'{track.title} requested by {requester}')
+        self.first_audio[handler.guild.id] = span
 
-    # noinspection PyUnresolvedReferences
+    @commands.Cog.listener()
+    async def on_wavelink_track_start(self, payload: wavelink.TrackEventPayload):
+        """Disparado quando o lavalink começa a tocar uma música."""
+        handler = self.guild_pool.get_handler(payload.player.guild.id)
+
+        if handler and handler.track_ended_at is not None:
+            gap = time.perf_counter() - handler.track_ended_at
+            handler.track_ended_at = None
+
+            handler.gaps.add(gap)
+            self.gap_latency.add(gap)
+            TRACK_GAP.observe(gap)
+
+        span = self.first_audio.pop(payload.player.guild.id, None)
+
+        if span:
+            span.set(title=payload.track.title)
+            span.end()
+
+    def prefetch_next(self, player: Player):
+        """
+        Resolve em segundo plano o próximo item da fila, caso seja uma referência.
+
+        :param player: Player da guild
+        """
+        if player.queue.is_empty:
+            return
+
+        entry = player.queue[0]
+
+        if not isinstance(entry, QueueEntry) or entry.encoded is not None or entry.resolved is not None:
+            return
+
+        async def prefetch():
+            try:
+                await entry.prefetch(self.searches)
+            except (wavelink.NoTracksError, wavelink.InvalidLavalinkResponse, ValueError) as e:
+                # Será tentado novamente ao tocar
+                print(f'Error prefetching {entry!r}:', e.__class__, e)
+
+        task = self.bot.loop.create_task(prefetch())
+        self.prefetch_tasks.add(task)
+        task.add_done_callback(self.prefetch_tasks.discard)
+
+    @serialized('pause')
     async def pause(self, interaction: discord.Interaction):
         """
         Pausa a música.
@@ -644,15 +1765,11 @@ class Music(commands.Cog):
         display = handler.display_view
 
         if not player.is_playing() and not player.is_paused():
-            await interaction.response.send_message(
-                'Coloque algo para tocar primeiro! :see_no_evil: ',
-                ephemeral=True,
-                delete_after=5
-            )
+            await self.send_followup(interaction, 'Coloque algo para tocar primeiro! :see_no_evil: ')
             return
 
         if player.is_paused():
-            await interaction.response.send_message('Já estou pausado!', ephemeral=True, delete_after=5)
+            await self.send_followup(interaction, 'Já estou pausado!')
             return
 
         # Atualiza view
@@ -666,10 +1783,11 @@ class Music(commands.Cog):
 
         await player.pause()
         await display.message.edit(content=None, embed=embed, view=display, attachments=[])
+        VIEW_EDITS.inc(view='display')
 
-        await interaction.response.send_message('Pediu pra parar parou!', ephemeral=True, delete_after=5)
+        await self.send_followup(interaction, 'Pediu pra parar parou!')
 
-    # noinspection PyUnresolvedReferences
+    @serialized('resume')
     async def resume(self, interaction: discord.Interaction):
         """
         Retoma música.
@@ -681,15 +1799,11 @@ class Music(commands.Cog):
         display = handler.display_view
 
         if not player.is_playing() and not player.is_paused():
-            await interaction.response.send_message(
-                'Coloque algo para tocar primeiro! :see_no_evil: ',
-                ephemeral=True,
-                delete_after=5
-            )
+            await self.send_followup(interaction, 'Coloque algo para tocar primeiro! :see_no_evil: ')
             return
 
         if not player.is_paused():
-            await interaction.response.send_message('Não estou pausado!', ephemeral=True, delete_after=5)
+            await self.send_followup(interaction, 'Não estou pausado!')
             return
 
         # Atualiza view
@@ -703,9 +1817,11 @@ class Music(commands.Cog):
 
         await player.resume()
         await display.message.edit(content=None, embed=embed, view=display, attachments=[])
+        VIEW_EDITS.inc(view='display')
 
-        await interaction.response.send_message('Pediu pra voltar voltou!', ephemeral=True, delete_after=5)
+        await self.send_followup(interaction, 'Pediu pra voltar voltou!')
 
+    @serialized('skip')
     async def skip(self, interaction: discord.Interaction):
         """
         Pula música atual.
@@ -717,9 +1833,9 @@ class Music(commands.Cog):
 
         # Exception levantada dentro de stop e não é tratada
         await player.stop()
-        # noinspection PyUnresolvedReferences
-        await interaction.response.send_message('Música skipada!', ephemeral=True, delete_after=5)
+        await self.send_followup(interaction, 'Música skipada!')
 
+    @serialized('stop')
     async def stop(self, interaction: discord.Interaction, leave: bool):
         """
         Interrompe reprodução.
@@ -730,11 +1846,11 @@ class Music(commands.Cog):
         handler = self.guild_pool.get_handler(interaction.guild_id)
 
         message = 'Saindo!' if leave else 'Parado!'
-        # noinspection PyUnresolvedReferences
-        await interaction.response.send_message(message, ephemeral=True, delete_after=5)
+        await self.send_followup(interaction, message)
 
         await self.reset(handler, leave=leave)
 
+    @serialized('loop')
     async def loop(self, interaction: discord.Interaction):
         """
         Ativa loop para música atual.
@@ -758,10 +1874,11 @@ class Music(commands.Cog):
             embed.set_footer(text=f'{status} | Loop ativado')
             message = 'Música atual em loop!'
 
-        # noinspection PyUnresolvedReferences
-        await interaction.response.send_message(message, ephemeral=True, delete_after=5)
+        await self.send_followup(interaction, message)
         await handler.display_view.message.edit(embed=embed)
+        VIEW_EDITS.inc(view='display')
 
+    @serialized('shuffle')
     async def shuffle(self, interaction: discord.Interaction):
         """
         Embaralha a fila de músicas.
@@ -772,8 +1889,7 @@ class Music(commands.Cog):
         player = handler.player
 
         if player.queue.is_empty:
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message('Não há músicas na fila!', ephemeral=True, delete_after=5)
+            await self.send_followup(interaction, 'Não há músicas na fila!')
             return
 
         # Faz cópia da fila e a embaralha
@@ -786,32 +1902,50 @@ class Music(commands.Cog):
         for track in temp_queue:
             await player.queue.put_wait(track)
 
-        await handler.queue_view.refresh()
-        # noinspection PyUnresolvedReferences
-        await interaction.response.send_message('Fila embaralhada!', ephemeral=True, delete_after=5)
+        # O primeiro item mudou, portanto o novo é resolvido antecipadamente
+        await self.queue_changed(handler)
+        await self.send_followup(interaction, 'Fila embaralhada!')
 
     @staticmethod
-    async def playlist_lookup(search: str, requester: str, handler: GuildHandler, spotify_decode: dict | None = None):
+    async def playlist_lookup(search: str, requester_id: int, handler: GuildHandler, generation: int,
+                              spotify_decode: dict | None = None, span: Span = NOOP_SPAN) -> AsyncIterator[None]:
         """
         Faz a pesquisa de playlists.
+        Gerador executado pelo FairScheduler, cada música adicionada na fila produz um item. Cancelar o job não
+        interrompe o passo em execução, por isso cada música confere se a guild foi resetada desde o /play.
 
         :param search: URL da playlist
-        :param requester: Solicitante do comando
+        :param requester_id: Id do solicitante do comando
         :param handler: Handler referente
+        :param generation: Valor de handler.generation no momento do /play
         :param spotify_decode: Tipo de mídia do Spotify, caso houver
+        :param span: Span do trace do comando, finalizado ao adicionar a primeira música
         """
 
         async def add_track(track: wavelink.YouTubeTrack | spotify.SpotifyTrack):
             """
-            Adiciona música na fila.
+            Adiciona uma referência da música na fila, resolvida apenas quando for tocar.
+            Executado pelo ator da guild, intercalado com os comandos e eventos da mesma guild.
 
             :param track: Objeto de música
             """
-            nonlocal count
+            nonlocal count, skipped
+
+            player = handler.player
+
+            # O bot saiu do canal ou foi parado (/stop) durante a pesquisa
+            if not player or handler.generation != generation:
+                return
+
+            if not await player.queue.put_wait(QueueEntry.reference(track, requester_id), skip_duplicates):
+                skipped += 1
+                return
 
-            # Cria um atributo para referenciar o solicitante do comando, usado para logar no arquivo de log mais tarde
-            setattr(track, 'requester', requester)
-            await handler.player.queue.put_wait(track)
+            PLAYLIST_TRACKS.inc()
+
+            # Caso o bot esteja ocioso inicia a reprodução assim que a primeira música chegar
+            if count == 0 and not player.is_playing() and not player.is_paused():
+                await handler.music_cog.play_song(handler)
 
             # Atualiza view a cada 15 músicas
             if count and count % 15 == 0:
@@ -820,23 +1954,48 @@ class Music(commands.Cog):
             count += 1
 
         count = 0
+        skipped = 0
+        skip_duplicates = handler.skip_duplicates
 
-        if spotify_decode:
-            tracks = await spotify.SpotifyTrack.search(query=search)
+        try:
+            if spotify_decode:
+                # Cada página da playlist só é buscada quando as músicas anteriores já foram adicionadas
+                async for track in handler.music_cog.spotify_api.iterate(spotify_decode):
+                    with TRACER.use(span):
+                        await handler.actor.ask('playlist_track', add_track, track)
 
-            for track in tracks:
-                await add_track(track)
-        else:
-            tracks: wavelink.YouTubePlaylist = await wavelink.YouTubePlaylist.search(search)
+                    span.end()
+
+                    if handler.generation != generation:
+                        return
+
+                    yield
+            else:
+                with TRACER.use(span):
+                    tracks: wavelink.YouTubePlaylist = await handler.music_cog.search(wavelink.YouTubePlaylist, search)
 
-            for track in tracks.tracks:
-                await add_track(track)
+                for track in tracks.tracks:
+                    with TRACER.use(span):
+                        await handler.actor.ask('playlist_track', add_track, track)
+
+                    span.end()
+
+                    if handler.generation != generation:
+                        return
+
+                    yield
+        finally:
+            # Playlist vazia, com erro ou cancelada
+            span.end()
+
+        if skipped:
+            print(handler.guild.name, ' - ', f'{skipped} duplicate track(s) skipped')
 
         # Atualiza view
-        await handler.queue_view.refresh()
+        if handler.player:
+            await handler.queue_view.refresh()
 
-    @staticmethod
-    async def reset(handler: GuildHandler, leave: bool):
+    async def reset(self, handler: GuildHandler, leave: bool):
         """
         Reseta o bot e variáveis.
 
@@ -846,8 +2005,9 @@ class Music(commands.Cog):
         """
         player = handler.player
 
-        if handler.playlist_loop and not handler.playlist_loop.done():
-            handler.playlist_loop.cancel()
+        # Cancela playlists que ainda estão sendo adicionadas, inclusive o passo que estiver em execução
+        handler.generation += 1
+        self.ingestion.cancel(handler.guild.id)
 
         player.queue.clear()
 
@@ -865,8 +2025,13 @@ class Music(commands.Cog):
         except wavelink.InvalidLavalinkResponse:
             pass
 
+        # Ao sair não há mais o que vigiar, do contrário o player fica ocioso aguardando novas músicas
         if leave:
             await player.disconnect()
+            self.cancel_idle(handler)
+            self.state_store.discard(handler.guild.id)
+        else:
+            self.schedule_idle(handler, 'idle')
 
         await handler.display_view.reset()
         await handler.queue_view.reset()
@@ -887,6 +2052,115 @@ class Music(commands.Cog):
         """Delega método."""
         await self.play(ctx, search)
 
+    @_play.autocomplete('search')
+    async def _play_autocomplete(self, interaction: discord.Interaction,
+                                 current: str) -> list[app_commands.Choice[str]]:
+        """
+        Sugere músicas enquanto o usuário digita, primeiro as tocadas na guild e depois as resolvidas em qualquer
+        guild. Apenas com poucas sugestões locais pesquisa no lavalink.
+        """
+        started = time.perf_counter()
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+
+        suggestions = []
+
+        if handler:
+            suggestions += [(item.title, item.value) for item in (await handler.load_suggestions()).search(current)]
+
+        suggestions += [(item.title, item.value) for item in self.suggestions.search(current)]
+        choices = self._choices(suggestions)
+        source = 'local'
+
+        query = ' '.join(current.split())
+
+        if len(choices) < 5 and len(query) >= 3 and not is_url(query) and self.node_ready.is_set():
+            suggestions += await self.search_suggestions(interaction.user.id, query)
+            choices = self._choices(suggestions)
+            source = 'live'
+
+        AUTOCOMPLETE.observe(time.perf_counter() - started, source=source)
+
+        return choices
+
+    @staticmethod
+    def _choices(suggestions: list[tuple[str, str]]) -> list[app_commands.Choice[str]]:
+        """
+        Converte sugestões (título, valor) em opções do autocomplete, sem títulos repetidos e no limite do discord.
+
+        :param suggestions: Sugestões em ordem de prioridade
+        :return: Até 25 opções
+        """
+        choices = {}
+
+        for title, value in suggestions:
+            key = fold_text(title)
+
+            if key not in choices:
+                choices[key] = app_commands.Choice(name=title[:100], value=value[:100])
+
+                if len(choices) == 25:
+                    break
+
+        return list(choices.values())
+
+    async def search_suggestions(self, user_id: int, query: str) -> list[tuple[str, str]]:
+        """
+        Pesquisa sugestões no lavalink. Cada tecla digitada gera uma requisição de autocomplete, apenas a última de
+        cada usuário após AUTOCOMPLETE_DEBOUNCE segundos pesquisa. Pesquisas lentas continuam em segundo plano e
+        preenchem o cache para as próximas teclas, mas a resposta não espera mais que AUTOCOMPLETE_TIMEOUT segundos.
+
+        :param user_id: Id do usuário digitando
+        :param query: Texto digitado
+        :return: Sugestões (título, valor), vazia caso a pesquisa não termine a tempo
+        """
+        key = normalize_query(query)
+        cached = self.live_suggestions.get(key)
+
+        if cached and cached[0] > time.monotonic():
+            self.live_suggestions.move_to_end(key)
+            return cached[1]
+
+        token = self.autocomplete_tokens[user_id] = object()
+        await asyncio.sleep(AUTOCOMPLETE_DEBOUNCE)
+
+        # O usuário continuou digitando
+        if self.autocomplete_tokens.get(user_id) is not token:
+            return []
+
+        del self.autocomplete_tokens[user_id]
+
+        # Pesquisa direto no lavalink: sugestões parciais não alimentam o índice nem as métricas de pesquisa do /play
+        task = self.bot.loop.create_task(wavelink.YouTubeTrack.search(key))
+        task.add_done_callback(functools.partial(self._cache_suggestions, key))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(task), AUTOCOMPLETE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return []
+        except Exception as e:
+            print('Error during autocomplete', query, e.__class__, e)
+            return []
+
+        return self.live_suggestions.get(key, (0, []))[1]
+
+    def _cache_suggestions(self, key: str, task: asyncio.Task):
+        """Guarda o resultado de uma pesquisa do autocomplete, removendo as mais antigas além do limite."""
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        tracks = task.result() or []
+        suggestions = []
+
+        for track in tracks[:25]:
+            uri = track.uri if track.uri and len(track.uri) <= 100 else None
+            suggestions.append((track.title, uri or track.title[:100]))
+
+        self.live_suggestions[key] = (time.monotonic() + LIVE_SUGGESTIONS_TTL, suggestions)
+        self.live_suggestions.move_to_end(key)
+
+        while len(self.live_suggestions) > LIVE_SUGGESTIONS_SIZE:
+            self.live_suggestions.popitem(last=False)
+
     @commands.hybrid_command(name='pause', description='Pausa o bot')
     @commands.before_invoke(bot_is_ready)
     async def _pause(self, ctx: commands.Context):
@@ -919,41 +2193,324 @@ class Music(commands.Cog):
         """Mesmo método da DisplayView."""
         await self.shuffle(ctx.interaction)
 
-    # Coloca uma música em uma posição específica na fila
-    @commands.hybrid_command(name='put-at', description='Coloca uma música na ordem desejada')
+    # Coloca uma música em uma posição específica na fila
+    @commands.hybrid_command(name='put-at', description='Coloca uma música na ordem desejada')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(index='índice', new_index='novo_índice')
+    @app_commands.describe(index='Índice atual', new_index='Novo índice')
+    async def _put_at(self, ctx: commands.Context, index: int, new_index: int):
+        """
+        Altera o índice de um item na fila.
+
+        :param ctx: Objeto de contexto
+        :param index: Índice do item
+        :param new_index: Novo índice do item
+        """
+        await self.put_at(ctx.interaction, index, new_index)
+
+    @serialized('put_at')
+    async def put_at(self, interaction: discord.Interaction, index: int, new_index: int):
+        """
+        Altera o índice de um item na fila.
+
+        :param interaction: Objeto de interação
+        :param index: Índice do item (começando em 1)
+        :param new_index: Novo índice do item (começando em 1)
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        player = handler.player
+
+        index -= 1
+        new_index -= 1
+
+        try:
+            track = player.queue[index]
+
+            if new_index < 0 or new_index > player.queue.count:
+                message = 'Novo índice não existe!'
+            else:
+                del player.queue[index]
+                player.queue.put_at_index(new_index, track)
+                message = f'{track.title} mudado para a posição {new_index + 1} na fila!'
+        except IndexError:
+            message = 'Índice atual não existe!'
+
+        await self.send_followup(interaction, message)
+
+    @commands.hybrid_command(name='remove', description='Remove uma música ou um intervalo de músicas da fila')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(start='início', end='fim')
+    @app_commands.describe(start='Índice da primeira música', end='Índice da última música (padrão: apenas a primeira)')
+    async def _remove(self, ctx: commands.Context, start: int, end: int | None = None):
+        """
+        Remove músicas da fila.
+
+        :param ctx: Objeto de contexto
+        :param start: Índice da primeira música
+        :param end: Índice da última música
+        """
+        await self.remove_range(ctx.interaction, start, end or start)
+
+    @commands.hybrid_command(name='remove-from', description='Remove da fila as músicas adicionadas por um usuário')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(member='usuário')
+    @app_commands.describe(member='Usuário que adicionou as músicas')
+    async def _remove_from(self, ctx: commands.Context, member: discord.Member):
+        """
+        Remove as músicas de um usuário.
+
+        :param ctx: Objeto de contexto
+        :param member: Solicitante das músicas
+        """
+        await self.remove_requester(ctx.interaction, member)
+
+    @commands.hybrid_command(name='move', description='Move um intervalo de músicas para outra posição da fila')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(start='início', end='fim', new_index='novo_índice')
+    @app_commands.describe(start='Índice da primeira música', end='Índice da última música',
+                           new_index='Nova posição da primeira música')
+    async def _move(self, ctx: commands.Context, start: int, end: int, new_index: int):
+        """
+        Move um bloco de músicas.
+
+        :param ctx: Objeto de contexto
+        :param start: Índice da primeira música
+        :param end: Índice da última música
+        :param new_index: Nova posição da primeira música
+        """
+        await self.move_range(ctx.interaction, start, end, new_index)
+
+    @commands.hybrid_command(name='truncate', description='Mantém apenas as primeiras músicas da fila')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(size='tamanho')
+    @app_commands.describe(size='Quantidade de músicas mantidas')
+    async def _truncate(self, ctx: commands.Context, size: int):
+        """
+        Remove as músicas após as primeiras "size".
+
+        :param ctx: Objeto de contexto
+        :param size: Quantidade de músicas mantidas
+        """
+        await self.truncate(ctx.interaction, size)
+
+    @serialized('remove_range')
+    async def remove_range(self, interaction: discord.Interaction, start: int, end: int):
+        """
+        Remove um intervalo de músicas da fila.
+
+        :param interaction: Objeto de interação
+        :param start: Índice da primeira música (começando em 1)
+        :param end: Índice da última música (começando em 1)
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        queue = handler.player.queue
+
+        if start < 1 or end < start or end > queue.count:
+            message = 'Intervalo inválido!'
+        else:
+            removed = queue.remove_range(start - 1, end)
+            message = f'{removed[0].title} removido da fila!' if len(removed) == 1 else \
+                f'{len(removed)} músicas removidas da fila!'
+
+            await self.queue_changed(handler)
+
+        await self.send_followup(interaction, message)
+
+    @serialized('remove_requester')
+    async def remove_requester(self, interaction: discord.Interaction, member: discord.Member):
+        """
+        Remove da fila as músicas adicionadas por um usuário.
+
+        :param interaction: Objeto de interação
+        :param member: Solicitante das músicas
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        removed = handler.player.queue.remove_requester(member.id)
+
+        if removed:
+            message = f'{len(removed)} música(s) de {member.display_name} removida(s) da fila!'
+            await self.queue_changed(handler)
+        else:
+            message = f'Não há músicas de {member.display_name} na fila!'
+
+        await self.send_followup(interaction, message)
+
+    @serialized('move_range')
+    async def move_range(self, interaction: discord.Interaction, start: int, end: int, new_index: int):
+        """
+        Move um intervalo de músicas para outra posição da fila.
+
+        :param interaction: Objeto de interação
+        :param start: Índice da primeira música (começando em 1)
+        :param end: Índice da última música (começando em 1)
+        :param new_index: Nova posição da primeira música (começando em 1)
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        queue = handler.player.queue
+
+        # A nova posição é relativa à fila sem o bloco
+        if start < 1 or end < start or end > queue.count:
+            message = 'Intervalo inválido!'
+        elif new_index < 1 or new_index > queue.count - (end - start):
+            message = 'Novo índice não existe!'
+        else:
+            queue.move_range(start - 1, end, new_index - 1)
+            message = f'{end - start + 1} música(s) movida(s) para a posição {new_index}!'
+
+            await self.queue_changed(handler)
+
+        await self.send_followup(interaction, message)
+
+    @serialized('truncate')
+    async def truncate(self, interaction: discord.Interaction, size: int):
+        """
+        Mantém apenas as primeiras músicas da fila.
+
+        :param interaction: Objeto de interação
+        :param size: Quantidade de músicas mantidas
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+
+        if size < 0:
+            message = 'Tamanho inválido!'
+        else:
+            removed = handler.player.queue.truncate(size)
+            message = f'{len(removed)} música(s) removida(s) da fila!'
+
+            if removed:
+                await self.queue_changed(handler)
+
+        await self.send_followup(interaction, message)
+
+    async def queue_changed(self, handler: GuildHandler):
+        """
+        Atualiza o que depende da fila após uma edição: o próximo item pode ter mudado e a QueueView é atualizada uma
+        única vez.
+
+        :param handler: Handler referente
+        """
+        self.prefetch_next(handler.player)
+        await handler.queue_view.refresh()
+
+    @commands.hybrid_command(name='dedupe', description='Remove músicas repetidas da fila')
+    @commands.before_invoke(bot_is_ready)
+    @app_commands.rename(automatic='automático')
+    @app_commands.describe(automatic='Ignorar músicas que já estão na fila ao adicionar músicas e playlists')
+    async def _dedupe(self, ctx: commands.Context, automatic: bool | None = None):
+        """
+        Remove músicas repetidas da fila.
+
+        :param ctx: Objeto de contexto
+        :param automatic: Ativa ou desativa o modo que ignora músicas repetidas, None mantém o modo atual
+        """
+        await self.dedupe(ctx.interaction, automatic)
+
+    @serialized('dedupe')
+    async def dedupe(self, interaction: discord.Interaction, automatic: bool | None):
+        """
+        Remove músicas repetidas da fila, mantendo a primeira ocorrência de cada uma.
+
+        :param interaction: Objeto de interação
+        :param automatic: Ativa ou desativa o modo que ignora músicas repetidas, None mantém o modo atual
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        removed = handler.player.queue.dedupe()
+
+        if removed:
+            await self.queue_changed(handler)
+            message = f'{removed} música(s) repetida(s) removida(s) da fila!'
+        else:
+            message = 'Não há músicas repetidas na fila!'
+
+        if automatic is not None:
+            await handler.set_skip_duplicates(automatic)
+
+            if automatic:
+                message += '\nMúsicas que já estão na fila serão ignoradas.'
+            else:
+                message += '\nMúsicas repetidas voltarão a ser adicionadas.'
+
+        await self.send_followup(interaction, message)
+
+    @commands.hybrid_command(name='seek', description='Pesquisa músicas na fila')
     @commands.before_invoke(bot_is_ready)
-    @app_commands.rename(index='índice', new_index='novo_índice')
-    @app_commands.describe(index='Índice atual', new_index='Novo índice')
-    async def _put_at(self, ctx: commands.Context, index: int, new_index: int):
+    @app_commands.rename(query='pesquisa')
+    @app_commands.describe(query='Palavras do título ou do artista')
+    async def _seek(self, ctx: commands.Context, query: str):
         """
-        Altera o índice de um item na fila.
+        Envia uma SeekView com as músicas da fila encontradas.
 
         :param ctx: Objeto de contexto
-        :param index: Índice do item
-        :param new_index: Novo índice do item
+        :param query: Texto pesquisado
         """
         interaction = ctx.interaction
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+
+        if handler.player.queue.is_empty:
+            # noinspection PyUnresolvedReferences
+            await interaction.response.send_message('Não há músicas na fila!', ephemeral=True, delete_after=5)
+            return
+
+        view = SeekView(None, handler, query)
 
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message('Pesquisando...', ephemeral=True)
+
+        view.message = await interaction.original_response()
+        await view.refresh()
+
+    @_seek.autocomplete('query')
+    async def _seek_autocomplete(self, interaction: discord.Interaction,
+                                 current: str) -> list[app_commands.Choice[str]]:
+        """Sugere músicas da fila enquanto o usuário digita, consultando apenas o índice da fila."""
         handler = self.guild_pool.get_handler(interaction.guild_id)
-        player = handler.player
+        player = handler.player if handler else None
 
-        index -= 1
-        new_index -= 1
+        if not player or not current.strip():
+            return []
 
-        try:
-            track = player.queue[index]
+        return [app_commands.Choice(name=f'{index + 1}. {item.title}'[:100], value=item.title[:100])
+                for index, item in player.queue.search(current)[:25]]
 
-            if new_index < 0 or new_index > player.queue.count:
-                message = 'Novo índice não existe!'
+    @serialized('seek')
+    async def seek_action(self, interaction: discord.Interaction, item: QueueEntry | wavelink.Playable | None,
+                          action: str):
+        """
+        Toca agora, toca a seguir ou remove uma música encontrada pelo /seek.
+
+        :param interaction: Objeto de interação
+        :param item: Item da fila selecionado
+        :param action: "play_now", "play_next" ou "remove"
+        """
+        handler = self.guild_pool.get_handler(interaction.guild_id)
+        player = handler.player
+        index = player.queue.position(item) if player and item is not None else None
+
+        if index is None:
+            message = 'Essa música não está mais na fila!'
+        elif action == 'remove':
+            del player.queue[index]
+            message = f'{item.title} removido da fila!'
+        else:
+            del player.queue[index]
+            player.queue.put_at_index(0, item)
+            message = f'{item.title} será a próxima música!'
+
+            if action == 'play_now':
+                message = f'Tocando {item.title}!'
+
+                # O fim da música atual toca o primeiro item da fila
+                if player.is_playing() or player.is_paused():
+                    await player.stop()
+                else:
+                    await self.play_song(handler)
             else:
-                del player.queue[index]
-                player.queue.put_at_index(new_index, track)
-                message = f'{track.title} mudado para a posição {new_index + 1} na fila!'
-        except IndexError:
-            message = 'Índice atual não existe!'
+                self.prefetch_next(player)
 
-        # noinspection PyUnresolvedReferences
-        await interaction.response.send_message(message, ephemeral=True, delete_after=5)
+        if index is not None:
+            await handler.queue_view.refresh()
+
+        await self.send_followup(interaction, message)
 
     @commands.hybrid_command(name='history', description='Histórico de músicas tocadas')
     async def _history(self, ctx: commands.Context):
@@ -1074,6 +2631,7 @@ class QueueView(discord.ui.View):
         return self
 
     @discord.ui.button(emoji='◀', style=discord.ButtonStyle.blurple, custom_id='queue:previous')
+    @traced('queue:previous')
     async def previous(self, interaction: discord.Interaction, _):
         """
         Carrega página anterior.
@@ -1093,6 +2651,7 @@ class QueueView(discord.ui.View):
         await self.refresh()
 
     @discord.ui.button(emoji='▶', style=discord.ButtonStyle.blurple, custom_id='queue:next')
+    @traced('queue:next')
     async def next(self, interaction: discord.Interaction, _):
         """
         Carrega página seguinte.
@@ -1149,6 +2708,7 @@ class QueueView(discord.ui.View):
         self.next.disabled = self.page == self.max_page
 
         await self.message.edit(content=None, embed=embed, view=self)
+        VIEW_EDITS.inc(view='queue')
 
     async def reset(self):
         """Reseta a view para o padrão."""
@@ -1159,6 +2719,7 @@ class QueueView(discord.ui.View):
         self.next.disabled = True
 
         await self.message.edit(content=None, embed=embed, view=None)
+        VIEW_EDITS.inc(view='queue')
 
 
 class DisplayView(discord.ui.View):
@@ -1205,6 +2766,7 @@ class DisplayView(discord.ui.View):
         return self
 
     @discord.ui.button(label='Pausar', emoji='⏸', style=discord.ButtonStyle.gray, custom_id='display:play_pause')
+    @traced('display:play_pause')
     async def play_pause(self, interaction: discord.Interaction, _):
         """
         Pausa ou retoma música atual.
@@ -1220,21 +2782,25 @@ class DisplayView(discord.ui.View):
             await self.music_cog.pause(interaction)
 
     @discord.ui.button(label='Próximo', emoji='⏭', style=discord.ButtonStyle.gray, custom_id='display:next')
+    @traced('display:next')
     async def skip(self, interaction: discord.Interaction, _):
         """Utiliza o mesmo método da slash command."""
         await self.music_cog.skip(interaction)
 
     @discord.ui.button(label='Parar', emoji='⏹', style=discord.ButtonStyle.gray, custom_id='display:stop')
+    @traced('display:stop')
     async def stop(self, interaction: discord.Interaction, _):
         """Utiliza o mesmo método da slash command."""
         await self.music_cog.stop(interaction, leave=False)
 
     @discord.ui.button(label='Loop', emoji='🔁', style=discord.ButtonStyle.gray, custom_id='display:loop', )
+    @traced('display:loop')
     async def loop(self, interaction: discord.Interaction, _):
         """Utiliza o mesmo método da slash command."""
         await self.music_cog.loop(interaction)
 
     @discord.ui.button(label='Aleatório', emoji='🔀', style=discord.ButtonStyle.gray, custom_id='display:shuffle', )
+    @traced('display:shuffle')
     async def shuffle(self, interaction: discord.Interaction, _):
         """Utiliza o mesmo método da slash command."""
         await self.music_cog.shuffle(interaction)
@@ -1269,6 +2835,7 @@ class DisplayView(discord.ui.View):
             button.disabled = False
 
         self.message = await self.message.edit(content=None, embed=embed, view=self, attachments=attachments)
+        VIEW_EDITS.inc(view='display')
 
     async def reset(self):
         """Reseta a view para o padrão."""
@@ -1285,15 +2852,103 @@ class DisplayView(discord.ui.View):
             button.disabled = True
 
         self.message = await self.message.edit(content=None, embed=embed, view=self, attachments=[default])
+        VIEW_EDITS.inc(view='display')
 
 
 class SeekView(QueueView):
-    """View para visualizar conteúdo filtrado em uma queue."""
+    """
+    View para visualizar conteúdo filtrado em uma queue.
 
-    def __init__(self, message: discord.Message, handler: GuildHandler):
+    Resposta efêmera do /seek: lista, 25 por página, as músicas da fila encontradas pelo índice de palavras da fila e
+    permite tocar agora, tocar a seguir ou remover a música selecionada. As posições são recalculadas a cada
+    atualização, pois a fila pode mudar enquanto a view estiver aberta.
+    """
+
+    def __init__(self, message: discord.Message | None, handler: GuildHandler, query: str):
         super().__init__(message, handler)
 
-        raise NotImplementedError("Class not yet implemented!")
+        self.timeout = 300
+        self.query = query
+        self.matches: list[tuple[int, QueueEntry | wavelink.Playable]] = []
+        self.selected: QueueEntry | wavelink.Playable | None = None
+
+        self._enable_actions(False)
+
+    def _enable_actions(self, enabled: bool):
+        """Habilita os botões que agem sobre a música selecionada."""
+        self.play_now.disabled = not enabled
+        self.play_next.disabled = not enabled
+        self.remove.disabled = not enabled
+
+    async def on_timeout(self):
+        """Deleta a mensagem no timeout."""
+        try:
+            await self.message.delete()
+        except discord.HTTPException:
+            pass
+
+    # noinspection PyUnresolvedReferences
+    @discord.ui.select(cls=discord.ui.Select, placeholder='Selecione uma música', row=1,
+                       options=[discord.SelectOption(label='Nenhuma música encontrada', value='-1')])
+    async def select_match(self, interaction: discord.Interaction, select: discord.ui.Select):
+        number = int(select.values[0])
+
+        self.selected = self.matches[number][1] if 0 <= number < len(self.matches) else None
+        self._enable_actions(self.selected is not None)
+
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label='Tocar agora', emoji='▶', style=discord.ButtonStyle.green, row=2)
+    @traced('seek:play_now')
+    async def play_now(self, interaction: discord.Interaction, _):
+        """Pula para a música selecionada."""
+        await self.handler.music_cog.seek_action(interaction, self.selected, 'play_now')
+        await self.refresh()
+
+    @discord.ui.button(label='Tocar a seguir', emoji='⏭', style=discord.ButtonStyle.blurple, row=2)
+    @traced('seek:play_next')
+    async def play_next(self, interaction: discord.Interaction, _):
+        """Move a música selecionada para o início da fila."""
+        await self.handler.music_cog.seek_action(interaction, self.selected, 'play_next')
+        await self.refresh()
+
+    @discord.ui.button(label='Remover', emoji='🗑', style=discord.ButtonStyle.red, row=2)
+    @traced('seek:remove')
+    async def remove(self, interaction: discord.Interaction, _):
+        """Remove a música selecionada da fila."""
+        await self.handler.music_cog.seek_action(interaction, self.selected, 'remove')
+        await self.refresh()
+
+    async def refresh(self):
+        """Refaz a pesquisa na fila e atualiza a página atual."""
+        player = self.handler.player
+
+        self.matches = player.queue.search(self.query) if player else []
+        self.max_page = max(ceil(len(self.matches) / 25) - 1, 0)
+        self.page = min(self.page, self.max_page)
+
+        start = self.page * 25
+        embed = discord.Embed(title=f'{len(self.matches)} música(s) encontrada(s) para "{self.query}"'[:256],
+                              colour=discord.Colour.gold())
+        options = []
+
+        for number, (index, item) in enumerate(self.matches[start:start + 25], start=start):
+            embed.add_field(name=index + 1, value=f'{item.title} - {item.author}' if item.author else item.title,
+                            inline=False)
+            options.append(discord.SelectOption(label=f'{index + 1}. {item.title}'[:100], value=str(number)))
+
+        self.select_match.options = options or [discord.SelectOption(label='Nenhuma música encontrada', value='-1')]
+        self.select_match.disabled = not options
+
+        # A música selecionada pode ter saído da fila
+        if self.selected is not None and (not player or player.queue.position(self.selected) is None):
+            self.selected = None
+
+        self._enable_actions(self.selected is not None)
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page == self.max_page
+
+        await self.message.edit(content=None, embed=embed, view=self)
 
 
 class Player(wavelink.Player):
@@ -1303,15 +2958,420 @@ class Player(wavelink.Player):
 
         self.queue: Queue = Queue()
 
+    @property
+    def position(self) -> float:
+        """Posição da música atual (ms), 0 até o primeiro "playerUpdate" do lavalink (enviado a cada 5 segundos)."""
+        if self.last_update is None:
+            return 0
+
+        return super().position
+
+
+class QueueEntry:
+    """
+    Item compacto da fila.
+
+    Guarda apenas o necessário para exibir a música na fila e reconstruí-la ao ser tocada, em vez do objeto completo
+    do wavelink com todo o payload do lavalink. Músicas do Spotify não possuem "encoded" até serem convertidas para o
+    YouTube, nesse caso "identifier" guarda a id da música no Spotify.
+
+    Itens de playlists são apenas referências (encoded é None): guardam a id da música e os metadados exibidos na
+    fila, e só são resolvidos no lavalink quando estão prestes a tocar.
+
+    Músicas do Spotify guardam também o ISRC (quando o Spotify o informa), usado para encontrar a mesma gravação no
+    YouTube.
+    """
+
+    __slots__ = ('encoded', 'identifier', 'title', 'author', 'duration', 'requester_id', 'source', 'isrc', 'resolved')
+
+    # Campos persistidos, na mesma ordem aceita pelo construtor
+    FIELDS = ('encoded', 'identifier', 'title', 'author', 'duration', 'requester_id', 'source', 'isrc')
+
+    def __init__(self, encoded: str | None, identifier: str, title: str, author: str | None, duration: int,
+                 requester_id: int | None, source: str, isrc: str | None = None):
+        self.encoded = encoded
+        self.identifier = identifier
+        self.title = title
+        self.author = author
+        self.duration = duration
+        self.requester_id = requester_id
+        self.source = source
+        self.isrc = isrc
+
+        # Música já resolvida antecipadamente (apenas para o próximo item da fila)
+        self.resolved: wavelink.YouTubeTrack | None = None
+
+    def __repr__(self) -> str:
+        return f'QueueEntry(source={self.source}, identifier={self.identifier}, title={self.title})'
+
+    @classmethod
+    def upgrade(cls, item: QueueEntry | wavelink.Playable | None) -> QueueEntry | wavelink.Playable | None:
+        """
+        Atualiza itens criados por uma versão anterior deste módulo (reload da cog) para a classe atual.
+        Caso os campos tenham mudado entre as versões o item é reconstruído a partir dos campos persistidos.
+
+        :param item: Item da fila
+        :return: Item com a classe atual, objetos do wavelink são retornados sem alteração
+        """
+        try:
+            return _upgrade(item, cls)
+        except TypeError:
+            entry = cls(*(getattr(item, field, None) for field in cls.FIELDS))
+            entry.resolved = getattr(item, 'resolved', None)
+
+            return entry
+
+    @classmethod
+    def from_track(cls, track: wavelink.Playable | spotify.SpotifyTrack, requester_id: int | None) -> QueueEntry:
+        """
+        Cria um item a partir de uma música do wavelink.
+
+        :param track: Objeto de música
+        :param requester_id: Id do solicitante
+        :return: Item da fila
+        """
+        if isinstance(track, spotify.SpotifyTrack):
+            author = track.artists[0] if track.artists else None
+
+            # O wavelink lê o ISRC de uma chave com erro de digitação ("irsc"), por isso usa os dados originais
+            isrc = track.isrc or track.raw.get('external_ids', {}).get('isrc')
+
+            return cls(None, track.id, track.title, author, track.duration, requester_id, 'spotify', isrc)
+
+        return cls(track.encoded, track.identifier, track.title, track.author, track.duration, requester_id, 'youtube')
+
+    @classmethod
+    def reference(cls, track: wavelink.Playable | spotify.SpotifyTrack, requester_id: int | None) -> QueueEntry:
+        """
+        Cria um item não resolvido, usado para as músicas de playlists.
+
+        :param track: Objeto de música
+        :param requester_id: Id do solicitante
+        :return: Item da fila
+        """
+        entry = cls.from_track(track, requester_id)
+        entry.encoded = None
+
+        return entry
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Identidade da música (fonte e id no YouTube ou no Spotify), igual para itens da mesma música."""
+        return self.source, self.identifier
+
+    @property
+    def uri(self) -> str:
+        if self.source == 'spotify':
+            return f'https://open.spotify.com/track/{self.identifier}'
+
+        return f'https://www.youtube.com/watch?v={self.identifier}'
+
+    def to_list(self) -> list:
+        """Retorna os campos do item em uma lista, no mesmo formato aceito pelo construtor."""
+        return [getattr(self, field) for field in self.FIELDS]
+
+    async def prefetch(self, searches: SingleFlight | None = None):
+        """
+        Resolve a música antecipadamente para que rehydrate() não precise esperar o lavalink.
+
+        :param searches: Agrupador de pesquisas simultâneas idênticas
+        """
+        if self.encoded is None and self.resolved is None:
+            self.resolved = await self._resolve(searches)
+
+    async def _resolve(self, searches: SingleFlight | None = None) -> wavelink.YouTubeTrack:
+        """
+        Busca a música no lavalink.
+        Referências do YouTube são carregadas pela URL do vídeo, já músicas do Spotify são pesquisadas no YouTube da
+        mesma forma que SpotifyTrack.fulfill() faria: pelo ISRC e, sem resultados, pelo título e artista.
+
+        :param searches: Agrupador de pesquisas simultâneas idênticas
+        :return: Objeto de música
+        """
+        if self.source == 'spotify':
+            queries = [normalize_query(f'{self.title} - {self.author}')]
+
+            if self.isrc:
+                queries.insert(0, f'"{self.isrc}"')
+
+            search = wavelink.YouTubeTrack.search
+        else:
+            # YouTubeTrack.search() trata qualquer URL de youtube.com como playlist, por isso usa a NodePool direto
+            queries = [self.uri]
+            search = lambda query: wavelink.NodePool.get_tracks(query, cls=wavelink.YouTubeTrack)
+
+        tracks = []
+
+        with SEARCH_LATENCY.time(source=f'{self.source}_reference'):
+            for query in queries:
+                if searches is not None:
+                    tracks = await searches.do((wavelink.YouTubeTrack.__name__, query), lambda: search(query))
+                else:
+                    tracks = await search(query)
+
+                if tracks:
+                    break
+
+        if not tracks:
+            raise wavelink.NoTracksError(f'Nenhuma música encontrada para "{self.title}"')
+
+        # O resultado da pesquisa é compartilhado com outras guilds, rehydrate() altera apenas uma cópia
+        return wavelink.YouTubeTrack(tracks[0].data)
+
+    async def rehydrate(self, searches: SingleFlight | None = None) -> wavelink.YouTubeTrack:
+        """
+        Reconstrói a música tocável.
+        Itens com "encoded" são reconstruídos localmente a partir dos dados salvos, referências são resolvidas no
+        lavalink, a não ser que já tenham sido resolvidas por prefetch().
+
+        :param searches: Agrupador de pesquisas simultâneas idênticas
+
+        :return: Objeto de música
+        """
+        if self.resolved is not None:
+            track, self.resolved = self.resolved, None
+        elif self.encoded is None:
+            track = await self._resolve(searches)
+        else:
+            track = wavelink.YouTubeTrack({
+                'encoded': self.encoded,
+                'info': {
+                    'identifier': self.identifier,
+                    'isSeekable': True,
+                    'author': self.author,
+                    'length': self.duration,
+                    'isStream': False,
+                    'position': 0,
+                    'title': self.title,
+                    'uri': f'https://www.youtube.com/watch?v={self.identifier}',
+                    'sourceName': 'youtube'
+                }
+            })
+
+        # Cria um atributo para referenciar o solicitante do comando, usado para logar no arquivo de log mais tarde
+        setattr(track, 'requester_id', self.requester_id)
+        return track
+
 
 class Queue(wavelink.Queue):
-    """Subclasse de Queue para adicionar uma propriedade de duração para o total de itens na fila."""
+    """
+    Subclasse de Queue para adicionar uma propriedade de duração para o total de itens na fila.
+    Também mantém um contador de versão incrementado a cada alteração, usado para detectar mudanças nos snapshots, um
+    índice de palavras dos títulos e artistas atualizado a cada item adicionado ou removido, usado pelo /seek, e a
+    quantidade de itens de cada música (identidade), usada para detectar duplicatas.
+    """
 
     def __init__(self):
         super().__init__()
 
         self._duration = 0
-        self._last_track: wavelink.Playable | None = None
+        self.version = 0
+
+        # Último item retirado por get_wait() e o item carregado antes dele, usados por unget()
+        self._last_get = (None, None)
+
+        self.reindex()
+
+    def reindex(self):
+        """Reconstrói os índices de pesquisa e de identidades e descarta as posições calculadas."""
+        self.index = TokenIndex(lambda item: f'{item.title} {item.author or ""}')
+        self.index.rebuild(self._queue)
+
+        self.identities: dict[tuple[str, str], int] = {}
+
+        for item in self._queue:
+            self._count_identity(item, 1)
+
+        # Posição de cada item (por id), recalculada apenas quando a versão da fila muda
+        self._positions: dict[int, int] = {}
+        self._positions_version = -1
+
+    @staticmethod
+    def identity(item: QueueEntry | wavelink.Playable | spotify.SpotifyTrack) -> tuple[str, str]:
+        """
+        Identidade da música de um item da fila.
+
+        :param item: Item da fila ou objeto de música
+        :return: Fonte e id da música
+        """
+        if isinstance(item, QueueEntry):
+            return item.key
+
+        if isinstance(item, spotify.SpotifyTrack):
+            return 'spotify', item.id
+
+        return 'youtube', item.identifier
+
+    def _count_identity(self, item: QueueEntry | wavelink.Playable, amount: int):
+        key = self.identity(item)
+        count = self.identities.get(key, 0) + amount
+
+        if count > 0:
+            self.identities[key] = count
+        else:
+            self.identities.pop(key, None)
+
+    def is_duplicate(self, item: QueueEntry | wavelink.Playable | spotify.SpotifyTrack) -> bool:
+        """
+        Verifica se a mesma música já está na fila.
+
+        :param item: Item da fila ou objeto de música
+        :return: True caso exista algum item da mesma música
+        """
+        return self.identity(item) in self.identities
+
+    def dedupe(self) -> int:
+        """
+        Remove, em uma única passada, os itens de músicas que já aparecem antes na fila.
+
+        :return: Quantidade de itens removidos
+        """
+        # Nenhuma música aparece mais de uma vez
+        if len(self.identities) == len(self._queue):
+            return 0
+
+        kept = deque()
+        removed = []
+        seen = set()
+
+        for item in self._queue:
+            key = self.identity(item)
+
+            if key in seen:
+                removed.append(item)
+            else:
+                seen.add(key)
+                kept.append(item)
+
+        self._replace(kept, removed)
+        return len(removed)
+
+    def remove_range(self, start: int, end: int) -> list[QueueEntry | wavelink.Playable]:
+        """
+        Remove os itens de um intervalo.
+
+        :param start: Índice do primeiro item (começando em 0)
+        :param end: Índice após o último item
+        :return: Itens removidos
+        """
+        items = list(self._queue)
+        removed = items[start:end]
+
+        if removed:
+            del items[start:end]
+            self._replace(deque(items), removed)
+
+        return removed
+
+    def remove_requester(self, requester_id: int) -> list[QueueEntry | wavelink.Playable]:
+        """
+        Remove os itens adicionados por um usuário.
+
+        :param requester_id: Id do solicitante
+        :return: Itens removidos
+        """
+        kept = deque()
+        removed = []
+
+        for item in self._queue:
+            if getattr(item, 'requester_id', None) == requester_id:
+                removed.append(item)
+            else:
+                kept.append(item)
+
+        if removed:
+            self._replace(kept, removed)
+
+        return removed
+
+    def move_range(self, start: int, end: int, new_index: int):
+        """
+        Move um bloco de itens para outra posição, mantendo a ordem dentro do bloco.
+
+        :param start: Índice do primeiro item (começando em 0)
+        :param end: Índice após o último item
+        :param new_index: Posição do primeiro item do bloco na fila resultante
+        """
+        items = list(self._queue)
+        block = items[start:end]
+
+        del items[start:end]
+        items[new_index:new_index] = block
+
+        self._replace(deque(items), [])
+
+    def truncate(self, size: int) -> list[QueueEntry | wavelink.Playable]:
+        """
+        Mantém apenas os primeiros itens da fila.
+
+        :param size: Quantidade de itens mantidos
+        :return: Itens removidos
+        """
+        return self.remove_range(size, len(self._queue))
+
+    def _replace(self, items: deque, removed: list[QueueEntry | wavelink.Playable]):
+        """
+        Substitui os itens da fila de uma só vez, descontando os itens removidos da duração e dos índices.
+
+        :param items: Novos itens da fila
+        :param removed: Itens que saíram da fila
+        """
+        self._queue = items
+
+        for item in removed:
+            self._duration -= item.duration
+            self.index.discard(item)
+            self._count_identity(item, -1)
+
+        self.version += 1
+
+    def position(self, item: QueueEntry | wavelink.Playable) -> int | None:
+        """
+        Posição atual de um item na fila.
+
+        :param item: Item da fila
+        :return: Índice (começando em 0) ou None caso o item não esteja mais na fila
+        """
+        if self._positions_version != self.version:
+            self._positions = {id(entry): index for index, entry in enumerate(self._queue)}
+            self._positions_version = self.version
+
+        index = self._positions.get(id(item))
+
+        if index is None or index >= len(self._queue) or self._queue[index] is not item:
+            return None
+
+        return index
+
+    def search(self, query: str) -> list[tuple[int, QueueEntry | wavelink.Playable]]:
+        """
+        Pesquisa itens da fila pelas palavras do título e do artista.
+
+        :param query: Texto pesquisado
+        :return: Lista de (índice, item) na ordem da fila
+        """
+        # Alterações feitas diretamente pelo wavelink (loop_all) não passam pelos métodos abaixo
+        if len(self.index) != self.count:
+            self.reindex()
+
+        found = []
+
+        for item in self.index.search(query):
+            index = self.position(item)
+
+            if index is not None:
+                found.append((index, item))
+
+        found.sort(key=lambda match: match[0])
+        return found
+
+    @staticmethod
+    def _check_playable(item: QueueEntry | wavelink.Playable) -> QueueEntry | wavelink.Playable:
+        """Permite itens compactos na fila além dos objetos de música do wavelink."""
+        if not isinstance(item, (QueueEntry, wavelink.Playable, spotify.SpotifyTrack)):
+            raise TypeError('Only QueueEntry or Playable objects are supported.')
+
+        return item
 
     @property
     def duration(self):
@@ -1321,37 +3381,97 @@ class Queue(wavelink.Queue):
     def duration(self, value):
         self._duration = value
 
-    async def get_wait(self) -> wavelink.YouTubeTrack | spotify.SpotifyTrack:
+    async def get_wait(self) -> QueueEntry | wavelink.Playable:
         """
         Retorna próximo item da fila e subtrai duração da fila.
+        Com o loop ativado retorna a música que acabou de tocar, já reconstruída.
 
-        :return: Objeto de música
+        :return: Item da fila ou objeto de música
         """
-        # track = cast(YouTubeTrack, await super().get_wait())
+        loaded = self._loaded
         track = await super().get_wait()
 
-        # Somente diminui duração da fila caso a música atual não seja o mesmo objeto anterior
-        # Caso a flag loop esteja ativada, a função anterior irá retornar o exato mesmo objeto.
-        if self._last_track != track:
+        # Somente diminui duração da fila caso o item tenha saído da fila
+        # Caso a flag loop esteja ativada, a função anterior irá retornar a música que acabou de tocar.
+        if track is not loaded:
             self._duration -= track.duration
+            self.index.discard(track)
+            self._count_identity(track, -1)
+
+        self.version += 1
 
-        self._last_track = track
+        # Usado por unget() para desfazer esta retirada
+        self._last_get = (track, loaded)
 
         return track
 
-    async def put_wait(self, item: wavelink.YouTubeTrack | spotify.SpotifyTrack):
+    def unget(self, item: QueueEntry | wavelink.Playable):
+        """
+        Desfaz o último get_wait(), devolvendo o item ao início da fila. Usado quando o item não pôde ser tocado por
+        uma falha do lavalink, e não da música.
+
+        :param item: Item retornado pelo último get_wait()
+        """
+        track, loaded = getattr(self, '_last_get', (None, None))
+
+        if track is not item:
+            return
+
+        self._last_get = (None, None)
+        self._loaded = loaded
+
+        # Com o loop o item não chegou a sair da fila
+        if item is not loaded:
+            self.put_at_index(0, item)
+
+    async def put_wait(self, item: QueueEntry, skip_duplicates: bool = False) -> bool:
         """
         Adiciona item e soma duração da fila.
 
         :param item: Música para adicionar a fila
+        :param skip_duplicates: Não adiciona o item caso a mesma música já esteja na fila
+        :return: True se o item foi adicionado
         """
+        if skip_duplicates and self.is_duplicate(item):
+            return False
+
         await super().put_wait(item)
         self._duration += item.duration
+        self.index.add(item)
+        self._count_identity(item, 1)
+        self.version += 1
+
+        return True
+
+    def put_at_index(self, index: int, item: QueueEntry):
+        """
+        Adiciona item em uma posição específica.
+
+        :param index: Índice na fila
+        :param item: Música para adicionar a fila
+        """
+        super().put_at_index(index, item)
+        self._duration += item.duration
+        self.index.add(item)
+        self._count_identity(item, 1)
+        self.version += 1
+
+    def __delitem__(self, index: int):
+        item = self._queue[index]
+
+        super().__delitem__(index)
+        self._duration -= item.duration
+        self.index.discard(item)
+        self._count_identity(item, -1)
+        self.version += 1
 
     def clear(self):
         """Limpa fila."""
         super().clear()
 
+        self.index.clear()
+        self.identities.clear()
+        self.version += 1
         self._duration = 0
         self._loaded = None
         self.loop = False
@@ -1405,6 +3525,35 @@ class Logger(logging.Logger):
 
             os.remove(oldest_log.fullname)
 
+    def titles(self) -> list[str]:
+        """
+        Lê os títulos das músicas registradas nos arquivos de log, dos mais antigos aos mais recentes.
+        Lê arquivos do disco, portanto deve ser executado fora do event loop.
+
+        :return: Títulos na ordem em que tocaram
+        """
+        titles = []
+
+        try:
+            files = sorted((os.path.join(self.root_dir, file) for file in os.listdir(self.root_dir)),
+                           key=os.path.getmtime)
+        except OSError:
+            return titles
+
+        for fullname in files:
+            try:
+                with open(fullname, 'r', encoding='utf8', errors='replace') as f:
+                    for line in f:
+                        # Formato: "data hora | título requested by usuário"
+                        title = line.partition(' | ')[2].rpartition(' requested by ')[0]
+
+                        if title:
+                            titles.append(title)
+            except OSError:
+                continue
+
+        return titles
+
     def info(self, *args, **kwargs):
         """Loga informações."""
         current_date = datetime.now().date()
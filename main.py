@@ -1,15 +1,28 @@
 import os
 import asyncio
+import logging
+import multiprocessing
+import multiprocessing.connection
+import time
 
 import dotenv
 from discord import Intents
 from discord.ext import commands
+from discord.http import HTTPClient
 
+from utils import TRACER, JsonLinesExporter, LoopWatchdog, MetricsServer, OtlpJsonExporter, RateLimitLogHandler
 
-class SonoMonkey(commands.Bot):
-    """Classe principal."""
 
-    def __init__(self):
+class SonoMonkey(commands.AutoShardedBot):
+    """
+    Classe principal.
+
+    Sem argumentos o discord.py decide a quantidade de shards e todos rodam neste processo. Em clusters cada processo
+    recebe apenas parte dos shards (shard_ids) e, portanto, apenas as guilds desses shards.
+    """
+
+    def __init__(self, shard_ids: list[int] | None = None, shard_count: int | None = None,
+                 cluster_id: int | None = None):
         # Habilita permissões para o bot
         intents = Intents.default()
         intents.message_content = True
@@ -17,21 +30,52 @@ class SonoMonkey(commands.Bot):
         intents.guilds = True
 
         # Cria o bot
-        super().__init__(command_prefix='$', intents=intents, help_command=None)
+        super().__init__(command_prefix='$', intents=intents, help_command=None, shard_ids=shard_ids,
+                         shard_count=shard_count)
+
+        self.cluster_id = cluster_id
+
+        # Vigia atrasos do event loop causados por código síncrono
+        self.watchdog = LoopWatchdog(threshold=float(os.getenv('WATCHDOG_THRESHOLD', 0.25)))
 
     @property
     def token(self):
         """Retorna o token armazenado no arquivo .env."""
         return os.getenv('TOKEN')
 
+    async def setup_hook(self):
+        """Disparado uma única vez, já dentro do event loop, antes de conectar ao discord."""
+        self.watchdog.start()
+
     async def on_ready(self):
         """Disparado ao bot se conectar a api do discord."""
-        print(f"Logged in as {self.user} (ID: {self.user.id})")
+        cluster = f' cluster {self.cluster_id}' if self.cluster_id is not None else ''
+        print(f"Logged in as {self.user} (ID: {self.user.id}){cluster} "
+              f"shards {list(self.shards)}/{self.shard_count} with {len(self.guilds)} guilds")
+
 
+async def main(cluster_id: int | None = None, shard_ids: list[int] | None = None, shard_count: int | None = None):
+    # Sem clusters o número de shards pode ser fixado pelo .env, do contrário o discord recomenda
+    if shard_count is None and os.getenv('SHARD_COUNT'):
+        shard_count = int(os.getenv('SHARD_COUNT'))
 
-async def main():
     # Instância do bot
-    bot = SonoMonkey()
+    bot = SonoMonkey(shard_ids, shard_count, cluster_id)
+
+    # Endpoint de métricas opcional no formato do Prometheus (uma porta por cluster)
+    if os.getenv('METRICS_PORT'):
+        logging.getLogger('discord.http').addHandler(RateLimitLogHandler())
+
+        port = int(os.getenv('METRICS_PORT')) + (cluster_id or 0)
+        metrics_server = MetricsServer(os.getenv('METRICS_HOST', '127.0.0.1'), port)
+        await metrics_server.start()
+
+    # Traces das interações (jsonl ou otlp), desabilitados por padrão
+    exporters = {'jsonl': JsonLinesExporter, 'otlp': OtlpJsonExporter}
+    exporter = exporters.get(os.getenv('TRACE_EXPORTER', '').lower())
+
+    if exporter:
+        TRACER.exporter = exporter(os.getenv('TRACE_FILE', os.path.join('traces', 'traces.jsonl')))
 
     # Adiciona cogs ao bot e inicia o loop
     async with bot:
@@ -40,8 +84,83 @@ async def main():
         await bot.start(bot.token)
 
 
+def run_cluster(cluster_id: int, shard_ids: list[int], shard_count: int):
+    """Entry point de cada processo do cluster."""
+    dotenv.load_dotenv()
+    asyncio.run(main(cluster_id, shard_ids, shard_count))
+
+
+async def recommended_shards(token: str) -> int:
+    """Consulta a quantidade de shards recomendada pelo discord."""
+    http = HTTPClient(asyncio.get_running_loop())
+
+    try:
+        await http.static_login(token)
+        shard_count, _ = await http.get_bot_gateway()
+    finally:
+        await http.close()
+
+    return shard_count
+
+
+def launch_clusters(clusters: int):
+    """
+    Divide os shards entre "clusters" processos e os mantém rodando, reiniciando os que caírem.
+    Cada processo identifica seus shards em sequência, portanto os processos são iniciados de forma escalonada para
+    não ultrapassar o limite de identificações do discord (uma a cada 5 segundos).
+
+    :param clusters: Quantidade de processos
+    """
+    shard_count = int(os.getenv('SHARD_COUNT', 0)) or asyncio.run(recommended_shards(os.getenv('TOKEN')))
+    clusters = min(clusters, shard_count)
+
+    groups = [list(range(shard_count))[index::clusters] for index in range(clusters)]
+    context = multiprocessing.get_context('spawn')
+    processes: dict[int, multiprocessing.Process] = {}
+
+    def start(cluster_id: int):
+        process = context.Process(target=run_cluster, args=(cluster_id, groups[cluster_id], shard_count),
+                                  name=f'cluster-{cluster_id}')
+        process.start()
+        processes[cluster_id] = process
+
+        print(f'Cluster {cluster_id} started (pid {process.pid}) with shards {groups[cluster_id]}')
+
+    try:
+        for cluster_id in range(clusters):
+            if cluster_id:
+                time.sleep(5.5 * len(groups[cluster_id - 1]))
+
+            start(cluster_id)
+
+        while processes:
+            sentinels = {process.sentinel: cluster_id for cluster_id, process in processes.items()}
+
+            for sentinel in multiprocessing.connection.wait(list(sentinels)):
+                cluster_id = sentinels[sentinel]
+                process = processes.pop(cluster_id)
+                process.join()
+
+                if process.exitcode == 0:
+                    print(f'Cluster {cluster_id} finished')
+                    continue
+
+                print(f'Cluster {cluster_id} exited with code {process.exitcode}, restarting...')
+                time.sleep(5)
+                start(cluster_id)
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+
+        for process in processes.values():
+            process.join()
+
+
 if __name__ == '__main__':
     # Carrega variáveis do ambiente e executa entry point
     dotenv.load_dotenv()
-    asyncio.run(main())
 
+    if int(os.getenv('CLUSTERS', 1)) > 1:
+        launch_clusters(int(os.getenv('CLUSTERS')))
+    else:
+        asyncio.run(main())
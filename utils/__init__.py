@@ -2,11 +2,26 @@ import time
 import os
 import re
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlencode, parse_qsl
 from typing import NamedTuple
 
 from wavelink.ext import spotify
 
+from .scheduler import TimerWheel
+from .stats import LatencyWindow
+from .jobs import FairScheduler
+from .singleflight import SingleFlight
+from .spotify_api import SpotifyMetadataClient
+from .metrics import REGISTRY, MetricsServer, RateLimitLogHandler, counter, gauge, histogram
+from .tracing import TRACER, NOOP_SPAN, Span, JsonLinesExporter, OtlpJsonExporter, traced
+from .watchdog import LoopWatchdog
+from .profiling import CProfileSession, SamplingProfiler
+from .filelock import FileLock
+from .actor import GuildActor
+from .command_sync import CommandSyncer, SyncResult
+from .suggestions import Suggestion, SuggestionIndex, fold_text
+from .token_index import TokenIndex
+
 
 __all__ = [
     'ROOT',
@@ -16,7 +31,36 @@ __all__ = [
     'is_playlist',
     'is_spotify_url',
     'is_youtube_url',
-    'OldestLog'
+    'normalize_query',
+    'OldestLog',
+    'TimerWheel',
+    'LatencyWindow',
+    'FairScheduler',
+    'SingleFlight',
+    'SpotifyMetadataClient',
+    'REGISTRY',
+    'MetricsServer',
+    'RateLimitLogHandler',
+    'counter',
+    'gauge',
+    'histogram',
+    'TRACER',
+    'NOOP_SPAN',
+    'Span',
+    'JsonLinesExporter',
+    'OtlpJsonExporter',
+    'traced',
+    'LoopWatchdog',
+    'CProfileSession',
+    'SamplingProfiler',
+    'FileLock',
+    'GuildActor',
+    'CommandSyncer',
+    'SyncResult',
+    'Suggestion',
+    'SuggestionIndex',
+    'fold_text',
+    'TokenIndex'
 ]
 
 ROOT = os.getcwd()
@@ -61,6 +105,26 @@ def is_url(url: str) -> bool:
         return False
 
 
+def normalize_query(query: str) -> str:
+    """
+    Normaliza uma pesquisa para que pesquisas equivalentes gerem a mesma chave.
+    Textos ignoram maiúsculas e espaços repetidos. URLs mantêm o caminho intacto (ids do YouTube diferenciam
+    maiúsculas), mas perdem parâmetros de rastreamento como o "si" do Spotify.
+
+    :param query: URL ou palavras chaves de busca
+    :return: Pesquisa normalizada
+    """
+    query = ' '.join(query.split())
+
+    if not is_url(query):
+        return query.casefold()
+
+    result = urlparse(query)
+    params = [(key, value) for key, value in parse_qsl(result.query) if key not in ('si', 'pp', 'feature')]
+
+    return result._replace(scheme='https', netloc=result.netloc.lower(), query=urlencode(params), fragment='').geturl()
+
+
 def is_supported_url(url: str) -> bool:
     """
     Verifica se é uma URL válida.
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from .metrics import histogram
+
+
+__all__ = [
+    'GuildActor'
+]
+
+
+ACTOR_WAIT = histogram('sonomonkey_actor_wait_seconds',
+                       'Tempo das mensagens que aguardaram na caixa do ator (caixa ocupada)', ('message',))
+ACTOR_PROCESSING = histogram('sonomonkey_actor_processing_seconds', 'Tempo de processamento das mensagens do ator',
+                             ('message',))
+
+
+class _Message:
+    """Mensagem na caixa do ator."""
+
+    __slots__ = ('name', 'func', 'args', 'kwargs', 'future', 'enqueued')
+
+    def __init__(self, name: str, func: Callable[..., Awaitable], args: tuple, kwargs: dict,
+                 future: asyncio.Future | None):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class GuildActor:
+    """
+    Ator de uma guild: executa as mensagens (corrotinas que alteram o estado da guild) uma por vez, na ordem de
+    chegada.
+
+    Mensagens enviadas com a caixa vazia por "ask" são executadas diretamente pelo chamador, sem criar tasks. As
+    demais aguardam na caixa e são processadas por uma task do ator, criada apenas enquanto houver mensagens, portanto
+    guilds diferentes são processadas em paralelo e atores ociosos não custam nada. Uma mensagem que envia outra
+    mensagem para o mesmo ator e a aguarda seria um deadlock, por isso "ask" executa a função diretamente quando
+    chamado de dentro do ator.
+    """
+
+    def __init__(self, key: Hashable):
+        self.key = key
+
+        self._mailbox: deque[_Message] = deque()
+
+        # Task executando mensagens no momento (a task do ator ou o chamador de "ask") e a task do ator
+        self._owner: asyncio.Task | None = None
+        self._drainer: asyncio.Task | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        # Métricas
+        self.processed = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._mailbox)
+
+    @property
+    def busy(self) -> bool:
+        """True enquanto houver alguma mensagem em processamento."""
+        return self._owner is not None
+
+    @property
+    def inside(self) -> bool:
+        """True quando chamado a partir de uma mensagem deste ator."""
+        return self._owner is not None and asyncio.current_task() is self._owner
+
+    def tell(self, name: str, func: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Envia uma mensagem sem aguardar o resultado. Erros são apenas impressos no console.
+
+        :param name: Nome da mensagem (usado nas métricas)
+        :param func: Função assíncrona executada pelo ator
+        """
+        self._mailbox.append(_Message(name, func, args, kwargs, None))
+        self._wake()
+
+    def tell_first(self, name: str, func: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Envia uma mensagem que passa à frente das mensagens aguardando na caixa, sem aguardar o resultado.
+        A mensagem em processamento não é interrompida.
+
+        :param name: Nome da mensagem (usado nas métricas)
+        :param func: Função assíncrona executada pelo ator
+        """
+        self._mailbox.appendleft(_Message(name, func, args, kwargs, None))
+        self._wake()
+
+    async def ask(self, name: str, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """
+        Envia uma mensagem e aguarda o resultado ou a exceção levantada por ela.
+        Caso o chamador seja cancelado antes da mensagem começar ela é descartada.
+
+        :param name: Nome da mensagem (usado nas métricas)
+        :param func: Função assíncrona executada pelo ator
+        :return: Retorno da função
+        """
+        if self.inside:
+            return await func(*args, **kwargs)
+
+        # Caixa vazia: o próprio chamador executa a mensagem enquanto ocupa o ator
+        if not self.busy and not self._mailbox:
+            self._owner = asyncio.current_task()
+            self._idle.clear()
+
+            try:
+                return await self._run(name, func, args, kwargs)
+            finally:
+                self._owner = None
+                self._wake()
+
+        future = asyncio.get_running_loop().create_future()
+        self._mailbox.append(_Message(name, func, args, kwargs, future))
+        self._wake()
+
+        return await future
+
+    async def join(self):
+        """Aguarda todas as mensagens pendentes serem processadas."""
+        while self.busy or self._mailbox:
+            await self._idle.wait()
+
+    def close(self):
+        """Interrompe a task do ator e descarta as mensagens pendentes."""
+        while self._mailbox:
+            message = self._mailbox.popleft()
+
+            if message.future is not None:
+                message.future.cancel()
+
+        if self._drainer:
+            self._drainer.cancel()
+
+    def _wake(self):
+        """Inicia a task do ator caso existam mensagens e ninguém as esteja processando."""
+        if self.busy:
+            return
+
+        if not self._mailbox:
+            self._idle.set()
+            return
+
+        self._idle.clear()
+        self._owner = self._drainer = asyncio.create_task(self._drain(), name=f'actor-{self.key}')
+
+    async def _run(self, name: str, func: Callable[..., Awaitable], args: tuple, kwargs: dict) -> Any:
+        started = time.perf_counter()
+
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.processed += 1
+            ACTOR_PROCESSING.observe(time.perf_counter() - started, message=name)
+
+    async def _drain(self):
+        """Processa a caixa até esvaziá-la, a task termina em seguida."""
+        try:
+            while self._mailbox:
+                message = self._mailbox.popleft()
+                future = message.future
+
+                # O chamador desistiu antes da mensagem começar
+                if future is not None and future.done():
+                    continue
+
+                ACTOR_WAIT.observe(time.perf_counter() - message.enqueued, message=message.name)
+
+                try:
+                    result = await self._run(message.name, message.func, message.args, message.kwargs)
+                except Exception as e:
+                    if future is None:
+                        print(f'Error during {message.name} ({self.key})', e.__class__, e)
+                    elif not future.done():
+                        future.set_exception(e)
+                else:
+                    if future is not None and not future.done():
+                        future.set_result(result)
+        finally:
+            self._owner = self._drainer = None
+            self._idle.set()
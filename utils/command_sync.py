@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+import discord
+from discord import app_commands
+
+from .filelock import FileLock
+
+
+__all__ = [
+    'CommandSyncer',
+    'SyncResult'
+]
+
+
+class SyncResult(NamedTuple):
+    """Resultado da sincronização de um escopo."""
+    scope: str
+    status: str
+    commands: int = 0
+    error: str | None = None
+
+    def __str__(self) -> str:
+        if self.status == 'synced':
+            return f'{self.scope}: {self.commands} comandos sincronizados'
+
+        if self.status == 'unchanged':
+            return f'{self.scope}: sem alterações'
+
+        return f'{self.scope}: erro ({self.error})'
+
+
+class CommandSyncer:
+    """
+    Sincroniza os slash commands apenas quando a árvore mudou.
+
+    Guarda o hash (sha256) do payload enviado ao discord em cada escopo ("global" ou id da guild) em um arquivo json.
+    Syncs com o mesmo hash da última sincronização bem sucedida são ignorados, os demais são executados ao mesmo tempo,
+    limitados por "concurrency". O arquivo é mesclado sob uma trava, pois vários processos (clusters) podem sincronizar.
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, path: str, concurrency: int = 5):
+        self.tree = tree
+        self.path = path
+        self.concurrency = concurrency
+
+        self._lock_path = f'{path}.lock'
+
+    async def payload_hash(self, guild: discord.abc.Snowflake | None = None) -> str:
+        """
+        Calcula o hash do payload que tree.sync() enviaria para o escopo.
+
+        :param guild: Guild do escopo, None para os comandos globais
+        :return: Hash hexadecimal
+        """
+        commands = self.tree.get_commands(guild=guild)
+        translator = self.tree.translator
+
+        if translator:
+            payload = [await command.get_translated_payload(translator) for command in commands]
+        else:
+            payload = [command.to_dict() for command in commands]
+
+        payload.sort(key=lambda command: (command.get('type', 1), command['name']))
+        serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    async def sync(self, guild: discord.abc.Snowflake | None = None, force: bool = False) -> SyncResult:
+        """
+        Sincroniza um escopo caso a árvore tenha mudado desde a última sincronização.
+
+        :param guild: Guild do escopo, None para os comandos globais
+        :param force: Sincroniza mesmo sem alterações
+        :return: Resultado da sincronização
+        """
+        results = await self.sync_many([guild], force)
+        return results[0]
+
+    async def sync_many(self, guilds: list[discord.abc.Snowflake | None], force: bool = False) -> list[SyncResult]:
+        """
+        Sincroniza vários escopos ao mesmo tempo, ignorando os que não mudaram.
+
+        :param guilds: Guilds a sincronizar (None para os comandos globais)
+        :param force: Sincroniza mesmo sem alterações
+        :return: Resultado de cada escopo, na mesma ordem
+        """
+        hashes = self._load()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        synced: dict[str, str] = {}
+
+        async def sync_scope(guild: discord.abc.Snowflake | None) -> SyncResult:
+            scope = 'global' if guild is None else str(guild.id)
+
+            try:
+                digest = await self.payload_hash(guild)
+            except Exception as e:
+                return SyncResult(scope, 'failed', error=f'{e.__class__.__name__}: {e}')
+
+            if not force and hashes.get(scope) == digest:
+                return SyncResult(scope, 'unchanged')
+
+            async with semaphore:
+                try:
+                    commands = await self.tree.sync(guild=guild)
+                except (discord.HTTPException, app_commands.AppCommandError) as e:
+                    return SyncResult(scope, 'failed', error=f'{e.__class__.__name__}: {e}')
+
+            synced[scope] = digest
+            return SyncResult(scope, 'synced', len(commands))
+
+        results = await asyncio.gather(*(sync_scope(guild) for guild in guilds))
+
+        if synced:
+            self._save(synced)
+
+        return list(results)
+
+    def _load(self) -> dict[str, str]:
+        """Carrega os hashes da última sincronização de cada escopo, outros processos podem tê-los alterado."""
+        with FileLock(self._lock_path):
+            return self._read()
+
+    def _save(self, synced: dict[str, str]):
+        """
+        Grava os hashes dos escopos sincronizados, mantendo os gravados por outros processos.
+
+        :param synced: Hash de cada escopo sincronizado
+        """
+        with FileLock(self._lock_path):
+            hashes = self._read()
+            hashes.update(synced)
+            temp_path = f'{self.path}.tmp'
+
+            with open(temp_path, 'w', encoding='utf8') as f:
+                json.dump(hashes, f, indent=2)
+
+            os.replace(temp_path, self.path)
+
+    def _read(self) -> dict[str, str]:
+        try:
+            with open(self.path, 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
@@ -0,0 +1,52 @@
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+__all__ = [
+    'FileLock'
+]
+
+
+class FileLock:
+    """
+    Trava exclusiva entre processos baseada em um arquivo ".lock" (fcntl no Linux, msvcrt no Windows).
+
+    Usada para ler e reescrever arquivos compartilhados por vários processos do bot (clusters de shards) sem que um
+    sobrescreva as alterações do outro. Deve ser usada com "with" e segurada apenas durante a leitura e escrita.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        self._file = open(self.path, 'a+')
+
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt.locking não bloqueia indefinidamente, tenta novamente até conseguir
+            while True:
+                try:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+
+        return self
+
+    def __exit__(self, *_):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+        self._file.close()
+        self._file = None
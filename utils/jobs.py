@@ -0,0 +1,184 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Hashable
+
+
+__all__ = [
+    'FairScheduler'
+]
+
+
+class _Job:
+    """Job enfileirado: um gerador assíncrono em que cada item produzido conta como uma unidade de trabalho."""
+
+    __slots__ = ('key', 'steps', 'cancelled')
+
+    def __init__(self, key: Hashable, steps: AsyncIterator):
+        self.key = key
+        self.steps = steps
+        self.cancelled = False
+
+
+class FairScheduler:
+    """
+    Escalonador global de jobs com divisão justa entre chaves (guilds).
+
+    Cada chave possui sua própria fila de jobs, executados em ordem. As chaves com trabalho pendente ficam em um anel
+    e um número limitado de workers atende o anel em round-robin: cada worker avança o job da chave por no máximo
+    "quantum" unidades e devolve a chave para o fim do anel. Assim uma playlist enorme não impede o progresso das
+    playlists de outras guilds e o total de requisições simultâneas fica limitado ao número de workers.
+    """
+
+    def __init__(self, workers: int = 2, quantum: int = 10):
+        self._workers = workers
+        self._quantum = quantum
+
+        self._jobs: dict[Hashable, deque[_Job]] = {}
+        self._ring: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._scheduled: set[Hashable] = set()
+        self._tasks: list[asyncio.Task] = []
+
+        # Métricas
+        self.processed = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self._history: deque[tuple[float, int]] = deque(maxlen=512)
+
+    def start(self):
+        """Inicia os workers."""
+        self._tasks = [task for task in self._tasks if not task.done()]
+
+        for _ in range(self._workers - len(self._tasks)):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def stop(self):
+        """Interrompe os workers, jobs pendentes são mantidos."""
+        for task in self._tasks:
+            task.cancel()
+
+        self._tasks.clear()
+
+    def submit(self, key: Hashable, steps: AsyncIterator) -> int:
+        """
+        Enfileira um job.
+
+        :param key: Chave do job (id da guild)
+        :param steps: Gerador assíncrono que executa o job
+        :return: Quantidade de jobs da chave à frente deste
+        """
+        jobs = self._jobs.setdefault(key, deque())
+        jobs.append(_Job(key, steps))
+
+        if key not in self._scheduled:
+            self._scheduled.add(key)
+            self._ring.put_nowait(key)
+
+        return len(jobs) - 1
+
+    def cancel(self, key: Hashable) -> int:
+        """
+        Cancela todos os jobs de uma chave, inclusive o que estiver em execução. Um passo já iniciado não é
+        interrompido, o job é encerrado assim que ele terminar.
+
+        :param key: Chave dos jobs
+        :return: Quantidade de jobs cancelados
+        """
+        jobs = self._jobs.pop(key, None)
+
+        if not jobs:
+            return 0
+
+        for job in jobs:
+            job.cancelled = True
+
+        return len(jobs)
+
+    def pending(self, key: Hashable) -> int:
+        """
+        Retorna a quantidade de jobs pendentes de uma chave.
+
+        :param key: Chave dos jobs
+        :return: Quantidade de jobs, incluindo o que estiver em execução
+        """
+        return len(self._jobs.get(key, ()))
+
+    def throughput(self, window: float = 60) -> float:
+        """
+        Retorna unidades de trabalho processadas por segundo.
+
+        :param window: Janela em segundos
+        :return: Unidades por segundo
+        """
+        since = time.monotonic() - window
+        return sum(count for moment, count in self._history if moment >= since) / window
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas do escalonador.
+
+        :return: Dicionário com profundidade das filas e vazão
+        """
+        return {
+            'workers': len(self._tasks),
+            'running': self.running,
+            'keys': len(self._jobs),
+            'depth': sum(len(jobs) for jobs in self._jobs.values()),
+            'processed': self.processed,
+            'completed': self.completed,
+            'failed': self.failed,
+            'throughput': self.throughput()
+        }
+
+    async def _worker(self):
+        while True:
+            key = await self._ring.get()
+            self.running += 1
+
+            try:
+                await self._run_slice(key)
+            finally:
+                self.running -= 1
+
+            # Devolve a chave ao fim do anel caso ainda haja trabalho, do contrário a remove
+            if self._jobs.get(key):
+                self._ring.put_nowait(key)
+            else:
+                self._jobs.pop(key, None)
+                self._scheduled.discard(key)
+
+    async def _run_slice(self, key: Hashable):
+        """
+        Avança o job atual da chave por no máximo um quantum.
+
+        :param key: Chave do job
+        """
+        jobs = self._jobs.get(key)
+
+        if not jobs:
+            return
+
+        job = jobs[0]
+        count = 0
+        finished = False
+
+        try:
+            while count < self._quantum and not job.cancelled:
+                await anext(job.steps)
+                count += 1
+        except StopAsyncIteration:
+            finished = True
+            self.completed += 1
+        except Exception as e:
+            finished = True
+            self.failed += 1
+            print('Error during job', key, e.__class__, e)
+
+        self.processed += count
+        self._history.append((time.monotonic(), count))
+
+        if job.cancelled:
+            await job.steps.aclose()
+        elif finished:
+            jobs.popleft()
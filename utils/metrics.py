@@ -0,0 +1,279 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from aiohttp import web
+
+
+__all__ = [
+    'REGISTRY',
+    'Registry',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsServer',
+    'RateLimitLogHandler',
+    'counter',
+    'gauge',
+    'histogram'
+]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    """
+    Formata labels no padrão do Prometheus.
+
+    :param names: Nomes dos labels
+    :param values: Valores dos labels
+    :param extra: Label adicional já formatado (usado pelo "le" dos histogramas)
+    :return: String no formato {nome="valor",...} ou string vazia
+    """
+    pairs = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+             for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base das métricas, cada combinação de labels possui seu próprio valor."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+        self._values: dict[tuple, float] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def clear(self):
+        """Remove todos os valores, usado por gauges recalculados a cada coleta."""
+        self._values.clear()
+
+    def samples(self) -> list[str]:
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+                for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Contador que apenas cresce."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Valor que pode subir e descer."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribuição de valores em buckets cumulativos."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+        # Para cada combinação de labels: contagem por bucket (não cumulativa), soma e total
+        self._histograms: dict[tuple, list] = {}
+
+    def clear(self):
+        self._histograms.clear()
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        histogram = self._histograms.get(key)
+
+        if histogram is None:
+            histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+
+        histogram[0][bisect_left(self.buckets, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def time(self, **labels) -> '_Timer':
+        """
+        Mede o tempo de um bloco "with".
+
+        :return: Context manager que observa a duração ao sair
+        """
+        return _Timer(self, labels)
+
+    def samples(self) -> list[str]:
+        lines = []
+
+        for key, (counts, total, count) in self._histograms.items():
+            cumulative = 0
+
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {count}')
+
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self._histogram = histogram
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+class Registry:
+    """
+    Conjunto de métricas exportadas.
+
+    As métricas são criadas uma única vez por nome, portanto recarregar uma cog reaproveita os valores existentes.
+    Coletores são funções chamadas antes de cada exportação para atualizar gauges calculados sob demanda.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: dict[str, Callable[[], None]] = {}
+
+    def get_or_create(self, cls: type[_Metric], name: str, documentation: str, **kwargs) -> _Metric:
+        metric = self._metrics.get(name)
+
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f'Metric {name} already registered as {metric.kind}')
+
+        return metric
+
+    def add_collector(self, name: str, collector: Callable[[], None]):
+        """
+        Registra (ou substitui) um coletor.
+
+        :param name: Nome do coletor
+        :param collector: Função sem argumentos
+        """
+        self._collectors[name] = collector
+
+    def remove_collector(self, name: str):
+        self._collectors.pop(name, None)
+
+    def render(self) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus.
+
+        :return: Corpo da resposta
+        """
+        for name, collector in list(self._collectors.items()):
+            try:
+                collector()
+            except Exception as e:
+                print('Error during metrics collection', name, e.__class__, e)
+
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.get_or_create(Counter, name, documentation, labels=labels)
+
+
+def gauge(name: str, documentation: str, labels: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.get_or_create(Gauge, name, documentation, labels=labels)
+
+
+def histogram(name: str, documentation: str, labels: tuple[str, ...] = (),
+              buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.get_or_create(Histogram, name, documentation, labels=labels, buckets=buckets)
+
+
+class RateLimitLogHandler(logging.Handler):
+    """Conta os 429 recebidos pelo discord.py a partir dos avisos do logger "discord.http"."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+
+        self._counter = counter('sonomonkey_discord_ratelimits_total', 'Respostas 429 recebidas do Discord',
+                                ('method',))
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, str) and record.msg.startswith('We are being rate limited'):
+            method = record.args[0] if record.args else ''
+            self._counter.inc(method=method)
+
+
+class MetricsServer:
+    """Servidor HTTP local que exporta as métricas em /metrics."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9100, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self._registry = registry
+        self._runner: web.AppRunner | None = None
+
+    async def _handle(self, _request: web.Request) -> web.Response:
+        return web.Response(text=self._registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        print(f'Metrics available at http://{self.host}:{self.port}/metrics')
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,162 @@
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+__all__ = [
+    'CProfileSession',
+    'SamplingProfiler'
+]
+
+
+class CProfileSession:
+    """
+    Perfil determinístico (cProfile) da thread do event loop.
+
+    Mede todas as chamadas de função enquanto ativo, portanto tem custo alto e deve ser usado por poucos segundos.
+    Quando parado não há custo algum.
+    """
+
+    def __init__(self):
+        self._profile: cProfile.Profile | None = None
+        self._stats: pstats.Stats | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self):
+        """Inicia o profiler. Deve ser chamado na thread do event loop."""
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        """Para o profiler e guarda as estatísticas."""
+        self._profile.disable()
+        self._stats = pstats.Stats(self._profile)
+        self._profile = None
+
+    def report(self, top: int = 25, sort: str = 'cumulative') -> str:
+        """
+        Retorna as funções mais custosas.
+
+        :param top: Quantidade de funções
+        :param sort: Coluna de ordenação do pstats ("cumulative", "tottime", "calls"...)
+        :return: Relatório em texto
+        """
+        stream = io.StringIO()
+
+        self._stats.stream = stream
+        self._stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """
+        Retorna as estatísticas no formato do pstats, compatível com snakeviz e "python -m pstats".
+
+        :return: Conteúdo do arquivo .pstats
+        """
+        return marshal.dumps(self._stats.stats)
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem da thread do event loop.
+
+    Uma thread separada lê a pilha do event loop a cada "interval" segundos (sys._current_frames), sem instrumentar as
+    chamadas, portanto o custo é baixo e proporcional à frequência de amostragem. As pilhas são agregadas no formato
+    "folded" (uma pilha por linha com frames separados por ";"), aceito por flamegraph.pl e speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+
+        self._target: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, thread_id: int | None = None):
+        """
+        Inicia a amostragem.
+
+        :param thread_id: Thread a ser amostrada, por padrão a thread que chamou o método (event loop)
+        """
+        self._target = thread_id or threading.get_ident()
+        self._stopped.clear()
+
+        self.samples = 0
+        self.stacks.clear()
+
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+
+            if frame is None:
+                return
+
+            frames = []
+
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{code.co_firstlineno})')
+                frame = frame.f_back
+
+            self.stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """
+        Retorna as pilhas agregadas no formato folded.
+
+        :return: Uma pilha por linha seguida da quantidade de amostras
+        """
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+    def report(self, top: int = 25) -> str:
+        """
+        Retorna as funções com mais amostras.
+
+        :param top: Quantidade de funções
+        :return: Relatório em texto com amostras próprias (self) e totais (inclusive) de cada função
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+
+            # Funções recursivas contam apenas uma vez por pilha
+            for frame in set(frames):
+                total[frame] += count
+
+        samples = self.samples or 1
+        lines = [f'{self.samples} amostras a cada {self.interval * 1000:g}ms', '',
+                 f'{"self%":>7} {"total%":>7}  função']
+
+        for frame, count in own.most_common(top):
+            lines.append(f'{count / samples * 100:6.1f}% {total[frame] / samples * 100:6.1f}%  {frame}')
+
+        return '\n'.join(lines) + '\n'
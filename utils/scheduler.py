@@ -0,0 +1,141 @@
+import asyncio
+from math import ceil
+from typing import Awaitable, Callable, Hashable
+
+
+__all__ = [
+    'TimerWheel'
+]
+
+
+class TimerWheel:
+    """
+    Roda de temporizadores (hashed timing wheel).
+
+    Cada prazo é guardado em um slot da roda junto com a quantidade de voltas restantes, portanto agendar e cancelar
+    custam O(1) independente da quantidade de prazos ativos. Uma única task avança o cursor a cada "resolution"
+    segundos e dispara os prazos vencidos.
+    """
+
+    def __init__(self, callback: Callable[[Hashable], Awaitable[None]], resolution: float = 1.0, size: int = 512):
+        self._callback = callback
+        self._resolution = resolution
+        self._size = size
+
+        # Cada slot mapeia chave -> voltas restantes; _entries mapeia chave -> índice do slot
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(size)]
+        self._entries: dict[Hashable, int] = {}
+        self._cursor = 0
+
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def start(self):
+        """Inicia a task responsável por avançar a roda."""
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Interrompe a roda, prazos pendentes são mantidos."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+        self._task = None
+
+    def set_callback(self, callback: Callable[[Hashable], Awaitable[None]]):
+        """
+        Substitui a função chamada ao vencer um prazo, mantendo os prazos pendentes.
+
+        :param callback: Nova função
+        """
+        self._callback = callback
+
+    def schedule(self, key: Hashable, delay: float):
+        """
+        Agenda um prazo, substituindo qualquer prazo anterior com a mesma chave.
+
+        :param key: Chave do prazo
+        :param delay: Tempo em segundos até o disparo
+        """
+        self.cancel(key)
+
+        ticks = max(1, ceil(delay / self._resolution))
+        slot = (self._cursor + ticks) % self._size
+
+        self._slots[slot][key] = (ticks - 1) // self._size
+        self._entries[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancela um prazo.
+
+        :param key: Chave do prazo
+        :return: True se havia um prazo agendado, do contrário False
+        """
+        slot = self._entries.pop(key, None)
+
+        if slot is None:
+            return False
+
+        del self._slots[slot][key]
+        return True
+
+    def remaining(self, key: Hashable) -> float | None:
+        """
+        Retorna o tempo restante de um prazo.
+
+        :param key: Chave do prazo
+        :return: Tempo em segundos ou None caso não exista
+        """
+        slot = self._entries.get(key)
+
+        if slot is None:
+            return None
+
+        ticks = (slot - self._cursor) % self._size or self._size
+        ticks += self._slots[slot][key] * self._size
+
+        return ticks * self._resolution
+
+    async def _run(self):
+        """Avança a roda usando o relógio do loop para não acumular atrasos."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self._resolution
+
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            # Caso o loop tenha ficado bloqueado, processa todos os ticks atrasados
+            while next_tick <= loop.time():
+                self._advance()
+                next_tick += self._resolution
+
+    def _advance(self):
+        """Move o cursor um slot e dispara os prazos vencidos."""
+        self._cursor = (self._cursor + 1) % self._size
+        slot = self._slots[self._cursor]
+
+        if not slot:
+            return
+
+        expired = []
+
+        for key, rounds in slot.items():
+            if rounds:
+                slot[key] = rounds - 1
+            else:
+                expired.append(key)
+
+        for key in expired:
+            del slot[key]
+            del self._entries[key]
+
+            task = asyncio.create_task(self._callback(key))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
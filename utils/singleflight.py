@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+__all__ = [
+    'SingleFlight'
+]
+
+
+class _Flight:
+    """Chamada em andamento e quantidade de chamadores aguardando por ela."""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas simultâneas com a mesma chave em uma única execução.
+
+    O primeiro chamador cria a task e os demais aguardam a mesma task, recebendo o mesmo resultado ou a mesma exceção.
+    Cada chamador aguarda através de asyncio.shield(), portanto cancelar um chamador não afeta os outros; a task só é
+    cancelada quando todos os chamadores desistem. Ao terminar a chave é liberada e chamadas seguintes executam
+    novamente (não há cache de resultados).
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+
+        # Métricas
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa a chamada ou aguarda a chamada em andamento com a mesma chave.
+
+        :param key: Chave normalizada da chamada
+        :param factory: Função que retorna a corrotina a ser executada
+        :return: Resultado da chamada
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            flight.task.add_done_callback(lambda _: self._release(key, flight))
+            self._flights[key] = flight
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Apenas o último chamador a desistir cancela a execução compartilhada
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _release(self, key: Hashable, flight: _Flight):
+        """
+        Libera a chave ao fim da execução.
+
+        :param key: Chave da chamada
+        :param flight: Chamada finalizada
+        """
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        # Evita o aviso "exception was never retrieved" caso nenhum chamador tenha sobrado
+        if not flight.task.cancelled():
+            flight.task.exception()
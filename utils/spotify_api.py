@@ -0,0 +1,228 @@
+import asyncio
+from typing import AsyncIterator
+
+from wavelink.ext import spotify
+
+from .metrics import counter
+
+
+__all__ = [
+    'SpotifyMetadataClient'
+]
+
+
+class SpotifyMetadataClient:
+    """
+    Cliente para os metadados do Spotify usando os endpoints em lote da API.
+
+    Reaproveita a sessão HTTP e o token do SpotifyClient passado ao wavelink, portanto há apenas uma conexão e um
+    token para todo o bot. Músicas individuais pedidas ao mesmo tempo são agrupadas em uma única requisição
+    (/tracks?ids=, até 50 por vez), playlists e álbuns são percorridos página a página e respostas 429 respeitam o
+    cabeçalho Retry-After, pausando todas as requisições até o prazo indicado.
+    """
+
+    API_URL = 'https://api.spotify.com/v1'
+    BATCH_SIZE = 50
+    PLAYLIST_PAGE = 100
+    ALBUM_PAGE = 50
+    PLAYLIST_FIELDS = ('items(track(id,name,uri,duration_ms,type,is_local,artists(name),album(name,images),'
+                       'external_ids(isrc)))')
+
+    def __init__(self, client: spotify.SpotifyClient, batch_window: float = 0.02, max_retries: int = 5):
+        self._client = client
+        self._batch_window = batch_window
+        self._max_retries = max_retries
+
+        self._token_lock = asyncio.Lock()
+        self._blocked_until = 0.0
+
+        # Músicas aguardando a próxima requisição em lote
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batches: set[asyncio.Task] = set()
+
+        # Métricas
+        self.requests = 0
+        self.throttled = 0
+        self._ratelimits = counter('sonomonkey_spotify_ratelimits_total', 'Respostas 429 recebidas do Spotify')
+
+    async def track(self, track_id: str) -> spotify.SpotifyTrack | None:
+        """
+        Retorna uma música. Pedidos feitos dentro da mesma janela são agrupados em uma única requisição.
+
+        :param track_id: Id da música no Spotify
+        :return: Objeto de música ou None caso não exista
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.setdefault(track_id, []).append(future)
+
+        if len(self._pending) >= self.BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._batch_window, self._flush)
+
+        return await future
+
+    async def tracks(self, track_ids: list[str]) -> list[spotify.SpotifyTrack | None]:
+        """
+        Retorna várias músicas usando o mínimo de requisições.
+
+        :param track_ids: Ids das músicas no Spotify
+        :return: Objetos de música na mesma ordem, None para ids inexistentes
+        """
+        tracks = []
+
+        for index in range(0, len(track_ids), self.BATCH_SIZE):
+            chunk = track_ids[index:index + self.BATCH_SIZE]
+            data = await self._get(f'{self.API_URL}/tracks', {'ids': ','.join(chunk)})
+
+            tracks.extend(spotify.SpotifyTrack(track) if track else None for track in data['tracks'])
+
+        return tracks
+
+    async def iterate(self, decode: spotify.SpotifyDecodePayload) -> AsyncIterator[spotify.SpotifyTrack]:
+        """
+        Percorre as músicas de uma playlist ou álbum, buscando uma página por vez conforme são consumidas.
+
+        :param decode: Retorno de spotify.decode_url()
+        :return: Gerador de objetos de música
+        """
+        if decode['type'] == spotify.SpotifySearchType.playlist:
+            tracks = self._iterate_playlist(decode['id'])
+        elif decode['type'] == spotify.SpotifySearchType.album:
+            tracks = self._iterate_album(decode['id'])
+        else:
+            raise TypeError('Only Spotify playlists and albums can be iterated.')
+
+        async for track in tracks:
+            yield track
+
+    async def _iterate_playlist(self, playlist_id: str) -> AsyncIterator[spotify.SpotifyTrack]:
+        url = f'{self.API_URL}/playlists/{playlist_id}/tracks'
+        offset = 0
+
+        while True:
+            params = {'limit': self.PLAYLIST_PAGE, 'offset': offset, 'fields': self.PLAYLIST_FIELDS}
+            items = (await self._get(url, params))['items']
+
+            for item in items:
+                track = item.get('track')
+
+                # Ignora episódios de podcasts, arquivos locais e músicas removidas
+                if track and track.get('id') and track.get('type') == 'track' and not track.get('is_local'):
+                    yield spotify.SpotifyTrack(track)
+
+            if len(items) < self.PLAYLIST_PAGE:
+                return
+
+            offset += self.PLAYLIST_PAGE
+
+    async def _iterate_album(self, album_id: str) -> AsyncIterator[spotify.SpotifyTrack]:
+        # Músicas de álbuns não trazem os dados do álbum nem o ISRC, por isso cada página é completada com uma
+        # requisição em lote no /tracks (ALBUM_PAGE é igual a BATCH_SIZE)
+        data = await self._get(f'{self.API_URL}/albums/{album_id}')
+        album = {'name': data['name'], 'images': data['images']}
+
+        page = data['tracks']
+        offset = 0
+
+        while True:
+            items = [item for item in page['items'] if item.get('id')]
+            tracks = await self.tracks([item['id'] for item in items])
+
+            for item, track in zip(items, tracks):
+                yield track or spotify.SpotifyTrack({**item, 'album': album})
+
+            if not page.get('next'):
+                return
+
+            offset += len(page['items'])
+            page = await self._get(f'{self.API_URL}/albums/{album_id}/tracks',
+                                   {'limit': self.ALBUM_PAGE, 'offset': offset})
+
+    def _flush(self):
+        """Envia as músicas pendentes em uma requisição em lote."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+
+        task = asyncio.create_task(self._fetch_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _fetch_batch(self, batch: dict[str, list[asyncio.Future]]):
+        """
+        Busca um lote e entrega o resultado a cada chamador.
+
+        :param batch: Ids das músicas e os futures que aguardam por elas
+        """
+        try:
+            tracks = await self.tracks(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for futures, track in zip(batch.values(), tracks):
+            for future in futures:
+                if not future.done():
+                    future.set_result(track)
+
+    async def _refresh_token(self, force: bool = False):
+        """
+        Renova o token compartilhado caso tenha expirado.
+
+        :param force: Renova mesmo que o token ainda pareça válido (após uma resposta 401)
+        """
+        async with self._token_lock:
+            if force or self._client.is_token_expired():
+                # noinspection PyProtectedMember
+                await self._client._get_bearer_token()
+
+    async def _get(self, url: str, params: dict | None = None) -> dict:
+        """
+        Faz uma requisição GET na API.
+
+        :param url: URL do endpoint
+        :param params: Parâmetros da URL
+        :return: Corpo da resposta
+        """
+        loop = asyncio.get_running_loop()
+        force_refresh = False
+
+        for _ in range(self._max_retries):
+            # Aguarda o prazo de algum 429 anterior, inclusive de outras requisições
+            delay = self._blocked_until - loop.time()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self._refresh_token(force_refresh)
+            force_refresh = False
+
+            async with self._client.session.get(url, params=params, headers=self._client.bearer_headers) as resp:
+                self.requests += 1
+
+                if resp.status == 200:
+                    return await resp.json()
+
+                if resp.status == 429:
+                    self.throttled += 1
+                    self._ratelimits.inc()
+                    retry_after = float(resp.headers.get('Retry-After', 1))
+                    self._blocked_until = max(self._blocked_until, loop.time() + retry_after)
+                elif resp.status == 401:
+                    force_refresh = True
+                else:
+                    raise spotify.SpotifyRequestError(resp.status, resp.reason)
+
+        raise spotify.SpotifyRequestError(429, 'Too many retries')
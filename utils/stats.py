@@ -0,0 +1,62 @@
+from collections import deque
+
+
+__all__ = [
+    'LatencyWindow'
+]
+
+
+class LatencyWindow:
+    """
+    Janela deslizante com as últimas amostras de latência.
+
+    Mantém apenas as "size" amostras mais recentes, portanto os percentis refletem o comportamento atual do bot e não
+    todo o histórico desde que foi iniciado.
+    """
+
+    def __init__(self, name: str, size: int = 500):
+        self.name = name
+        self.total = 0
+
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        """
+        Adiciona uma amostra.
+
+        :param seconds: Latência em segundos
+        """
+        self._samples.append(seconds)
+        self.total += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Retorna o percentil das amostras da janela (método nearest-rank).
+
+        :param percent: Percentil entre 0 e 100
+        :return: Latência em segundos ou 0 caso não haja amostras
+        """
+        if not self._samples:
+            return 0.0
+
+        samples = sorted(self._samples)
+        index = max(0, min(len(samples) - 1, round(percent / 100 * len(samples) + 0.5) - 1))
+
+        return samples[index]
+
+    def summary(self) -> str:
+        """
+        Resume a janela em uma linha.
+
+        :return: String com quantidade de amostras, p50, p95 e máximo em milissegundos
+        """
+        if not self._samples:
+            return f'{self.name}: sem amostras'
+
+        return (f'{self.name}: n={len(self._samples)} (total {self.total}) '
+                f'p50={self.percentile(50) * 1000:.0f}ms '
+                f'p95={self.percentile(95) * 1000:.0f}ms '
+                f'max={max(self._samples) * 1000:.0f}ms')
@@ -0,0 +1,164 @@
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import islice
+
+
+__all__ = [
+    'Suggestion',
+    'SuggestionIndex',
+    'fold_text'
+]
+
+
+def fold_text(text: str) -> str:
+    """
+    Normaliza um texto para comparação de prefixos: sem acentos, sem diferenciar maiúsculas e sem espaços repetidos.
+
+    :param text: Texto original
+    :return: Texto normalizado
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).split())
+
+
+class Suggestion:
+    """Item do índice: título exibido, valor enviado ao /play (URL ou título) e peso (quantidade de usos)."""
+
+    __slots__ = ('title', 'value', 'weight', 'keys')
+
+    def __init__(self, title: str, value: str, weight: int, keys: list[str]):
+        self.title = title
+        self.value = value
+        self.weight = weight
+        self.keys = keys
+
+    def __repr__(self) -> str:
+        return f'Suggestion(title={self.title}, weight={self.weight})'
+
+
+class SuggestionIndex:
+    """
+    Índice de prefixos para o autocomplete.
+
+    Cada título gera uma chave por palavra (o restante do título a partir dela), guardadas em listas ordenadas, de
+    forma que "never gon" encontra "Rick Astley - Never Gonna Give You Up". Uma pesquisa é uma busca binária seguida
+    da leitura das chaves com o mesmo prefixo, limitada a "scan" chaves, portanto o custo não depende do tamanho do
+    índice. Ao ultrapassar "capacity" itens, o usado há mais tempo é removido.
+
+    Chaves novas entram em uma lista pequena, mesclada com a lista principal em lotes (no mínimo "batch" chaves), para
+    que adicionar não precise deslocar a lista principal inteira. Chaves de itens removidos são descartadas apenas nas
+    mesclagens.
+    """
+
+    def __init__(self, capacity: int = 2000, scan: int = 100, batch: int = 1024):
+        self.capacity = capacity
+        self.scan = scan
+        self.batch = batch
+
+        # Itens em ordem de uso (o último é o mais recente)
+        self._items: OrderedDict[str, Suggestion] = OrderedDict()
+
+        # Chaves ordenadas (chave, valor do item): lista principal, chaves recentes e chaves obsoletas na principal
+        self._keys: list[tuple[str, str]] = []
+        self._recent: list[tuple[str, str]] = []
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._items
+
+    def add(self, title: str, value: str, weight: int = 1):
+        """
+        Adiciona um item ou, caso já exista, soma o peso e o marca como usado recentemente.
+
+        :param title: Título exibido
+        :param value: Valor enviado ao /play
+        :param weight: Peso somado ao item
+        """
+        item = self._items.get(value)
+
+        if item is not None:
+            item.weight += weight
+            self._items.move_to_end(value)
+            return
+
+        words = fold_text(title).split(' ')
+        keys = list(dict.fromkeys(' '.join(words[index:]) for index in range(len(words)) if words[index]))
+
+        self._items[value] = Suggestion(title, value, weight, keys)
+
+        for key in keys:
+            insort(self._recent, (key, value))
+
+        while len(self._items) > self.capacity:
+            self.remove(next(iter(self._items)))
+
+        # Lotes proporcionais ao índice mantêm o custo amortizado das mesclagens constante
+        if len(self._recent) > max(self.batch, len(self._keys) // 16):
+            self._merge()
+
+    def remove(self, value: str):
+        """
+        Remove um item.
+
+        :param value: Valor do item
+        """
+        item = self._items.pop(value, None)
+
+        if item is None:
+            return
+
+        self._stale += len(item.keys)
+
+        # Muitas chaves obsoletas deixam as pesquisas mais lentas
+        if self._stale > len(self._keys) // 2 + self.batch:
+            self._merge()
+
+    def search(self, prefix: str, limit: int = 25) -> list[Suggestion]:
+        """
+        Pesquisa itens com alguma palavra iniciando pelo prefixo, os mais usados primeiro.
+        Sem prefixo retorna os itens usados mais recentemente.
+
+        :param prefix: Texto digitado pelo usuário
+        :param limit: Quantidade máxima de itens
+        :return: Itens encontrados
+        """
+        prefix = fold_text(prefix)
+
+        if not prefix:
+            return list(islice(reversed(self._items.values()), limit))
+
+        found: dict[str, Suggestion] = {}
+
+        for keys in (self._recent, self._keys):
+            index = bisect_left(keys, (prefix, ''))
+
+            for key, value in keys[index:index + self.scan]:
+                if not key.startswith(prefix):
+                    break
+
+                item = self._items.get(value)
+
+                # Ignora chaves de itens removidos (ou readicionados com outro título)
+                if item is not None and key in item.keys:
+                    found[value] = item
+
+        return sorted(found.values(), key=lambda item: item.weight, reverse=True)[:limit]
+
+    def _merge(self):
+        """Mescla as chaves recentes na lista principal, descartando as obsoletas."""
+        keys = self._keys + self._recent
+
+        if self._stale:
+            items = self._items
+            keys = [(key, value) for key, value in keys if value in items and key in items[value].keys]
+
+        # O timsort aproveita as duas sequências já ordenadas
+        keys.sort()
+
+        self._keys = keys
+        self._recent = []
+        self._stale = 0
@@ -0,0 +1,142 @@
+import re
+from bisect import bisect_left, insort
+from typing import Any, Callable
+
+from .suggestions import fold_text
+
+
+__all__ = [
+    'TokenIndex'
+]
+
+
+def _tokens(text: str) -> list[str]:
+    """Palavras normalizadas (sem acentos e sem diferenciar maiúsculas) de um texto."""
+    return re.findall(r'\w+', fold_text(text))
+
+
+class TokenIndex:
+    """
+    Índice invertido (palavra -> itens) de uma coleção que muda com frequência, como a fila de músicas.
+
+    Deve ser atualizado a cada item adicionado ou removido, o custo é proporcional às palavras do item e não ao tamanho
+    da coleção. Itens são identificados pelo próprio objeto (id), portanto o mesmo objeto pode estar na coleção mais de
+    uma vez. Uma pesquisa encontra os itens que possuem, para cada palavra pesquisada, alguma palavra iniciando por ela,
+    consultando apenas o vocabulário ordenado e as listas de itens dessas palavras.
+    """
+
+    def __init__(self, text: Callable[[Any], str]):
+        self.text = text
+
+        # Ids dos itens de cada palavra e vocabulário ordenado para pesquisar prefixos
+        self._postings: dict[str, set[int]] = {}
+        self._vocabulary: list[str] = []
+
+        # Id -> [item, palavras, quantidade de vezes na coleção]
+        self._items: dict[int, list] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, item: Any):
+        """
+        Indexa um item.
+
+        :param item: Item adicionado à coleção
+        """
+        self._size += 1
+        key = id(item)
+        indexed = self._items.get(key)
+
+        if indexed is not None:
+            indexed[2] += 1
+            return
+
+        tokens = set(_tokens(self.text(item)))
+        self._items[key] = [item, tokens, 1]
+
+        for token in tokens:
+            posting = self._postings.get(token)
+
+            if posting is None:
+                posting = self._postings[token] = set()
+                insort(self._vocabulary, token)
+
+            posting.add(key)
+
+    def discard(self, item: Any):
+        """
+        Remove uma ocorrência de um item, caso esteja indexado.
+
+        :param item: Item removido da coleção
+        """
+        key = id(item)
+        indexed = self._items.get(key)
+
+        if indexed is None:
+            return
+
+        self._size -= 1
+        indexed[2] -= 1
+
+        if indexed[2] > 0:
+            return
+
+        del self._items[key]
+
+        for token in indexed[1]:
+            posting = self._postings[token]
+            posting.discard(key)
+
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def clear(self):
+        """Remove todos os itens."""
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._items.clear()
+        self._size = 0
+
+    def rebuild(self, items):
+        """
+        Reconstrói o índice a partir da coleção inteira.
+
+        :param items: Itens da coleção
+        """
+        self.clear()
+
+        for item in items:
+            self.add(item)
+
+    def search(self, query: str) -> list[Any]:
+        """
+        Pesquisa itens com todas as palavras da pesquisa (a última pode estar incompleta).
+
+        :param query: Texto pesquisado
+        :return: Itens encontrados, sem ordem definida
+        """
+        words = sorted(set(_tokens(query)), key=len, reverse=True)
+
+        if not words:
+            return []
+
+        found: set[int] | None = None
+
+        # Prefixos mais longos costumam ser mais seletivos, portanto a interseção diminui mais cedo
+        for word in words:
+            matches: set[int] = set()
+            index = bisect_left(self._vocabulary, word)
+
+            while index < len(self._vocabulary) and self._vocabulary[index].startswith(word):
+                matches |= self._postings[self._vocabulary[index]]
+                index += 1
+
+            found = matches if found is None else found & matches
+
+            if not found:
+                return []
+
+        return [self._items[key][0] for key in found]
@@ -0,0 +1,352 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import secrets
+import time
+from typing import Any, Callable
+
+
+__all__ = [
+    'TRACER',
+    'Tracer',
+    'Span',
+    'NOOP_SPAN',
+    'JsonLinesExporter',
+    'OtlpJsonExporter',
+    'traced'
+]
+
+# Span ativo no contexto atual. Tasks criadas dentro de um span herdam uma cópia do contexto e continuam o trace.
+_current_span: contextvars.ContextVar['Span | None'] = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """Operação cronometrada dentro de um trace."""
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'status', '_token')
+
+    def __init__(self, trace: '_Trace', name: str, parent: 'Span | None', attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.status = 'ok'
+
+        self._token: contextvars.Token | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        """Adiciona atributos ao span."""
+        self.attributes.update(attributes)
+
+    def end(self, status: str | None = None):
+        """
+        Finaliza o span. Chamadas repetidas são ignoradas.
+
+        :param status: "ok", "error", "cancelled" ou "timeout"
+        """
+        if self.end_ns is not None:
+            return
+
+        if status:
+            self.status = status
+
+        self.end_ns = time.time_ns()
+        self.trace.finished(self)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, _tb):
+        _current_span.reset(self._token)
+
+        if exc_type is asyncio.CancelledError:
+            self.end('cancelled')
+        elif exc_type is not None:
+            self.set(error=f'{exc_type.__name__}: {exc}')
+            self.end('error')
+        else:
+            self.end()
+
+
+class _NoopSpan:
+    """Span usado quando não há trace ativo ou o tracer está desabilitado."""
+
+    def set(self, **_):
+        pass
+
+    def end(self, status: str | None = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    """Conjunto de spans de uma interação, exportado quando todos os spans terminam."""
+
+    def __init__(self, tracer: 'Tracer'):
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(16)
+        self.spans: list[Span] = []
+        self.open = 0
+        self.exported = False
+        self.deadline: asyncio.TimerHandle | None = None
+
+    def add(self, span: Span):
+        self.spans.append(span)
+        self.open += 1
+
+    def finished(self, _span: Span):
+        self.open -= 1
+
+        if self.open == 0:
+            self.export()
+
+    def expire(self):
+        """Finaliza spans que ficaram abertos além do prazo (ex: a música nunca começou a tocar)."""
+        self.deadline = None
+
+        for span in self.spans:
+            if span.end_ns is None:
+                span.end('timeout')
+
+    def export(self):
+        if self.exported:
+            return
+
+        self.exported = True
+
+        if self.deadline:
+            self.deadline.cancel()
+
+        self.tracer.export(self)
+
+
+class Tracer:
+    """
+    Cria traces e spans usando contextvars, de forma que o span pai é sempre o span ativo do contexto atual.
+
+    Sem exporter o tracer fica desabilitado e todas as chamadas retornam um span vazio, sem custo relevante.
+    """
+
+    def __init__(self, exporter: '_Exporter | None' = None, timeout: float = 60):
+        self.exporter = exporter
+        self.timeout = timeout
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @staticmethod
+    def current() -> Span | None:
+        """Retorna o span ativo no contexto atual."""
+        return _current_span.get()
+
+    def start_trace(self, name: str, **attributes) -> Span | _NoopSpan:
+        """
+        Inicia um novo trace e torna seu span raiz o span ativo do contexto atual.
+        O span raiz deve ser finalizado com end(), o trace é exportado quando todos os spans terminarem.
+
+        :param name: Nome da interação
+        :return: Span raiz
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+
+        trace = _Trace(self)
+        span = Span(trace, name, None, attributes)
+        trace.add(span)
+
+        try:
+            trace.deadline = asyncio.get_running_loop().call_later(self.timeout, trace.expire)
+        except RuntimeError:
+            pass
+
+        _current_span.set(span)
+        return span
+
+    def span(self, name: str, **attributes) -> Span | _NoopSpan:
+        """
+        Cria um span filho do span ativo. Deve ser usado com "with" ou finalizado manualmente com end().
+
+        :param name: Nome da operação
+        :return: Span filho ou span vazio caso não haja trace ativo
+        """
+        parent = _current_span.get()
+
+        if parent is None or parent.trace.exported:
+            return NOOP_SPAN
+
+        span = Span(parent.trace, name, parent, attributes)
+        parent.trace.add(span)
+
+        return span
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use(span: Span | _NoopSpan):
+        """
+        Torna um span já existente o span ativo dentro do bloco "with", sem finalizá-lo ao sair.
+        Usado para continuar um trace em tarefas executadas em outro contexto.
+
+        :param span: Span a ser ativado
+        """
+        if not isinstance(span, Span):
+            yield span
+            return
+
+        token = _current_span.set(span)
+
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def export(self, trace: _Trace):
+        if self.exporter:
+            self.exporter.export(trace)
+
+
+class _Exporter:
+    """Base dos exporters em arquivo. A escrita é feita fora do event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def format(self, trace: _Trace) -> dict:
+        raise NotImplementedError
+
+    def export(self, trace: _Trace):
+        line = json.dumps(self.format(trace), separators=(',', ':'), ensure_ascii=False) + '\n'
+
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._append, line)
+        except RuntimeError:
+            self._append(line)
+
+    def _append(self, line: str):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line)
+
+
+class JsonLinesExporter(_Exporter):
+    """Exporta um trace por linha, com os spans em ordem de início."""
+
+    def format(self, trace: _Trace) -> dict:
+        root = trace.spans[0]
+
+        return {
+            'trace_id': trace.trace_id,
+            'name': root.name,
+            'start': root.start_ns / 1e9,
+            'duration_ms': round(max(span.end_ns for span in trace.spans) / 1e6 - root.start_ns / 1e6, 3),
+            'spans': [
+                {
+                    'name': span.name,
+                    'span_id': span.span_id,
+                    'parent_id': span.parent_id,
+                    'offset_ms': round((span.start_ns - root.start_ns) / 1e6, 3),
+                    'duration_ms': round(span.duration_ms, 3),
+                    'status': span.status,
+                    'attributes': span.attributes
+                }
+                for span in trace.spans
+            ]
+        }
+
+
+class OtlpJsonExporter(_Exporter):
+    """Exporta cada trace como uma ExportTraceServiceRequest em JSON (formato do file exporter do OpenTelemetry)."""
+
+    STATUS_CODES = {'ok': 1}
+
+    def __init__(self, path: str, service_name: str = 'sonomonkey'):
+        super().__init__(path)
+        self.service_name = service_name
+
+    @staticmethod
+    def _value(value: Any) -> dict:
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+
+        return {'stringValue': str(value)}
+
+    def _attributes(self, attributes: dict) -> list[dict]:
+        return [{'key': key, 'value': self._value(value)} for key, value in attributes.items()]
+
+    def format(self, trace: _Trace) -> dict:
+        spans = []
+
+        for span in trace.spans:
+            data = {
+                'traceId': trace.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1 if span.parent_id else 2,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': self._attributes({**span.attributes, 'status': span.status}),
+                'status': {'code': self.STATUS_CODES.get(span.status, 2)}
+            }
+
+            if span.parent_id:
+                data['parentSpanId'] = span.parent_id
+
+            spans.append(data)
+
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': self._attributes({'service.name': self.service_name})},
+                'scopeSpans': [{'scope': {'name': self.service_name}, 'spans': spans}]
+            }]
+        }
+
+
+TRACER = Tracer()
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator para callbacks de botões das views: cada clique inicia um trace próprio.
+
+    :param name: Nome do trace
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(self, interaction, *args, **kwargs):
+            span = TRACER.start_trace(name, guild=interaction.guild_id or 0, user=interaction.user.id)
+
+            try:
+                return await func(self, interaction, *args, **kwargs)
+            except Exception as e:
+                span.set(error=f'{e.__class__.__name__}: {e}')
+                span.end('error')
+                raise
+            finally:
+                span.end()
+
+        return wrapper
+
+    return decorator
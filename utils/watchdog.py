@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from .metrics import counter, histogram
+from .stats import LatencyWindow
+
+
+__all__ = [
+    'LoopWatchdog',
+    'Stall'
+]
+
+
+class Stall:
+    """Registro de um travamento do event loop."""
+
+    __slots__ = ('started', 'duration', 'task', 'stack')
+
+    def __init__(self, started: datetime, task: str, stack: str):
+        self.started = started
+        self.duration: float | None = None
+        self.task = task
+        self.stack = stack
+
+    def __str__(self) -> str:
+        duration = f'{self.duration * 1000:.0f}ms' if self.duration is not None else 'em andamento'
+        return f'[{self.started:%d/%m/%y %H:%M:%S}] {duration} em {self.task}\n{self.stack}'
+
+
+class LoopWatchdog:
+    """
+    Mede continuamente o atraso (lag) do event loop e identifica o código que o bloqueou.
+
+    Uma task envia batimentos a cada "interval" segundos e registra o atraso de cada um. Uma thread separada confere
+    os batimentos e, caso o último tenha mais de "threshold" segundos, captura a pilha da thread do event loop
+    (sys._current_frames) enquanto o bloqueio ainda está acontecendo, apontando a função síncrona responsável.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, history: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lag = LatencyWindow('lag', size=1000)
+        self.stalls: deque[Stall] = deque(maxlen=history)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._last_beat = time.monotonic()
+        self._current: Stall | None = None
+
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        self._lag_histogram = histogram('sonomonkey_event_loop_lag_seconds', 'Atraso dos batimentos do event loop',
+                                        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+        self._stall_counter = counter('sonomonkey_event_loop_stalls_total', 'Travamentos acima do limite')
+
+    def start(self):
+        """Inicia o batimento (no event loop atual) e a thread de monitoramento."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+
+        if not self._task or self._task.done():
+            self._task = self._loop.create_task(self._heartbeat())
+
+        if not self._thread or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._monitor, name='loop-watchdog', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def summary(self) -> str:
+        """
+        Resume o estado do event loop.
+
+        :return: Linha com percentis do atraso e quantidade de travamentos
+        """
+        return f'{self.lag.summary()} | travamentos acima de {self.threshold * 1000:.0f}ms: {len(self.stalls)}'
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+
+            self._last_beat = now
+            self.lag.add(lag)
+            self._lag_histogram.observe(lag)
+
+            # O loop voltou a responder, finaliza o travamento capturado pela thread
+            stall = self._current
+
+            if stall is not None:
+                self._current = None
+                stall.duration = lag
+
+                print(f'Event loop blocked for {lag * 1000:.0f}ms in {stall.task}\n{stall.stack}')
+
+    def _monitor(self):
+        while not self._stopped.wait(self.interval / 2):
+            blocked = time.monotonic() - self._last_beat - self.interval
+
+            if blocked < self.threshold or self._current is not None:
+                continue
+
+            stall = self._capture()
+
+            if stall:
+                self._current = stall
+                self.stalls.append(stall)
+                self._stall_counter.inc()
+
+    def _capture(self) -> Stall | None:
+        """
+        Captura a pilha atual da thread do event loop.
+
+        :return: Registro do travamento ou None caso a thread não exista mais
+        """
+        frame = sys._current_frames().get(self._loop_thread)
+
+        if frame is None:
+            return None
+
+        # Descarta os frames internos do asyncio, mantendo apenas o código executado pelo callback atual
+        frames = traceback.extract_stack(frame)
+        start = next((index + 1 for index in range(len(frames) - 1, -1, -1)
+                      if frames[index].filename.endswith(('asyncio/events.py', 'asyncio\\events.py'))), 0)
+
+        stack = ''.join(traceback.format_list(frames[start:]))
+
+        # Task que estava executando no momento do bloqueio
+        task = asyncio.current_task(self._loop)
+        task_name = f'{task.get_name()} ({task.get_coro().__qualname__})' if task else 'callback fora de task'
+
+        return Stall(datetime.now(), task_name, stack)